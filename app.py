@@ -1,21 +1,32 @@
-from flask import Flask, request, jsonify, session, send_from_directory, send_file, current_app
+from flask import Flask, Response, request, jsonify, session, send_from_directory, send_file, current_app, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-from models import db, Call, Transcript, Interaction, Appointment, CRMWebhook
+from models import db, Call, Transcript, Interaction, Appointment, CRMWebhook, upgrade_schema
 from config import Config
-from services.twilio_service import TwilioService
-from services.deepgram_service import DeepgramService
-from services.openai_service import OpenAIService
-from services.elevenlabs_service import ElevenLabsService
-from services.calendar_service import CalendarService
-from services.crm_service import CRMService
+from services.audio_store import audio_store
+from services.call_recorder import recording_path
+from services.filler_audio import filler_bank
+from services.tts_orchestrator import build_tts_orchestrator
+from services.registry import client_registry, register_app_services
+from services.call_summary import enqueue_summary
+from services.call_export import CALL_FIELDS, INCLUDES, iter_call_export, ndjson_lines, parse_time
+from services.job_queue import job_queue
+from services.media_stream import media_stream_server
+from services.media_workers import read_worker_stats
+from services.live_events import live_events
+from services.transcription_jobs import enqueue_transcription
+from services.write_behind import write_behind
+from utils.cooperative import concurrency_mode, green_safety_report
+from utils.resilience import resilience_snapshot
+from utils.deadline import cap_timeout, with_deadline
+from utils.http_cache import response_cache
+from utils.static_assets import static_assets
+from utils.http_transport import http_transport
 from datetime import datetime, timedelta
 import logging
-import asyncio
 import json
 import os
 from functools import wraps
-import base64
 import threading
 
 # Configure logging
@@ -23,46 +34,47 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_app():
-    app = Flask(__name__, static_folder='demo/dist', static_url_path='')
+    # The built frontend is served by the routes below, from an index of demo/dist
+    app = Flask(__name__, static_folder=None)
     app.config.from_object(Config)
     
     # Initialize extensions
     db.init_app(app)
     CORS(app, origins=['http://localhost:3000', 'http://localhost:5173'])
     
-    # Initialize SocketIO for WebSocket streaming
-    socketio = SocketIO(app, cors_allowed_origins="*")
+    # Initialize SocketIO for WebSocket streaming, matching how the process was started:
+    # green threads when run.py monkey-patched for eventlet/gevent, plain threads under sync gunicorn
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode=concurrency_mode())
+    # Dashboards get call activity pushed over it instead of polling
+    live_events.init_app(app, socketio)
+    for warning in green_safety_report(app.config['SQLALCHEMY_DATABASE_URI'])['warnings']:
+        logger.warning(f"Cooperative serving: {warning}")
+    
+    # Service clients are built lazily, once per worker process, by the shared registry
+    register_app_services(app)
     
-    # Initialize services with lazy loading
     def get_twilio_service():
-        if not hasattr(app, '_twilio_service'):
-            app._twilio_service = TwilioService()
-        return app._twilio_service
+        return client_registry.get('twilio')
     
     def get_deepgram_service():
-        if not hasattr(app, '_deepgram_service'):
-            app._deepgram_service = DeepgramService()
-        return app._deepgram_service
+        return client_registry.get('deepgram')
     
     def get_openai_service():
-        if not hasattr(app, '_openai_service'):
-            app._openai_service = OpenAIService()
-        return app._openai_service
+        return client_registry.get('openai')
     
     def get_elevenlabs_service():
-        if not hasattr(app, '_elevenlabs_service'):
-            app._elevenlabs_service = ElevenLabsService()
-        return app._elevenlabs_service
+        return client_registry.get('elevenlabs')
     
     def get_calendar_service():
-        if not hasattr(app, '_calendar_service'):
-            app._calendar_service = CalendarService()
-        return app._calendar_service
+        return client_registry.get('calendar')
     
     def get_crm_service():
-        if not hasattr(app, '_crm_service'):
-            app._crm_service = CRMService()
-        return app._crm_service
+        return client_registry.get('crm')
+    
+    client_registry.register('tts', lambda: build_tts_orchestrator(app.config, get_deepgram_service, get_elevenlabs_service))
+    
+    def get_tts_orchestrator():
+        return client_registry.get('tts')
     
     # Authentication decorator
     def require_auth(f):
@@ -77,10 +89,45 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+    
+    # Warm up in the background so boot isn't blocked on the network: open pooled
+    # connections to the TTS providers, then render the filler acknowledgement bank
+    def warm_up():
+        warm_urls = []
+        if app.config.get('DEEPGRAM_API_KEY'):
+            warm_urls.append('https://api.deepgram.com/')
+        if app.config.get('ELEVENLABS_API_KEY'):
+            warm_urls.append('https://api.elevenlabs.io/')
+        http_transport.prewarm(warm_urls)
+        
+        with app.app_context():
+            try:
+                filler_bank.load(get_deepgram_service().text_to_speech)
+            except Exception as e:
+                logger.error(f"Error loading filler audio bank: {e}")
+    
+    threading.Thread(target=warm_up, name='worker-warm-up', daemon=True).start()
+    
+    # Post-call transcription, summaries and CRM delivery run as durable background jobs,
+    # never in a request worker
+    job_queue.init_app(app)
+    
+    # Per-turn writes are flushed in batches off the webhook path
+    write_behind.init_app(app)
+    
+    # Twilio media streams share this server, its app context and its service clients
+    media_stream_server.init_app(app)
+    
+    # Dashboard polls share one rendering per endpoint and query for a few seconds
+    response_cache.init_app(app)
+    
+    static_assets.init_app(app)
     
     # WEBHOOK ENDPOINTS
     
     @app.route('/webhooks/voice', methods=['POST'])
+    @with_deadline
     def handle_voice_webhook():
         """Handle incoming Twilio voice webhook"""
         try:
@@ -103,6 +150,7 @@ def create_app():
                 )
                 db.session.add(call)
                 db.session.commit()
+                live_events.call_started(call)
                 
                 # Trigger CRM webhook for call started
                 get_crm_service().trigger_call_started({
@@ -113,10 +161,19 @@ def create_app():
                     'call_type': 'inbound'
                 })
             else:
-                call.status = call_status
                 if call_status in ['completed', 'busy', 'no-answer', 'failed']:
-                    call.end_time = datetime.utcnow()
-                db.session.commit()
+                    end_time = datetime.utcnow()
+                    write_behind.update_call(call_sid, status=call_status, end_time=end_time)
+                    write_behind.end_call(call_sid)
+                    live_events.call_ended(call_sid, status=call_status, end_time=end_time)
+                    # Give the buffered turns time to land before summarising them
+                    enqueue_summary(call.id, delay=10, notify_crm=True)
+                else:
+                    write_behind.update_call(call_sid, status=call_status)
+                    live_events.call_updated(call_sid, status=call_status)
+            
+            # Hand the pooled connection back before any provider call; see the transcription webhook
+            db.session.close()
             
             # Generate TwiML response
             if call_status == 'ringing':
@@ -144,7 +201,16 @@ def create_app():
     <Say voice="alice" language="en-US">Hello! Thank you for calling.</Say>
 </Response>''', 200, {'Content-Type': 'text/xml'}
     
+    @app.route('/media-stream', websocket=True)
+    def handle_media_stream():
+        """Twilio media stream WebSocket; the request lasts as long as the call"""
+        response = media_stream_server.serve(request.environ)
+        if response is None:
+            return jsonify({'error': 'Server is shutting down'}), 503
+        return response
+    
     @app.route('/webhooks/transcribe', methods=['POST'])
+    @with_deadline
     def handle_transcription_webhook():
         """Handle Twilio transcription webhook - save response and return empty"""
         try:
@@ -159,15 +225,23 @@ def create_app():
                 # Find the call
                 call = Call.query.filter_by(call_sid=call_sid).first()
                 if call:
-                    # Save transcript
-                    transcript = Transcript(
+                    # Save transcript (buffered, flushed in batches). The live line carries the
+                    # row's timestamp so dashboards can match it against their snapshot
+                    heard_at = datetime.utcnow()
+                    write_behind.add(
+                        Transcript,
                         call_id=call.id,
+                        timestamp=heard_at,
                         speaker='caller',
                         text=transcription_text,
                         confidence=0.8,  # Twilio doesn't provide confidence
                         is_final=True
                     )
-                    db.session.add(transcript)
+                    live_events.transcript(call_sid, 'caller', transcription_text, timestamp=heard_at)
+                    
+                    # Hand the pooled connection back before waiting on OpenAI: with green threads
+                    # far more turns wait at once than the pool has connections
+                    db.session.close()
                     
                     # Generate intelligent AI response using OpenAI with timeout protection
                     try:
@@ -207,21 +281,23 @@ def create_app():
                         confidence = 0.7
                     
                     # Save interaction with proper intent analysis
-                    interaction = Interaction(
+                    answered_at = datetime.utcnow()
+                    write_behind.add(
+                        Interaction,
                         call_id=call.id,
+                        timestamp=answered_at,
                         intent=intent,
                         confidence=confidence,
                         user_input=transcription_text,
                         ai_response=ai_response_text
                     )
-                    db.session.add(interaction)
+                    live_events.interaction(call_sid, intent, transcription_text, ai_response_text, timestamp=answered_at)
                     
                     # Store the AI response for the next part of the call
                     if not hasattr(current_app, '_ai_responses'):
                         current_app._ai_responses = {}
                     current_app._ai_responses[call_sid] = ai_response_text
                     
-                    db.session.commit()
                     logger.info(f"Saved AI response for next call phase: {ai_response_text[:50]}...")
             elif transcription_status == 'failed':
                 logger.warning(f"Twilio transcription failed for call {call_sid}")
@@ -229,7 +305,15 @@ def create_app():
                 logger.info("Twilio transcription failed, checking for Deepgram transcription...")
                 call = Call.query.filter_by(call_sid=call_sid).first()
                 if call:
-                    # Check if we have Deepgram transcripts
+                    # Transcribe this turn's clip in the background so the call's record is complete;
+                    # the job retries until Twilio has the media ready
+                    recording_url = request.form.get('RecordingUrl')
+                    if recording_url and current_app.config.get('DEEPGRAM_API_KEY'):
+                        enqueue_transcription(call.id, recording_url=recording_url, speaker='caller',
+                                              started_at=datetime.utcnow())
+                    
+                    # Check if we have Deepgram transcripts; the caller's latest lines may still be buffered
+                    write_behind.flush()
                     existing_transcripts = Transcript.query.filter_by(call_id=call.id).filter(
                         ~Transcript.text.like('%Mock%')
                     ).all()
@@ -262,30 +346,36 @@ def create_app():
                         )
                         
                         # Save simple interaction
-                        interaction = Interaction(
+                        answered_at = datetime.utcnow()
+                        write_behind.add(
+                            Interaction,
                             call_id=call.id,
+                            timestamp=answered_at,
                             intent='general_inquiry',
                             confidence=0.9,
                             user_input=latest_transcript.text,
                             ai_response=ai_response_text
                         )
-                        db.session.add(interaction)
-                        db.session.commit()
+                        live_events.interaction(call_sid, 'general_inquiry', latest_transcript.text, ai_response_text,
+                                                timestamp=answered_at)
                         
                         twiml_response = str(response)
                         logger.info(f"AI Response TwiML (Deepgram backup): {twiml_response}")
                         return twiml_response, 200, {'Content-Type': 'text/xml'}
                     else:
                         # Create a basic transcript indicating transcription failed
-                        transcript = Transcript(
+                        failed_at = datetime.utcnow()
+                        write_behind.add(
+                            Transcript,
                             call_id=call.id,
+                            timestamp=failed_at,
                             speaker='system',
                             text='[Transcription unavailable - both Twilio and Deepgram failed]',
                             confidence=0.0,
                             is_final=True
                         )
-                        db.session.add(transcript)
-                        db.session.commit()
+                        live_events.transcript(call_sid, 'system', '[Transcription unavailable - both Twilio and Deepgram failed]',
+                                               timestamp=failed_at)
             
             # Return empty response for failed transcriptions
             return '', 200
@@ -295,6 +385,7 @@ def create_app():
             return '', 500
     
     @app.route('/webhooks/recording', methods=['POST'])
+    @with_deadline
     def handle_recording_webhook():
         """Handle Twilio recording webhook and redirect to AI response"""
         try:
@@ -304,12 +395,14 @@ def create_app():
             
             logger.info(f"Recording webhook for {call_sid}: {recording_url}")
             
-            # Update call with recording info first
+            # Update call with recording info first (buffered)
             call = Call.query.filter_by(call_sid=call_sid).first()
             if call:
-                call.recording_url = recording_url
-                call.duration = int(recording_duration) if recording_duration else None
-                db.session.commit()
+                duration = int(recording_duration) if recording_duration else None
+                write_behind.update_call(call_sid, recording_url=recording_url, duration=duration)
+                live_events.call_updated(call_sid, duration=duration)
+                # This is one turn's clip, which Twilio transcribes itself; Deepgram only gets
+                # the turns it fails on (see the transcription webhook)
             
             # Use Redirect to ensure AI response gets played
             from twilio.twiml.voice_response import VoiceResponse
@@ -327,6 +420,7 @@ def create_app():
             return '', 500
     
     @app.route('/webhooks/ai-response', methods=['POST'])
+    @with_deadline
     def handle_ai_response():
         """Deliver AI response after recording and transcription complete"""
         try:
@@ -345,17 +439,26 @@ def create_app():
             if ai_response_text:
                 logger.info(f"Playing AI response: {ai_response_text[:50]}...")
                 
-                # Try to use Deepgram Aura 2 - Amalthea voice first
+                # Hedged TTS (Deepgram Aura 2 - Amalthea first, ElevenLabs as the hedge);
+                # Twilio starts fetching the streaming URL while synthesis is still running
                 try:
-                    deepgram_audio_url = get_deepgram_service().text_to_speech_url(ai_response_text)
-                    if deepgram_audio_url:
-                        logger.info(f"Using Deepgram Aura Amalthea voice: {deepgram_audio_url}")
-                        response.play(deepgram_audio_url)
+                    tts_orchestrator = get_tts_orchestrator()
+                    if tts_orchestrator.providers:
+                        audio_id = audio_store.stream_from(lambda: tts_orchestrator.open_stream(ai_response_text))
+                        # A stream every provider failed on would play as silence, so only hand
+                        # Twilio the URL once audio is flowing
+                        if audio_store.wait_started(audio_id, cap_timeout(current_app.config['TTS_FIRST_AUDIO_SECONDS'])):
+                            audio_url = audio_store.stream_url_for(audio_id, current_app.config['BASE_URL'])
+                            logger.info(f"Using hedged TTS stream: {audio_url}")
+                            response.play(audio_url)
+                        else:
+                            logger.warning("Hedged TTS produced no audio in time, falling back to Twilio voice")
+                            response.say(ai_response_text, voice='Polly.Joanna-Neural', language='en-US')
                     else:
-                        logger.warning("Deepgram TTS failed, falling back to Twilio voice")
+                        logger.warning("No TTS providers configured, falling back to Twilio voice")
                         response.say(ai_response_text, voice='Polly.Joanna-Neural', language='en-US')
-                except Exception as deepgram_error:
-                    logger.error(f"Deepgram TTS error: {deepgram_error}")
+                except Exception as tts_error:
+                    logger.error(f"TTS error: {tts_error}")
                     logger.info("Falling back to Twilio voice")
                     response.say(ai_response_text, voice='Polly.Joanna-Neural', language='en-US')
                 
@@ -374,16 +477,12 @@ def create_app():
                 logger.warning(f"No AI response ready for {call_sid}, using fallback")
                 fallback_text = "I'm processing your request. Please continue."
                 
-                # Try Deepgram voice for fallback too
-                try:
-                    deepgram_fallback_url = get_deepgram_service().text_to_speech_url(fallback_text)
-                    if deepgram_fallback_url:
-                        logger.info("Using Deepgram Aura Amalthea voice for fallback")
-                        response.play(deepgram_fallback_url)
-                    else:
-                        response.say(fallback_text, voice='Polly.Joanna-Neural', language='en-US')
-                except Exception as e:
-                    logger.error(f"Deepgram fallback TTS error: {e}")
+                # Play a pre-rendered acknowledgement clip - no TTS round trip on this path
+                filler_url = filler_bank.next_url(current_app.config['BASE_URL'])
+                if filler_url:
+                    logger.info(f"Using pre-rendered filler clip: {filler_url}")
+                    response.play(filler_url)
+                else:
                     response.say(fallback_text, voice='Polly.Joanna-Neural', language='en-US')
                 response.record(
                     action=f"{current_app.config['BASE_URL']}/webhooks/recording",
@@ -448,13 +547,12 @@ def create_app():
             result['transcripts'] = [t.to_dict() for t in call.transcripts]
             result['interactions'] = [i.to_dict() for i in call.interactions]
             result['appointments'] = [a.to_dict() for a in call.appointments]
+            # Precomputed after the call - never decoded from the recording here
+            result['audio_analytics'] = call.audio_analytics.to_dict() if call.audio_analytics else None
             
-            # Generate call summary
-            if call.transcripts:
-                summary = get_openai_service().summarize_call(
-                    [{'speaker': t.speaker, 'text': t.text} for t in call.transcripts]
-                )
-                result['summary'] = summary
+            # Summaries are written by a background job; queue one if this call never got it
+            if call.transcripts and not call.summary:
+                enqueue_summary(call.id)
             
             return jsonify(result)
             
@@ -462,6 +560,62 @@ def create_app():
             logger.error(f"Error getting call details: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/calls/<int:call_id>/recording', methods=['GET'])
+    @require_auth
+    def get_call_recording(call_id):
+        """Serve the media stream's stereo recording straight from disk, with Range support for seeking"""
+        call = Call.query.get_or_404(call_id)
+        try:
+            path = recording_path(current_app.config['RECORDINGS_DIR'], call.call_sid)
+        except ValueError:
+            return jsonify({'error': 'Recording not found'}), 404
+        if not os.path.exists(path):
+            return jsonify({'error': 'Recording not found'}), 404
+        
+        # conditional=True answers Range requests with 206 partial content
+        return send_file(path, mimetype='audio/wav', conditional=True, max_age=3600)
+    
+    @app.route('/api/export', methods=['GET'])
+    @require_auth
+    def export_calls():
+        """Stream calls with their transcripts and interactions as NDJSON, one call per line
+        
+        Query: since/until (ISO times, on start_time), status, fields (call columns),
+        include (transcripts,interactions; empty for calls only)
+        """
+        fields = request.args.get('fields')
+        fields = tuple(name.strip() for name in fields.split(',') if name.strip()) if fields else CALL_FIELDS
+        include = request.args.get('include')
+        include = tuple(name.strip() for name in include.split(',') if name.strip()) if include is not None else INCLUDES
+        unknown = [name for name in fields if name not in CALL_FIELDS] + [name for name in include if name not in INCLUDES]
+        if unknown:
+            return jsonify({'error': f"Unknown export fields: {', '.join(unknown)}"}), 400
+        
+        try:
+            since = parse_time(request.args['since']) if request.args.get('since') else None
+            until = parse_time(request.args['until']) if request.args.get('until') else None
+        except ValueError:
+            return jsonify({'error': 'since and until must be ISO 8601 times'}), 400
+        
+        records = iter_call_export(
+            fields=fields,
+            include=include,
+            since=since,
+            until=until,
+            status=request.args.get('status'),
+            chunk_size=app.config['EXPORT_CHUNK_SIZE']
+        )
+        return Response(
+            stream_with_context(ndjson_lines(records)),
+            mimetype='application/x-ndjson',
+            headers={
+                'Content-Disposition': 'attachment; filename=calls.ndjson',
+                'Cache-Control': 'no-store',
+                # Let proxies pass chunks through instead of buffering the whole export
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    
     @app.route('/api/book-appointment', methods=['POST'])
     @require_auth
     def book_appointment():
@@ -570,6 +724,7 @@ def create_app():
     # Dashboard API endpoints
     @app.route('/api/dashboard/metrics', methods=['GET'])
     @require_auth
+    @response_cache.cached()
     def get_dashboard_metrics():
         """Get dashboard metrics"""
         try:
@@ -660,6 +815,7 @@ def create_app():
     
     @app.route('/api/dashboard/recent-calls', methods=['GET'])
     @require_auth
+    @response_cache.cached()
     def get_recent_calls():
         """Get recent calls for dashboard"""
         try:
@@ -710,6 +866,7 @@ def create_app():
     
     @app.route('/api/dashboard/system-status', methods=['GET'])
     @require_auth
+    @response_cache.cached()
     def get_system_status():
         """Get system status for dashboard"""
         try:
@@ -729,7 +886,19 @@ def create_app():
                 }
             }
             
-            return jsonify({'system_status': status})
+            return jsonify({
+                'system_status': status,
+                'circuit_breakers': resilience_snapshot(),
+                'clients': client_registry.health(),
+                'concurrency': green_safety_report(app.config['SQLALCHEMY_DATABASE_URI']),
+                'jobs': job_queue.snapshot(),
+                'media_streams': media_stream_server.snapshot(),
+                'media_workers': read_worker_stats(app.config['MEDIA_STATUS_DIR']),
+                'http_cache': response_cache.snapshot(),
+                'frontend': static_assets.snapshot(),
+                'live_events': live_events.snapshot(),
+                'write_behind': write_behind.snapshot()
+            })
             
         except Exception as e:
             logger.error(f"Error getting system status: {e}")
@@ -737,24 +906,15 @@ def create_app():
     
     # Frontend routes
     @app.route('/')
-    def serve_frontend():
-        """Serve the React frontend"""
-        try:
-            return send_file('demo/dist/index.html')
-        except:
-            return jsonify({'message': 'Frontend not built. Run: cd demo && npm run build'}), 404
-    
     @app.route('/<path:path>')
-    def serve_static_files(path):
-        """Serve static files for React app"""
-        try:
-            return send_from_directory('demo/dist', path)
-        except:
-            # Fallback to index.html for client-side routing
-            try:
-                return send_file('demo/dist/index.html')
-            except:
+    def serve_frontend(path=''):
+        """Serve the React frontend; unknown routes get index.html for client-side routing"""
+        asset = static_assets.lookup(path)
+        if asset is None:
+            if not static_assets.built:
                 return jsonify({'message': 'Frontend not built. Run: cd demo && npm run build'}), 404
+            return jsonify({'error': 'Not found'}), 404
+        return static_assets.send(asset)
     
     # Health check endpoint
     @app.route('/health', methods=['GET'])
@@ -766,15 +926,16 @@ def create_app():
     def serve_deepgram_audio(audio_id):
         """Serve Deepgram audio data from memory cache"""
         try:
-            if hasattr(current_app, '_deepgram_audio_cache') and audio_id in current_app._deepgram_audio_cache:
-                audio_data = current_app._deepgram_audio_cache[audio_id]
+            entry = audio_store.get(audio_id)
+            if entry:
+                audio_data, mimetype = entry
                 logger.info(f"Serving Deepgram audio from memory: {audio_id} ({len(audio_data)} bytes)")
                 
-                # Create response with proper headers for WAV audio
+                # Create response with proper headers for the stored audio
                 from flask import Response
                 response = Response(
                     audio_data,
-                    mimetype='audio/wav',  # Standard mimetype for WAV audio
+                    mimetype=mimetype,
                     headers={
                         'Content-Length': len(audio_data),
                         'Accept-Ranges': 'bytes',
@@ -790,6 +951,32 @@ def create_app():
             logger.error(f"Error serving Deepgram audio {audio_id}: {e}")
             return jsonify({'error': 'Error serving audio'}), 500
     
+    @app.route('/api/audio/stream/<audio_id>')
+    def stream_tts_audio(audio_id):
+        """Stream TTS audio to Twilio while it is still being synthesized"""
+        try:
+            from flask import Response
+            
+            clip = audio_store.get_stream(audio_id)
+            if clip:
+                # Hedged streams only know their mimetype once a provider wins the race
+                clip.ready.wait(timeout=10)
+                logger.info(f"Streaming TTS audio as it is synthesized: {audio_id}")
+                # No Content-Length, so the server uses chunked transfer encoding
+                return Response(
+                    clip.iter_chunks(),
+                    mimetype=clip.mimetype,
+                    headers={'Cache-Control': 'no-cache'},
+                    direct_passthrough=True
+                )
+            
+            # Synthesis already finished - the full clip was teed into the store
+            return serve_deepgram_audio(audio_id)
+            
+        except Exception as e:
+            logger.error(f"Error streaming TTS audio {audio_id}: {e}")
+            return jsonify({'error': 'Error serving audio'}), 500
+    
     # Serve audio files for ElevenLabs TTS
     @app.route('/static/audio/<filename>')
     def serve_audio(filename):
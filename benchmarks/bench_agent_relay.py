@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare per-frame relay cost of the JSON path and the binary relay path in DeepgramVoiceAgent
+Run from the project root: python benchmarks/bench_agent_relay.py [frames]
+"""
+
+import base64
+import binascii
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.deepgram_voice_agent import _media_payload
+
+STREAM_SID = 'MZ' + '0' * 32
+
+def twilio_frame(index):
+    payload = base64.b64encode(bytes([index % 256]) * 160).decode('ascii')
+    return json.dumps({
+        'event': 'media',
+        'sequenceNumber': str(index + 2),
+        'media': {'track': 'inbound', 'chunk': str(index + 1), 'timestamp': str(index * 20), 'payload': payload},
+        'streamSid': STREAM_SID
+    }, separators=(',', ':'))
+
+def json_upstream(frames):
+    for message in frames:
+        data = json.loads(message)
+        if data.get('event') == 'media':
+            json.dumps({"type": "Audio", "audio": data['media']['payload']})
+
+def relay_upstream(frames, batch_bytes=320):
+    batch = bytearray()
+    for message in frames:
+        batch.extend(binascii.a2b_base64(_media_payload(message)))
+        if len(batch) >= batch_bytes:
+            bytes(batch)
+            batch.clear()
+
+def json_downstream(messages):
+    for message in messages:
+        data = json.loads(message)
+        if data.get('type') == 'Audio':
+            json.dumps({"event": "media", "streamSid": STREAM_SID, "media": {"payload": data['audio']}})
+
+def relay_downstream(chunks):
+    for chunk in chunks:
+        payload = binascii.b2a_base64(chunk, newline=False).decode('ascii')
+        '{"event":"media","streamSid":"' + STREAM_SID + '","media":{"payload":"' + payload + '"}}'
+
+def measure(label, func, data, count):
+    started = time.perf_counter()
+    func(data)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / count * 1e6:8.2f} us/frame")
+    return elapsed
+
+def run_benchmark(count=100000):
+    frames = [twilio_frame(i) for i in range(count)]
+    agent_audio = [bytes([i % 256]) * 640 for i in range(count)]
+    agent_json = [json.dumps({"type": "Audio", "audio": base64.b64encode(chunk).decode('ascii')}) for chunk in agent_audio]
+
+    up_json = measure("Twilio->agent JSON", json_upstream, frames, count)
+    up_relay = measure("Twilio->agent relay", relay_upstream, frames, count)
+    down_json = measure("Agent->Twilio JSON", json_downstream, agent_json, count)
+    down_relay = measure("Agent->Twilio relay", relay_downstream, agent_audio, count)
+
+    print(f"Upstream speedup:   {up_json / up_relay:.1f}x")
+    print(f"Downstream speedup: {down_json / down_relay:.1f}x")
+    print(f"Upstream frames sent to the agent: {count} (JSON) vs {count // 2} (relay, 40ms batches)")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
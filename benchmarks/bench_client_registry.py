@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Compare per-call service construction with the shared client registry
+Run from the project root: python benchmarks/bench_client_registry.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from config import Config
+from services.deepgram_service import DeepgramService
+from services.openai_service import OpenAIService
+from services.registry import ClientRegistry
+
+def time_per_call(label, func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed / iterations * 1000:10.3f} ms/call")
+    return elapsed
+
+def run_benchmark(iterations=200):
+    """Time building clients per call against fetching them from a registry"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    
+    with app.app_context():
+        registry = ClientRegistry()
+        registry.register('deepgram', DeepgramService)
+        registry.register('openai', OpenAIService)
+        
+        print(f"Iterations: {iterations}")
+        per_call = time_per_call(
+            "Per-call DeepgramService + OpenAIService",
+            lambda: (DeepgramService(), OpenAIService()),
+            iterations
+        )
+        shared = time_per_call(
+            "Registry get (first call builds)",
+            lambda: (registry.get('deepgram'), registry.get('openai')),
+            iterations
+        )
+        
+        print(f"Speedup: {per_call / max(shared, 1e-9):.0f}x")
+        print(f"Registry health: {registry.health()}")
+        registry.shutdown()
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
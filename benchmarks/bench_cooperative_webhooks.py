@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Throughput of concurrent webhook turns: sync gunicorn workers vs cooperative serving
+Starts a local stand-in for the OpenAI API that answers every chat completion
+after a fixed delay, then fires N concurrent Twilio transcription webhooks (one
+LLM turn each) at the app served two ways:
+
+    sync      gunicorn app:app with --sync-workers sync workers
+    eventlet  python run.py (one process, green threads)
+
+Run from the project root: python benchmarks/bench_cooperative_webhooks.py [requests] [delay]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class SlowProvider(BaseHTTPRequestHandler):
+    """Answers chat completions after ``delay`` seconds, like a slow LLM"""
+    delay = 1.0
+    hits = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(self.delay)
+        with SlowProvider.lock:
+            SlowProvider.hits += 1
+        body = json.dumps({
+            'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': int(time.time()), 'model': 'gpt-3.5-turbo',
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': 'Sure, what day works best for you?'}}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class ProviderServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connects when every turn calls at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_healthy(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+def run_mode(mode, command, env, count):
+    port = free_port()
+    env = dict(env, PORT=str(port))
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(command(port), cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_healthy(base_url):
+            print(f"{mode}: server did not start")
+            return None
+        call_sid = f"CA{mode}"
+        requests.post(f"{base_url}/webhooks/voice", data={'CallSid': call_sid, 'From': '+15550001', 'To': '+15550002', 'CallStatus': 'ringing'}, timeout=30)
+
+        def turn(index):
+            started = time.monotonic()
+            response = requests.post(f"{base_url}/webhooks/transcribe", data={
+                'CallSid': call_sid, 'TranscriptionStatus': 'completed',
+                'TranscriptionText': f"I'd like to book an appointment, request {index}"
+            }, timeout=120)
+            return response.status_code, time.monotonic() - started
+
+        hits_before = SlowProvider.hits
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            results = list(executor.map(turn, range(count)))
+        elapsed = time.monotonic() - started
+
+        latencies = sorted(latency for _, latency in results)
+        ok = sum(1 for status, _ in results if status == 200)
+        return {
+            'mode': mode,
+            'ok': ok,
+            'provider_calls': SlowProvider.hits - hits_before,
+            'elapsed': elapsed,
+            'throughput': count / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1]
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('requests', type=int, nargs='?', default=40)
+    parser.add_argument('delay', type=float, nargs='?', default=1.0, help='seconds the stand-in LLM takes per call')
+    parser.add_argument('--sync-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    SlowProvider.delay = args.delay
+    provider = ProviderServer(('127.0.0.1', 0), SlowProvider)
+    threading.Thread(target=provider.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix='bench-coop-')
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY='bench',
+        OPENAI_BASE_URL=f"http://127.0.0.1:{provider.server_address[1]}/v1",
+        JOB_WORKER_IN_PROCESS='false',
+        RECORDINGS_DIR=workdir
+    )
+
+    modes = [
+        ('sync', lambda port: [sys.executable, '-m', 'gunicorn', '-w', str(args.sync_workers), '-b', f'127.0.0.1:{port}', '--timeout', '120', 'app:app']),
+        ('eventlet', lambda port: [sys.executable, 'run.py'])
+    ]
+
+    print(f"{args.requests} concurrent webhook turns, provider delay {args.delay}s")
+    results = []
+    for mode, command in modes:
+        mode_env = dict(env, DATABASE_URL=f"sqlite:///{os.path.join(workdir, mode + '.db')}", SERVER_CONCURRENCY=mode)
+        result = run_mode(mode, command, mode_env, args.requests)
+        if result:
+            results.append(result)
+            print(f"{mode:9s} ok {result['ok']}/{args.requests}, provider calls {result['provider_calls']}, "
+                  f"{result['elapsed']:6.2f}s, {result['throughput']:6.1f} turns/s, "
+                  f"p50 {result['p50']:.2f}s, p95 {result['p95']:.2f}s")
+
+    provider.shutdown()
+    if len(results) == 2:
+        print(f"Cooperative speedup: {results[1]['throughput'] / results[0]['throughput']:.1f}x")
+
+if __name__ == '__main__':
+    main()
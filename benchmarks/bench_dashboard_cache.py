@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Database queries and bytes on the wire when N dashboards poll the dashboard API
+Seeds a scratch sqlite database, then has N dashboards poll metrics,
+recent-calls (limit 50) and system-status for a number of rounds through the
+Flask test client, served three ways:
+
+    baseline  response cache off, plain JSON, no conditional requests
+    ttl       responses shared for the cache TTL
+    etag+gzip shared responses, If-None-Match revalidation and gzip
+
+Each round stands for one poll interval, longer than the TTL, so every round
+starts with an empty cache; a call is added every third round so some polls
+see new data.
+
+Run from the project root: python benchmarks/bench_dashboard_cache.py [dashboards] [rounds]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix='bench-dashboard-'), 'bench.db')
+os.environ['DATABASE_URL'] = f"sqlite:///{DB_PATH}"
+
+import base64
+from sqlalchemy import event
+from app import app
+from models import db, Call, Interaction
+from utils.http_cache import response_cache
+
+ENDPOINTS = ('/api/dashboard/metrics', '/api/dashboard/recent-calls?limit=50', '/api/dashboard/system-status')
+AUTH = 'Basic ' + base64.b64encode(f"{app.config['AUTH_USERNAME']}:{app.config['AUTH_PASSWORD']}".encode()).decode()
+
+def seed(calls):
+    now = datetime.utcnow()
+    for index in range(calls):
+        call = Call(call_sid=f"CAbench{index}", from_number=f"+1555{index:07d}", to_number='+15550000',
+                    status='completed' if index % 5 else 'in-progress', start_time=now - timedelta(minutes=index),
+                    duration=60 + index % 300)
+        db.session.add(call)
+        db.session.flush()
+        db.session.add(Interaction(call_id=call.id, user_input='Can I book for Tuesday?', ai_response='Sure.', intent='booking'))
+    db.session.commit()
+
+def add_call(tag):
+    db.session.add(Call(call_sid=f"CAnew{tag}", from_number='+15559999999', to_number='+15550000', status='ringing'))
+    db.session.commit()
+
+def run_mode(mode, dashboards, rounds, queries):
+    client = app.test_client()
+    response_cache.ttl = 0 if mode == 'baseline' else app.config['DASHBOARD_CACHE_SECONDS'] or 2
+    conditional = mode == 'etag+gzip'
+    etags = {}
+    statuses = {200: 0, 304: 0}
+    wire_bytes = 0
+    queries_before = queries[0]
+
+    for round_index in range(rounds):
+        response_cache.clear()
+        if round_index and round_index % 3 == 0:
+            with app.app_context():
+                add_call(f"{mode}{round_index}")
+        for dashboard in range(dashboards):
+            for url in ENDPOINTS:
+                headers = {'Authorization': AUTH, 'Accept-Encoding': 'gzip' if conditional else 'identity'}
+                if conditional and (dashboard, url) in etags:
+                    headers['If-None-Match'] = etags[(dashboard, url)]
+                response = client.get(url, headers=headers)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                wire_bytes += len(response.get_data())
+                if response.headers.get('ETag'):
+                    etags[(dashboard, url)] = response.headers['ETag']
+
+    polls = dashboards * rounds
+    return {
+        'mode': mode,
+        'queries': queries[0] - queries_before,
+        'queries_per_poll': (queries[0] - queries_before) / polls,
+        'kb_per_poll': wire_bytes / polls / 1024,
+        'ok': statuses.get(200, 0),
+        'not_modified': statuses.get(304, 0)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dashboards', nargs='?', type=int, default=20)
+    parser.add_argument('rounds', nargs='?', type=int, default=12)
+    parser.add_argument('--calls', type=int, default=500, help='calls seeded into the scratch database')
+    args = parser.parse_args()
+
+    queries = [0]
+    with app.app_context():
+        seed(args.calls)
+
+        def count(*_):
+            queries[0] += 1
+        event.listen(db.engine, 'before_cursor_execute', count)
+
+    print(f"{args.dashboards} dashboards x {args.rounds} rounds, 3 endpoints per poll, {args.calls} calls seeded")
+    print(f"{'mode':<10} {'queries':>8} {'queries/poll':>13} {'KB/poll':>9} {'200':>6} {'304':>6}")
+    for mode in ('baseline', 'ttl', 'etag+gzip'):
+        result = run_mode(mode, args.dashboards, args.rounds, queries)
+        print(f"{result['mode']:<10} {result['queries']:>8} {result['queries_per_poll']:>13.1f} "
+              f"{result['kb_per_poll']:>9.1f} {result['ok']:>6} {result['not_modified']:>6}")
+    print(f"cache: {response_cache.snapshot()}")
+
+if __name__ == '__main__':
+    main()
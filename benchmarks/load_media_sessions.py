@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load test for the media WebSocket server's per-connection sessions
+Opens N concurrent Twilio-style media streams against an in-process server and
+checks that every session kept its own callSid/streamSid, frame count and
+conversation history, and that per-session memory stays flat as N grows.
+
+Run from the project root: python benchmarks/load_media_sessions.py [sessions] [frames]
+Provider calls fail fast unless real keys are configured; only session state is measured.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point OpenAI at a closed local port so generation falls back immediately
+os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+os.environ.setdefault('OPENAI_BASE_URL', 'http://127.0.0.1:9')
+
+import websockets
+from flask import Flask
+from config import Config
+from services.registry import register_app_services
+from websocket_handler import TwilioDeepgramHandler
+
+SILENCE_FRAME = base64.b64encode(b'\xff' * 160).decode('ascii')
+
+async def run_call(port, index, frames, ready, release):
+    call_sid = f"CA{index:032d}"
+    stream_sid = f"MZ{index:032d}"
+    async with websockets.connect(f"ws://127.0.0.1:{port}/") as ws:
+        await ws.send(json.dumps({'event': 'connected', 'callSid': call_sid}))
+        await ws.send(json.dumps({
+            'event': 'start',
+            'streamSid': stream_sid,
+            'start': {'streamSid': stream_sid, 'callSid': call_sid}
+        }))
+        for frame in range(frames):
+            await ws.send(json.dumps({
+                'event': 'media',
+                'sequenceNumber': str(frame + 2),
+                'streamSid': stream_sid,
+                'media': {'track': 'inbound', 'chunk': str(frame + 1), 'timestamp': str(frame * 20), 'payload': SILENCE_FRAME}
+            }))
+        ready.release()
+        # Hold the connection open until the server side has been inspected
+        await release.wait()
+
+async def wait_until(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+def check_isolation(handler, frames):
+    """Return a list of problems found across the live sessions"""
+    problems = []
+    for session in list(handler.sessions._sessions.values()):
+        if not session.stream_sid or session.call_sid != 'CA' + session.stream_sid[2:]:
+            problems.append(f"session {session.session_id}: stream {session.stream_sid} has call {session.call_sid}")
+        if session.frames_received != frames:
+            problems.append(f"session {session.session_id}: {session.frames_received} frames, expected {frames}")
+        turns = [m['content'] for m in session.conversation_context if m['role'] == 'user']
+        if len(turns) != min(frames, session.conversation_context.maxlen // 2):
+            problems.append(f"session {session.session_id}: {len(turns)} turns recorded")
+    return problems
+
+async def load(handler, port, sessions, frames):
+    ready = asyncio.Semaphore(0)
+    release = asyncio.Event()
+    started = time.monotonic()
+    calls = [asyncio.create_task(run_call(port, i, frames, ready, release)) for i in range(sessions)]
+
+    for _ in range(sessions):
+        await ready.acquire()
+    # Every client has sent its frames; wait for the server to finish processing them
+    await wait_until(
+        lambda: sum(s.frames_received for s in handler.sessions._sessions.values()) >= sessions * frames
+        and all(len(s.conversation_context) >= 2 * min(frames, s.conversation_context.maxlen // 2)
+                for s in handler.sessions._sessions.values()),
+        timeout=120
+    )
+    elapsed = time.monotonic() - started
+
+    report = handler.sessions.memory_report()
+    problems = check_isolation(handler, frames)
+
+    release.set()
+    await asyncio.gather(*calls, return_exceptions=True)
+    await wait_until(lambda: handler.sessions.active == 0, timeout=30)
+    return report, problems, elapsed
+
+async def main(sessions=500, frames=3):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    register_app_services(app)
+
+    handler = TwilioDeepgramHandler(max_sessions=sessions)
+    server = await websockets.serve(handler.handle_twilio_stream, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    ok = True
+    baseline = None
+    for count in (max(1, sessions // 5), sessions):
+        report, problems, elapsed = await load(handler, port, count, frames)
+        avg = report['avg_memory_bytes']
+        baseline = baseline or avg
+        print(f"{count:5d} sessions: {elapsed:6.2f}s, active {report['active']}, "
+              f"avg {avg} B/session, total {report['total_memory_bytes'] / 1024:.0f} KiB")
+        if report['active'] != count:
+            problems.append(f"{report['active']} sessions active, expected {count}")
+        for problem in problems[:10]:
+            print(f"  ISOLATION: {problem}")
+        ok = ok and not problems
+
+    growth = avg / baseline if baseline else 1.0
+    print(f"Per-session memory growth from {max(1, sessions // 5)} to {sessions} sessions: {growth:.2f}x")
+    print(f"Session stats: {handler.sessions.stats}")
+
+    server.close()
+    await server.wait_closed()
+    return ok and growth < 1.2
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sys.exit(0 if asyncio.run(main(sessions, frames)) else 1)
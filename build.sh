@@ -8,5 +8,10 @@ npm ci --production=false
 
 echo "Building React frontend..."
 npm run build
+cd ..
+python build_frontend.py --compress-only
+
+echo "Pre-rendering filler audio clips..."
+python generate_fillers.py || echo "Filler clips not generated - they will be rendered at startup"
 
 echo "Build completed successfully!"
\ No newline at end of file
@@ -2,12 +2,18 @@
 """
 Build script for the Voice AI Dashboard frontend integration
 """
+import argparse
+import gzip
 import os
 import subprocess
 import sys
 import shutil
 from pathlib import Path
 
+# Text assets worth compressing; images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = {'.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.map', '.xml', '.webmanifest'}
+MIN_COMPRESS_BYTES = 1024
+
 def run_command(command, cwd=None):
     """Run a shell command and return success status"""
     try:
@@ -21,7 +27,29 @@ def run_command(command, cwd=None):
         print(f"Error output: {e.stderr}")
         return False
 
-def main():
+def precompress(dist_dir):
+    """Write a .gz next to each text asset the server can send to gzip-capable browsers"""
+    written = saved = 0
+    for path in sorted(dist_dir.rglob('*')):
+        if path.suffix == '.gz' or not path.is_file():
+            continue
+        gz_path = path.with_name(path.name + '.gz')
+        if gz_path.exists():
+            gz_path.unlink()
+        if path.suffix not in COMPRESSIBLE_SUFFIXES or path.stat().st_size < MIN_COMPRESS_BYTES:
+            continue
+        data = path.read_bytes()
+        # mtime=0 keeps the output identical across builds of the same input
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) >= len(data):
+            continue
+        gz_path.write_bytes(compressed)
+        written += 1
+        saved += len(data) - len(compressed)
+    print(f"🗜️  Precompressed {written} files, saving {saved // 1024} KB per full download")
+    return written
+
+def main(compress_only=False):
     """Main build function"""
     # Get the current directory (should be the voiceai root)
     root_dir = Path(__file__).parent
@@ -36,6 +64,15 @@ def main():
         print("❌ Demo directory not found!")
         return False
     
+    dist_dir = demo_dir / "dist"
+    if compress_only:
+        # Frontend already built by `npm run build` (see build.sh)
+        if not dist_dir.exists():
+            print("❌ Build output not found - run npm run build first")
+            return False
+        precompress(dist_dir)
+        return True
+    
     # Change to demo directory
     os.chdir(demo_dir)
     
@@ -57,11 +94,12 @@ def main():
         return False
     
     # Check if dist directory was created
-    dist_dir = demo_dir / "dist"
     if not dist_dir.exists():
         print("❌ Build failed - dist directory not found")
         return False
     
+    precompress(dist_dir)
+    
     print(f"\n✅ Frontend built successfully!")
     print(f"📁 Build output: {dist_dir}")
     
@@ -85,5 +123,8 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Build the dashboard frontend into demo/dist")
+    parser.add_argument('--compress-only', action='store_true', help="only write .gz variants of an existing build")
+    args = parser.parse_args()
+    success = main(compress_only=args.compress_only)
     sys.exit(0 if success else 1)
\ No newline at end of file
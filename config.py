@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,6 +16,9 @@ class Config:
     
     # Deepgram Configuration
     DEEPGRAM_API_KEY = os.environ.get('DEEPGRAM_API_KEY')
+    # Voice agent relay: forward raw audio as binary frames, batching caller audio up to this many ms
+    DEEPGRAM_AGENT_RELAY = os.environ.get('DEEPGRAM_AGENT_RELAY', 'true').lower() != 'false'
+    DEEPGRAM_AGENT_BATCH_MS = int(os.environ.get('DEEPGRAM_AGENT_BATCH_MS') or 40)
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -33,4 +37,57 @@ class Config:
     AUTH_PASSWORD = os.environ.get('AUTH_PASSWORD') or 'password'
     
     # App Configuration
-    BASE_URL = os.environ.get('BASE_URL') or 'http://localhost:5000'
\ No newline at end of file
+    BASE_URL = os.environ.get('BASE_URL') or 'http://localhost:5000'
+    
+    # Live dashboard pushes: default and fastest per-client send interval, in seconds
+    LIVE_EVENTS_INTERVAL = float(os.environ.get('LIVE_EVENTS_INTERVAL') or 0.5)
+    LIVE_EVENTS_MIN_INTERVAL = float(os.environ.get('LIVE_EVENTS_MIN_INTERVAL') or 0.25)
+    
+    # Dashboard API responses are reused for this many seconds (0 disables; ETags and gzip stay)
+    DASHBOARD_CACHE_SECONDS = float(os.environ.get('DASHBOARD_CACHE_SECONDS') or 2)
+    # JSON bodies at least this large are sent gzipped to clients that accept it
+    HTTP_GZIP_MIN_BYTES = int(os.environ.get('HTTP_GZIP_MIN_BYTES') or 1024)
+    
+    # Calls read per query by /api/export
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE') or 500)
+    
+    # Twilio media streams are served by the app itself at /media-stream, all on one event loop
+    # in the web process; scaling past one core needs the standalone media server below
+    MEDIA_MAX_SESSIONS = int(os.environ.get('MEDIA_MAX_SESSIONS') or 200)
+    # On SIGTERM live streams get this long to finish before they are closed
+    MEDIA_DRAIN_SECONDS = float(os.environ.get('MEDIA_DRAIN_SECONDS') or 25)
+    # Standalone media server (python websocket_handler.py): processes sharing the
+    # port (0 = one per CPU), and per-process pool size for CPU-heavy audio work (the in-app
+    # /media-stream route uses the pool too, when not serving on green threads)
+    MEDIA_PORT = int(os.environ.get('MEDIA_PORT') or 8000)
+    MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS') or 1)
+    MEDIA_CPU_WORKERS = int(os.environ.get('MEDIA_CPU_WORKERS') or 1)
+    # Media workers publish sessions and CPU use here for system-status
+    MEDIA_STATUS_DIR = os.environ.get('MEDIA_STATUS_DIR') or os.path.join(tempfile.gettempdir(), 'voiceai-media')
+    # Answer calls with <Connect><Stream> to /media-stream instead of the <Record> loop
+    VOICE_MEDIA_STREAMING = os.environ.get('VOICE_MEDIA_STREAMING', 'false').lower() == 'true'
+    
+    # Stereo call recordings written by the media stream server (caller left, agent right)
+    RECORD_MEDIA_STREAMS = os.environ.get('RECORD_MEDIA_STREAMS', 'true').lower() != 'false'
+    RECORDINGS_DIR = os.environ.get('RECORDINGS_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+    # Job workers delete recordings older than this from their host's RECORDINGS_DIR; 0 keeps them forever
+    RECORDINGS_RETENTION_HOURS = int(os.environ.get('RECORDINGS_RETENTION_HOURS') or 72)
+    
+    # Per-turn transcript/interaction writes are buffered and flushed in batches
+    WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get('WRITE_BEHIND_FLUSH_SECONDS') or 1.0)
+    WRITE_BEHIND_MAX_ROWS = int(os.environ.get('WRITE_BEHIND_MAX_ROWS') or 200)
+    # How long buffered writes are kept while the database is unreachable before they are dropped
+    WRITE_BEHIND_MAX_OUTAGE_SECONDS = float(os.environ.get('WRITE_BEHIND_MAX_OUTAGE_SECONDS') or 300)
+    
+    # Background jobs (transcription, summaries, CRM delivery) live in the app database.
+    # Web processes run a worker thread pool too unless JOB_WORKER_IN_PROCESS=false;
+    # dedicated workers are started with `python worker.py`
+    JOB_WORKER_IN_PROCESS = os.environ.get('JOB_WORKER_IN_PROCESS', 'true').lower() != 'false'
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS') or 4)
+    JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS') or 1.0)
+    JOB_RETENTION_HOURS = int(os.environ.get('JOB_RETENTION_HOURS') or 72)
+    
+    # Twilio aborts webhooks after 15s; handlers budget their provider calls within this
+    WEBHOOK_DEADLINE_SECONDS = float(os.environ.get('WEBHOOK_DEADLINE_SECONDS') or 12)
+    # How long the AI response webhook waits for streamed TTS to start before using Twilio's voice
+    TTS_FIRST_AUDIO_SECONDS = float(os.environ.get('TTS_FIRST_AUDIO_SECONDS') or 3)
@@ -0,0 +1,164 @@
+import { useEffect, useRef, useState } from 'react';
+import { connectLive, LiveSocket } from '../services/liveSocket';
+import apiService, { API_BASE_URL } from '../services/api';
+
+export interface LiveCall {
+  id?: number;
+  call_sid: string;
+  from_number?: string;
+  to_number?: string;
+  status?: string;
+  start_time?: string | null;
+  end_time?: string | null;
+  duration?: number | null;
+  call_type?: string;
+}
+
+export interface LiveLine {
+  speaker: 'AI' | 'Caller' | 'System';
+  text: string;
+  timestamp: string;
+}
+
+interface TranscriptEvent {
+  speaker: string;
+  text: string;
+  timestamp: string;
+}
+
+interface InteractionEvent {
+  intent: string | null;
+  user_input: string;
+  ai_response: string;
+  timestamp: string;
+}
+
+interface LiveSnapshot {
+  seq: number;
+  calls?: LiveCall[];
+  call?: LiveCall | null;
+  transcripts?: TranscriptEvent[];
+  interactions?: InteractionEvent[];
+}
+
+interface LiveDelta {
+  seq: number;
+  calls?: Record<string, Partial<LiveCall>>;
+  ended?: string[];
+  transcripts?: Record<string, TranscriptEvent[]>;
+  interactions?: Record<string, InteractionEvent[]>;
+  resync?: boolean;
+}
+
+// Server timestamps are naive UTC
+export const parseServerTime = (value?: string | null) =>
+  value ? new Date(/[zZ]|[+-]\d\d:\d\d$/.test(value) ? value : `${value}Z`) : null;
+
+const speakerLabel = (speaker: string): LiveLine['speaker'] =>
+  speaker === 'caller' ? 'Caller' : speaker === 'system' ? 'System' : 'AI';
+
+// Caller turns arrive as transcript lines; interactions add the AI's reply to them
+const toLines = (transcripts: TranscriptEvent[] = [], interactions: InteractionEvent[] = []): LiveLine[] => [
+  ...transcripts.map(t => ({ speaker: speakerLabel(t.speaker), text: t.text, timestamp: t.timestamp })),
+  ...interactions.filter(i => i.ai_response).map(i => ({ speaker: 'AI' as const, text: i.ai_response, timestamp: i.timestamp }))
+];
+
+const byTime = (a: LiveLine, b: LiveLine) => a.timestamp.localeCompare(b.timestamp);
+
+// A line can be in both a snapshot and the delta queued before it was taken
+const merge = (previous: LiveLine[], added: LiveLine[]) => {
+  const seen = new Set(previous.map(line => `${line.timestamp}|${line.speaker}|${line.text}`));
+  const fresh = added.filter(line => !seen.has(`${line.timestamp}|${line.speaker}|${line.text}`));
+  return fresh.length ? [...previous, ...fresh].sort(byTime) : previous;
+};
+
+// Live calls and the selected call's transcript, pushed by the server over Socket.IO:
+// a snapshot on subscribe, then throttled deltas - no polling
+export function useLiveCalls(selectedCallSid?: string) {
+  const [calls, setCalls] = useState<Record<string, LiveCall>>({});
+  const [lines, setLines] = useState<LiveLine[]>([]);
+  const [connected, setConnected] = useState(false);
+  const socketRef = useRef<LiveSocket | null>(null);
+  const selectedRef = useRef(selectedCallSid);
+  const seqRef = useRef(0);
+
+  useEffect(() => {
+    const socket = connectLive(API_BASE_URL, apiService.getCredentials());
+    socketRef.current = socket;
+
+    const subscribe = () => {
+      socket.emit('subscribe', { calls: true });
+      if (selectedRef.current) {
+        socket.emit('subscribe', { call_sid: selectedRef.current });
+      }
+    };
+
+    socket.on('connect', () => {
+      // Each connection numbers its batches from zero
+      seqRef.current = 0;
+      setConnected(true);
+      subscribe();
+    });
+    socket.on('disconnect', () => setConnected(false));
+
+    socket.on('live_snapshot', (snapshot: LiveSnapshot) => {
+      // A batch sent while the snapshot was being built may already have arrived
+      seqRef.current = Math.max(seqRef.current, snapshot.seq);
+      if (snapshot.calls) {
+        setCalls(Object.fromEntries(snapshot.calls.map(call => [call.call_sid, call])));
+      }
+      if (snapshot.call !== undefined && snapshot.call?.call_sid === selectedRef.current) {
+        setLines(previous => merge(toLines(snapshot.transcripts, snapshot.interactions).sort(byTime), previous));
+      }
+    });
+
+    socket.on('live', (delta: LiveDelta) => {
+      // A missed batch or an overflow on the server means our state is stale
+      if (delta.resync || delta.seq !== seqRef.current + 1) {
+        subscribe();
+        return;
+      }
+      seqRef.current = delta.seq;
+
+      if (delta.calls || delta.ended) {
+        setCalls(previous => {
+          const next = { ...previous };
+          Object.entries(delta.calls || {}).forEach(([sid, fields]) => {
+            next[sid] = { ...next[sid], ...fields, call_sid: sid };
+          });
+          (delta.ended || []).forEach(sid => delete next[sid]);
+          return next;
+        });
+      }
+
+      const selected = selectedRef.current;
+      if (selected) {
+        const added = toLines(delta.transcripts?.[selected], delta.interactions?.[selected]);
+        if (added.length) {
+          setLines(previous => merge(previous, added));
+        }
+      }
+    });
+
+    return () => {
+      socket.disconnect();
+      socketRef.current = null;
+    };
+  }, []);
+
+  useEffect(() => {
+    const previous = selectedRef.current;
+    selectedRef.current = selectedCallSid;
+    setLines([]);
+    const socket = socketRef.current;
+    if (!socket || !socket.connected) return;
+    if (previous && previous !== selectedCallSid) {
+      socket.emit('unsubscribe', { call_sid: previous });
+    }
+    if (selectedCallSid) {
+      socket.emit('subscribe', { call_sid: selectedCallSid });
+    }
+  }, [selectedCallSid]);
+
+  return { calls: Object.values(calls).filter(call => call.from_number), lines, connected };
+}
@@ -1,120 +1,60 @@
 import React, { useEffect, useState } from 'react';
 import { PhoneIcon, MicOffIcon, VolumeXIcon, UserIcon } from 'lucide-react';
+import { parseServerTime, useLiveCalls } from '../hooks/useLiveCalls';
+
+const formatElapsed = (from: Date | null, to: number) => {
+  const seconds = from ? Math.max(0, Math.floor((to - from.getTime()) / 1000)) : 0;
+  const pad = (value: number) => String(value).padStart(2, '0');
+  return `${pad(Math.floor(seconds / 3600))}:${pad(Math.floor(seconds / 60) % 60)}:${pad(seconds % 60)}`;
+};
+
 const LiveMonitor: React.FC = () => {
-  const [activeCalls, setActiveCalls] = useState([{
-    id: 1,
-    caller: '+1 (555) 123-4567',
-    status: 'in-progress',
-    duration: '00:01:23',
-    transcript: [{
-      speaker: 'AI',
-      text: 'Hello, thank you for calling VoiceAI Solutions. How can I assist you today?',
-      time: '00:00:05'
-    }, {
-      speaker: 'Caller',
-      text: "Hi, I'm interested in scheduling a demo of your product.",
-      time: '00:00:12'
-    }, {
-      speaker: 'AI',
-      text: "I'd be happy to help you schedule a demo. Could you please provide your name?",
-      time: '00:00:18'
-    }, {
-      speaker: 'Caller',
-      text: 'My name is John Smith.',
-      time: '00:00:22'
-    }, {
-      speaker: 'AI',
-      text: 'Thank you, John. We have several available time slots next week. Would you prefer morning or afternoon?',
-      time: '00:00:30'
-    }, {
-      speaker: 'Caller',
-      text: 'Afternoon would be better for me.',
-      time: '00:00:36'
-    }, {
-      speaker: 'AI',
-      text: 'Great. We have availability on Tuesday at 2:00 PM, Wednesday at 3:30 PM, or Thursday at 1:00 PM. Which would work best for you?',
-      time: '00:00:45'
-    }, {
-      speaker: 'Caller',
-      text: 'Tuesday at 2:00 PM sounds perfect.',
-      time: '00:00:52'
-    }, {
-      speaker: 'AI',
-      text: "Excellent. I've scheduled a demo for Tuesday at 2:00 PM. Could I get your email address to send a confirmation?",
-      time: '00:01:00'
-    }, {
-      speaker: 'Caller',
-      text: "Yes, it's john.smith@example.com",
-      time: '00:01:08'
-    }, {
-      speaker: 'AI',
-      text: "Thank you. I've sent a calendar invite to john.smith@example.com. Is there anything else I can help you with today?",
-      time: '00:01:18'
-    }]
-  }, {
-    id: 2,
-    caller: '+1 (555) 987-6543',
-    status: 'in-progress',
-    duration: '00:00:45',
-    transcript: [{
-      speaker: 'AI',
-      text: 'Hello, thank you for calling VoiceAI Solutions. How can I assist you today?',
-      time: '00:00:05'
-    }, {
-      speaker: 'Caller',
-      text: 'I have a question about your pricing plans.',
-      time: '00:00:12'
-    }, {
-      speaker: 'AI',
-      text: "I'd be happy to go over our pricing plans with you. We offer several tiers based on call volume and features needed. Could you tell me a bit about your business needs?",
-      time: '00:00:20'
-    }, {
-      speaker: 'Caller',
-      text: "We're a small business with about 5-10 calls per day.",
-      time: '00:00:30'
-    }, {
-      speaker: 'AI',
-      text: 'For that volume, our Starter Plan would be a good fit. It includes AI call answering, basic scheduling, and call transcripts for $49 per month. Would you like more details about this plan?',
-      time: '00:00:42'
-    }]
-  }]);
-  const [selectedCall, setSelectedCall] = useState(activeCalls[0]);
-  // Simulate real-time transcript updates
+  const [selectedSid, setSelectedSid] = useState<string | undefined>();
+  const { calls, lines, connected } = useLiveCalls(selectedSid);
+  const [now, setNow] = useState(Date.now());
+
+  // Calls and transcript lines are pushed by the server; this only advances the duration clocks
+  useEffect(() => {
+    const timer = setInterval(() => setNow(Date.now()), 1000);
+    return () => clearInterval(timer);
+  }, []);
+
+  // Follow the first live call until the supervisor picks one
   useEffect(() => {
-    const interval = setInterval(() => {
-      if (activeCalls.length > 0 && selectedCall) {
-        const updatedCalls = activeCalls.map(call => {
-          // Update duration
-          const [min, sec] = call.duration.split(':').slice(1).map(Number);
-          let newSec = sec + 1;
-          let newMin = min;
-          if (newSec >= 60) {
-            newSec = 0;
-            newMin++;
-          }
-          const newDuration = `00:${String(newMin).padStart(2, '0')}:${String(newSec).padStart(2, '0')}`;
-          return {
-            ...call,
-            duration: newDuration
-          };
-        });
-        setActiveCalls(updatedCalls);
-        setSelectedCall(updatedCalls.find(call => call.id === selectedCall.id) || updatedCalls[0]);
-      }
-    }, 1000);
-    return () => clearInterval(interval);
-  }, [activeCalls, selectedCall]);
+    if (!selectedSid && calls.length > 0) {
+      setSelectedSid(calls[0].call_sid);
+    }
+  }, [calls, selectedSid]);
+
+  const activeCalls = calls.map(call => ({
+    id: call.call_sid,
+    caller: call.from_number,
+    status: call.status,
+    duration: formatElapsed(parseServerTime(call.start_time), now)
+  }));
+  const selected = activeCalls.find(call => call.id === selectedSid);
+  const selectedStart = parseServerTime(calls.find(call => call.call_sid === selectedSid)?.start_time);
+  const selectedCall = selectedSid ? {
+    caller: selected?.caller ?? 'Call ended',
+    duration: selected?.duration ?? '--:--:--',
+    transcript: lines.map(line => ({
+      speaker: line.speaker,
+      text: line.text,
+      time: selectedStart ? formatElapsed(selectedStart, parseServerTime(line.timestamp)!.getTime()) : ''
+    }))
+  } : null;
   return <div>
       <h1 className="mb-6 text-2xl font-bold">Live Monitor</h1>
       <div className="grid gap-6 lg:grid-cols-3">
         {/* Active Calls List */}
         <div className="lg:col-span-1">
           <div className="rounded-lg bg-gray-800 p-6">
-            <h2 className="mb-4 text-lg font-semibold">
-              Active Calls ({activeCalls.length})
+            <h2 className="mb-4 flex items-center justify-between text-lg font-semibold">
+              <span>Active Calls ({activeCalls.length})</span>
+              {!connected && <span className="text-xs font-normal text-yellow-400">Reconnecting...</span>}
             </h2>
             {activeCalls.length > 0 ? <div className="space-y-3">
-                {activeCalls.map(call => <div key={call.id} onClick={() => setSelectedCall(call)} className={`cursor-pointer rounded-lg border p-4 transition ${selectedCall?.id === call.id ? 'border-blue-500 bg-blue-500/10' : 'border-gray-700 bg-gray-750 hover:border-gray-600'}`}>
+                {activeCalls.map(call => <div key={call.id} onClick={() => setSelectedSid(call.id)} className={`cursor-pointer rounded-lg border p-4 transition ${selectedSid === call.id ? 'border-blue-500 bg-blue-500/10' : 'border-gray-700 bg-gray-750 hover:border-gray-600'}`}>
                     <div className="flex items-center justify-between">
                       <div className="flex items-center">
                         <div className="mr-3 rounded-full bg-blue-600/20 p-2">
@@ -129,7 +69,7 @@ const LiveMonitor: React.FC = () => {
                       </div>
                       <div className="flex items-center">
                         <span className="mr-2 h-2 w-2 rounded-full bg-green-500"></span>
-                        <span className="text-xs text-green-400">Live</span>
+                        <span className="text-xs text-green-400">{call.status === 'ringing' ? 'Ringing' : 'Live'}</span>
                       </div>
                     </div>
                   </div>)}
@@ -1,6 +1,6 @@
 // API service for communication with Flask backend
 
-const API_BASE_URL = process.env.NODE_ENV === 'production' ? '' : 'http://localhost:5001';
+export const API_BASE_URL = process.env.NODE_ENV === 'production' ? '' : 'http://localhost:5001';
 
 class ApiService {
   private credentials = {
@@ -12,6 +12,10 @@ class ApiService {
     this.credentials = { username, password };
   }
 
+  getCredentials() {
+    return { ...this.credentials };
+  }
+
   private getAuthHeaders(): HeadersInit {
     const credentials = btoa(`${this.credentials.username}:${this.credentials.password}`);
     return {
@@ -148,6 +152,16 @@ class ApiService {
         attendee_phone?: string;
         status: string;
       }>;
+      audio_analytics?: {
+        duration: number;
+        caller_talk_time: number;
+        agent_talk_time?: number;
+        overlap_time: number;
+        longest_silence: number;
+        silence_ratio: number;
+        peaks: Record<string, Array<[number, number]>>;
+        computed_at: string;
+      } | null;
       summary?: string;
     }>(`/api/calls/${callId}`);
   }
@@ -0,0 +1,105 @@
+// Minimal Socket.IO client for the live dashboard feed, over the browser's WebSocket
+// Speaks Engine.IO v4 / Socket.IO v5 on the websocket transport only: connect with an
+// auth payload, named events both ways, ping/pong, and reconnecting with backoff.
+
+type Handler = (...args: any[]) => void;
+
+const MAX_RECONNECT_DELAY = 10000;
+
+export class LiveSocket {
+  connected = false;
+  private ws: WebSocket | null = null;
+  private handlers: Record<string, Handler[]> = {};
+  private closed = false;
+  private attempts = 0;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+
+  constructor(private baseUrl: string, private auth: Record<string, string>) {
+    this.open();
+  }
+
+  on(event: string, handler: Handler) {
+    (this.handlers[event] = this.handlers[event] || []).push(handler);
+    return this;
+  }
+
+  emit(event: string, data?: unknown) {
+    if (this.connected && this.ws) {
+      this.ws.send(`42${JSON.stringify(data === undefined ? [event] : [event, data])}`);
+    }
+  }
+
+  disconnect() {
+    this.closed = true;
+    if (this.reconnectTimer) clearTimeout(this.reconnectTimer);
+    if (this.ws) {
+      if (this.connected) this.ws.send('41');
+      this.ws.close();
+    }
+  }
+
+  private url() {
+    const base = this.baseUrl || window.location.origin;
+    return `${base.replace(/^http/, 'ws')}/socket.io/?EIO=4&transport=websocket`;
+  }
+
+  private open() {
+    const ws = new WebSocket(this.url());
+    this.ws = ws;
+    ws.onmessage = event => this.receive(String(event.data));
+    ws.onclose = () => {
+      const wasConnected = this.connected;
+      this.connected = false;
+      if (wasConnected) this.fire('disconnect');
+      this.scheduleReconnect();
+    };
+  }
+
+  private scheduleReconnect() {
+    if (this.closed) return;
+    const delay = Math.min(MAX_RECONNECT_DELAY, 500 * 2 ** this.attempts++);
+    this.reconnectTimer = setTimeout(() => this.open(), delay);
+  }
+
+  private receive(packet: string) {
+    switch (packet[0]) {
+      case '0': // Engine.IO open: join the default namespace with our credentials
+        this.ws?.send(`40${JSON.stringify(this.auth)}`);
+        return;
+      case '2': // Server ping
+        this.ws?.send('3');
+        return;
+      case '4':
+        this.receiveMessage(packet.slice(1));
+        return;
+    }
+  }
+
+  private receiveMessage(message: string) {
+    switch (message[0]) {
+      case '0':
+        this.connected = true;
+        this.attempts = 0;
+        this.fire('connect');
+        return;
+      case '1':
+        this.ws?.close();
+        return;
+      case '2': {
+        const [event, ...args] = JSON.parse(message.slice(1));
+        this.fire(event, ...args);
+        return;
+      }
+      case '4': // Rejected, e.g. bad credentials; keep retrying in case they change
+        this.fire('connect_error', JSON.parse(message.slice(1) || '{}'));
+        this.ws?.close();
+        return;
+    }
+  }
+
+  private fire(event: string, ...args: unknown[]) {
+    (this.handlers[event] || []).forEach(handler => handler(...args));
+  }
+}
+
+export const connectLive = (baseUrl: string, auth: Record<string, string>) => new LiveSocket(baseUrl, auth);
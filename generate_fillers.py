@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Pre-render the filler/acknowledgement audio bank with Deepgram TTS
+Run this at build time so workers load the clips from disk at startup
+"""
+
+import sys
+from flask import Flask
+from config import Config
+from services.deepgram_service import DeepgramService
+from services.filler_audio import FillerAudioBank
+
+def generate_filler_audio():
+    """Render every filler phrase to static/fillers"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    
+    with app.app_context():
+        try:
+            deepgram_service = DeepgramService()
+            bank = FillerAudioBank()
+            
+            print("Generating filler audio clips...")
+            loaded = bank.load(deepgram_service.text_to_speech)
+            
+            if loaded == len(bank.phrases):
+                print(f"✅ {loaded} filler clips saved to: {bank.static_dir}")
+                return True
+            else:
+                print(f"❌ Only {loaded}/{len(bank.phrases)} filler clips were generated")
+                return False
+                
+        except Exception as e:
+            print(f"❌ Error generating filler clips: {e}")
+            return False
+
+if __name__ == "__main__":
+    success = generate_filler_audio()
+    sys.exit(0 if success else 1)
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from datetime import datetime
 import json
 
@@ -15,11 +16,13 @@ class Call(db.Model):
     duration = db.Column(db.Integer)  # in seconds
     call_type = db.Column(db.String(20), default='inbound')  # inbound, outbound, conference
     recording_url = db.Column(db.String(500))
+    summary = db.Column(db.Text)  # written by the summarize_call background job
     
     # Relationships
     transcripts = db.relationship('Transcript', backref='call', lazy=True, cascade='all, delete-orphan')
     interactions = db.relationship('Interaction', backref='call', lazy=True, cascade='all, delete-orphan')
     appointments = db.relationship('Appointment', backref='call', lazy=True, cascade='all, delete-orphan')
+    audio_analytics = db.relationship('CallAudioAnalytics', backref='call', lazy=True, uselist=False, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -33,18 +36,22 @@ class Call(db.Model):
             'duration': self.duration,
             'call_type': self.call_type,
             'recording_url': self.recording_url,
+            'summary': self.summary,
             'transcript_count': len(self.transcripts),
             'interaction_count': len(self.interactions)
         }
 
 class Transcript(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=False)
+    call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=False, index=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     speaker = db.Column(db.String(20))  # 'caller', 'agent', 'participant1', 'participant2'
     text = db.Column(db.Text, nullable=False)
     confidence = db.Column(db.Float)
     is_final = db.Column(db.Boolean, default=True)
+    start_offset = db.Column(db.Float)  # seconds into the recording, for post-call transcripts
+    end_offset = db.Column(db.Float)
+    source = db.Column(db.String(500))  # recording a post-call transcription came from; None for live lines
     
     def to_dict(self):
         return {
@@ -54,12 +61,14 @@ class Transcript(db.Model):
             'speaker': self.speaker,
             'text': self.text,
             'confidence': self.confidence,
-            'is_final': self.is_final
+            'is_final': self.is_final,
+            'start_offset': self.start_offset,
+            'end_offset': self.end_offset
         }
 
 class Interaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=False)
+    call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=False, index=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     intent = db.Column(db.String(100))  # 'booking', 'info_request', 'complaint', etc.
     confidence = db.Column(db.Float)
@@ -87,6 +96,46 @@ class Interaction(db.Model):
             'metadata': self.get_metadata()
         }
 
+class CallAudioAnalytics(db.Model):
+    """Waveform peaks and talk-time figures precomputed from a call recording"""
+    id = db.Column(db.Integer, primary_key=True)
+    call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=False, unique=True)
+    duration = db.Column(db.Float)  # in seconds
+    caller_talk_time = db.Column(db.Float)
+    agent_talk_time = db.Column(db.Float)
+    overlap_time = db.Column(db.Float)
+    longest_silence = db.Column(db.Float)
+    silence_ratio = db.Column(db.Float)
+    peaks = db.Column(db.Text)  # JSON: {channel: [[min, max], ...]} scaled to -127..127
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def get_peaks(self):
+        return json.loads(self.peaks) if self.peaks else {}
+    
+    def update_from(self, results):
+        talk_time = results['talk_time']
+        self.duration = results['duration']
+        # Mono recordings have a single mixed channel, reported as caller talk time
+        self.caller_talk_time = talk_time.get('caller', talk_time.get('mixed'))
+        self.agent_talk_time = talk_time.get('agent')
+        self.overlap_time = results['overlap_time']
+        self.longest_silence = results['longest_silence']
+        self.silence_ratio = results['silence_ratio']
+        self.peaks = json.dumps(results['peaks'], separators=(',', ':'))
+        self.computed_at = datetime.utcnow()
+    
+    def to_dict(self):
+        return {
+            'duration': self.duration,
+            'caller_talk_time': self.caller_talk_time,
+            'agent_talk_time': self.agent_talk_time,
+            'overlap_time': self.overlap_time,
+            'longest_silence': self.longest_silence,
+            'silence_ratio': self.silence_ratio,
+            'peaks': self.get_peaks(),
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
 class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     call_id = db.Column(db.Integer, db.ForeignKey('call.id'), nullable=True)
@@ -139,4 +188,72 @@ class CRMWebhook(db.Model):
             'response_status': self.response_status,
             'response_body': self.response_body,
             'triggered_at': self.triggered_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class Job(db.Model):
+    """A unit of background work, claimed and run by services.job_queue workers"""
+    __table_args__ = (db.Index('ix_job_claim', 'status', 'run_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(100), nullable=False, index=True)
+    payload = db.Column(db.Text)  # JSON string
+    priority = db.Column(db.Integer, default=0)  # higher runs first
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # a running job whose lock has expired is claimed again
+    locked_by = db.Column(db.String(100))
+    dedupe_key = db.Column(db.String(255), index=True)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def get_payload(self):
+        return json.loads(self.payload) if self.payload else {}
+    
+    def set_payload(self, data):
+        self.payload = json.dumps(data)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'payload': self.get_payload(),
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# Columns added to existing tables after their first release; db.create_all() never alters tables
+ADDED_COLUMNS = {
+    'transcript': {'start_offset': 'FLOAT', 'end_offset': 'FLOAT', 'source': 'VARCHAR(500)'},
+    'call': {'summary': 'TEXT'}
+}
+
+# Indexes added to existing tables after their first release, as name: (table, column)
+ADDED_INDEXES = {
+    'ix_transcript_call_id': ('transcript', 'call_id'),
+    'ix_interaction_call_id': ('interaction', 'call_id')
+}
+
+def upgrade_schema():
+    """Add any missing ADDED_COLUMNS and ADDED_INDEXES to existing tables; call after db.create_all()"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    with db.engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, column_type in columns.items():
+                if name not in existing:
+                    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+        for name, (table, column) in ADDED_INDEXES.items():
+            if table in tables and name not in {index['name'] for index in inspector.get_indexes(table)}:
+                connection.execute(text(f'CREATE INDEX {name} ON {table} ({column})'))
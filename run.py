@@ -1,12 +1,29 @@
 #!/usr/bin/env python3
 """
 Production-ready entry point for the Voice AI Assistant
+Serves cooperatively on green threads by default when DATABASE_URL points at
+Postgres, so a webhook waiting on a slow provider doesn't hold up any other
+request in the process; with the default sqlite database, whose queries would
+block the event hub, it serves on Flask's threaded server. Set
+SERVER_CONCURRENCY=eventlet, gevent or threading to choose explicitly;
+`gunicorn app:app` still runs sync workers.
 """
 
-from app import create_app
+import os
+
+# The standard library must be patched before anything imports socket or threading
+# (.env is only read later, by config, so the database choice here comes from the real environment)
+from utils.cooperative import default_concurrency, monkey_patch, interrupt_main
+SERVER_CONCURRENCY = (os.environ.get('SERVER_CONCURRENCY') or default_concurrency(os.environ.get('DATABASE_URL'))).lower()
+monkey_patch(SERVER_CONCURRENCY)
+
+import signal
+import threading
+# Importing app builds the application once, with every init_app side effect
+from app import app as flask_app
+from services.media_stream import media_stream_server
 from utils.errors import handle_errors
 import logging
-import os
 
 # Configure logging
 logging.basicConfig(
@@ -14,9 +31,8 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-def create_production_app():
-    """Create and configure the Flask app for production"""
-    app = create_app()
+def create_production_app(app=flask_app):
+    """Configure the Flask app for production; reuses app.py's instance rather than building a second one"""
     
     # Register error handlers
     handle_errors(app)
@@ -42,12 +58,35 @@ def create_production_app():
 application = create_production_app()
 app = application  # For compatibility with different WSGI servers
 
+def drain_on_sigterm():
+    """Platforms send SIGTERM before killing an instance: let live calls finish, then stop serving"""
+    # The handler may run on the event hub, which must not block, so it only wakes this thread
+    requested = threading.Event()
+
+    def shutdown():
+        requested.wait()
+        logging.getLogger(__name__).info("SIGTERM received, draining media streams")
+        media_stream_server.drain()
+        # Stopping the server lets the interpreter exit normally and run the atexit flushes
+        interrupt_main()
+
+    threading.Thread(target=shutdown, name='media-drain', daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: requested.set())
+    # Background launches can inherit SIGINT ignored, which would swallow interrupt_main
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
 if __name__ == '__main__':
+    drain_on_sigterm()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
-    app.run(
-        host='0.0.0.0',
-        port=port,
-        debug=debug
-    )
\ No newline at end of file
+    if SERVER_CONCURRENCY in ('eventlet', 'gevent'):
+        # One green thread per request on the patched event hub
+        app.extensions['socketio'].run(app, host='0.0.0.0', port=port, debug=debug, use_reloader=False)
+    else:
+        app.run(
+            host='0.0.0.0',
+            port=port,
+            debug=debug,
+            threaded=True
+        )
\ No newline at end of file
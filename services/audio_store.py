@@ -0,0 +1,170 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class StreamingClip:
+    """Audio that is still being synthesized; readers follow the writer chunk by chunk"""
+
+    def __init__(self, mimetype=None):
+        self.mimetype = mimetype
+        self.done = False
+        self.error = None
+        self._chunks = []
+        self._cond = threading.Condition()
+        # Set once the mimetype is known, i.e. a provider has been chosen
+        self.ready = threading.Event()
+        if mimetype:
+            self.ready.set()
+
+    def set_mimetype(self, mimetype):
+        self.mimetype = mimetype
+        self.ready.set()
+
+    def append(self, chunk):
+        with self._cond:
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+        self.ready.set()
+
+    def wait_started(self, timeout):
+        """Wait for the first chunk; False if synthesis failed, produced nothing or is slower than timeout"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._chunks or self.done, timeout)
+            return bool(self._chunks)
+
+    def data(self):
+        with self._cond:
+            return b''.join(self._chunks)
+
+    def iter_chunks(self, timeout=10):
+        """Yield every chunk from the start, blocking for new ones until the clip is finished"""
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self._chunks) and not self.done:
+                    if not self._cond.wait_for(lambda: index < len(self._chunks) or self.done, timeout):
+                        logger.warning("Timed out waiting for streaming audio chunk")
+                        return
+                pending = self._chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self._chunks):
+                return
+
+class AudioStore:
+    """Thread-safe in-memory store for synthesized audio served from /api/audio/<id>
+
+    Regular entries are evicted least-recently-used once ``max_entries`` is
+    reached. Pinned entries (e.g. the filler bank) are never evicted.
+    """
+
+    def __init__(self, max_entries=500, stream_workers=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._stream_executor = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix='tts-stream')
+
+    def put(self, audio_data, mimetype='audio/wav', audio_id=None, pinned=False):
+        """Store audio and return its id"""
+        audio_id = audio_id or str(uuid.uuid4())
+        entry = (audio_data, mimetype)
+
+        with self._lock:
+            if pinned:
+                self._pinned[audio_id] = entry
+            else:
+                self._entries[audio_id] = entry
+                self._entries.move_to_end(audio_id)
+                while len(self._entries) > self.max_entries:
+                    evicted_id, _ = self._entries.popitem(last=False)
+                    logger.debug(f"Evicted audio from store: {evicted_id}")
+
+        return audio_id
+
+    def get(self, audio_id):
+        """Return (audio_data, mimetype) or None"""
+        with self._lock:
+            entry = self._pinned.get(audio_id)
+            if entry is None:
+                entry = self._entries.get(audio_id)
+                if entry is not None:
+                    self._entries.move_to_end(audio_id)
+            return entry
+
+    def stream_from(self, produce_chunks, mimetype=None):
+        """Start synthesis in the background and return an id servable before it finishes
+
+        ``produce_chunks()`` must return an iterable of audio chunks. If no
+        mimetype is given the iterable must carry a ``mimetype`` attribute
+        (e.g. a hedged stream whose provider is only known once it wins).
+        Once it is exhausted the full clip is teed into the store under the
+        same id.
+        """
+        audio_id = str(uuid.uuid4())
+        clip = StreamingClip(mimetype)
+        with self._lock:
+            self._streams[audio_id] = clip
+        self._stream_executor.submit(self._feed_stream, audio_id, clip, produce_chunks)
+        return audio_id
+
+    def get_stream(self, audio_id):
+        with self._lock:
+            return self._streams.get(audio_id)
+
+    def wait_started(self, audio_id, timeout):
+        """True once a clip from stream_from has audio to serve; False if it failed or is still silent after timeout"""
+        clip = self.get_stream(audio_id)
+        if clip is None:
+            # Already finished: teed into the store unless it failed
+            return audio_id in self
+        return clip.wait_started(timeout)
+
+    def _feed_stream(self, audio_id, clip, produce_chunks):
+        error = None
+        try:
+            chunks = produce_chunks()
+            if chunks is None:
+                raise RuntimeError("No audio source available")
+            if not clip.mimetype:
+                clip.set_mimetype(getattr(chunks, 'mimetype', None) or 'audio/wav')
+            for chunk in chunks:
+                if chunk:
+                    clip.append(chunk)
+        except Exception as e:
+            logger.error(f"Error streaming audio {audio_id}: {e}")
+            error = e
+        finally:
+            audio_data = clip.data()
+            # Tee into the store before dropping the stream so late readers always find it
+            if audio_data and not error:
+                self.put(audio_data, clip.mimetype, audio_id=audio_id)
+            clip.finish(error)
+            with self._lock:
+                self._streams.pop(audio_id, None)
+
+    def __contains__(self, audio_id):
+        with self._lock:
+            return audio_id in self._pinned or audio_id in self._entries
+
+    def url_for(self, audio_id, base_url):
+        return f"{base_url}/api/audio/{audio_id}"
+
+    def stream_url_for(self, audio_id, base_url):
+        return f"{base_url}/api/audio/stream/{audio_id}"
+
+# Process-wide store shared by the TTS services and the /api/audio endpoint
+audio_store = AudioStore()
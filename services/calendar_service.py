@@ -3,17 +3,25 @@ from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from google_auth_httplib2 import AuthorizedHttp
 from datetime import datetime, timedelta
+import httplib2
 import pytz
 import logging
 from flask import current_app
+from utils.deadline import cap_timeout, current_deadline, has_budget
+from utils.errors import DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
 class CalendarService:
     def __init__(self):
         self.service = None
+        self.credentials = None
         self.calendar_id = 'primary'  # Can be configured
+        self.timeout = 10
+        # Calendar calls are skipped inside a webhook when less budget than this remains
+        self.min_budget = 1
         self._initialize_service()
     
     def _initialize_service(self):
@@ -36,18 +44,37 @@ class CalendarService:
             # For OAuth2 (requires user consent flow)
             # This is a placeholder - implement proper OAuth2 flow
             
+            self.credentials = creds
             self.service = build('calendar', 'v3', credentials=creds)
             
         except Exception as e:
             logger.error(f"Failed to initialize Google Calendar service: {e}")
             # Don't raise here - let the app continue without calendar functionality
     
+    def _execute(self, request):
+        """Run a Google API request, with its timeout capped by the request deadline
+
+        httplib2 fixes the timeout per connection, so a call under a deadline
+        gets a connection of its own with the capped timeout.
+        """
+        if current_deadline() is None:
+            return request.execute()
+        if not has_budget(self.min_budget):
+            raise DeadlineExceededError('calendar')
+        http = httplib2.Http(timeout=cap_timeout(self.timeout))
+        if self.credentials is not None:
+            http = AuthorizedHttp(self.credentials, http=http)
+        return request.execute(http=http)
+    
     def create_appointment(self, appointment_data):
         """Create an appointment in Google Calendar"""
         try:
             if not self.service:
                 logger.error("Calendar service not initialized")
                 return None
+            if not has_budget(self.min_budget):
+                logger.warning("Skipping calendar booking, request deadline too close")
+                return None
             
             # Parse appointment data
             start_time = datetime.fromisoformat(appointment_data['start_time'])
@@ -86,10 +113,10 @@ class CalendarService:
                 })
             
             # Create the event
-            created_event = self.service.events().insert(
+            created_event = self._execute(self.service.events().insert(
                 calendarId=self.calendar_id,
                 body=event
-            ).execute()
+            ))
             
             logger.info(f"Appointment created: {created_event['id']}")
             
@@ -111,6 +138,9 @@ class CalendarService:
         try:
             if not self.service:
                 return []
+            if not has_budget(self.min_budget):
+                logger.warning("Skipping calendar lookup, request deadline too close")
+                return []
             
             # Define business hours (9 AM to 5 PM)
             start_time = datetime.combine(date, datetime.min.time().replace(hour=9))
@@ -121,13 +151,13 @@ class CalendarService:
             end_time = timezone.localize(end_time)
             
             # Get existing events for the day
-            events_result = self.service.events().list(
+            events_result = self._execute(self.service.events().list(
                 calendarId=self.calendar_id,
                 timeMin=start_time.isoformat(),
                 timeMax=end_time.isoformat(),
                 singleEvents=True,
                 orderBy='startTime'
-            ).execute()
+            ))
             
             events = events_result.get('items', [])
             
@@ -169,10 +199,10 @@ class CalendarService:
             if not self.service:
                 return False
             
-            self.service.events().delete(
+            self._execute(self.service.events().delete(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
+            ))
             
             logger.info(f"Appointment cancelled: {event_id}")
             return True
@@ -191,10 +221,10 @@ class CalendarService:
                 return None
             
             # Get the existing event
-            event = self.service.events().get(
+            event = self._execute(self.service.events().get(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
+            ))
             
             # Update the times
             timezone = pytz.timezone('UTC')
@@ -205,11 +235,11 @@ class CalendarService:
             event['end']['dateTime'] = end_time.isoformat()
             
             # Update the event
-            updated_event = self.service.events().update(
+            updated_event = self._execute(self.service.events().update(
                 calendarId=self.calendar_id,
                 eventId=event_id,
                 body=event
-            ).execute()
+            ))
             
             logger.info(f"Appointment rescheduled: {event_id}")
             
@@ -229,10 +259,10 @@ class CalendarService:
             if not self.service:
                 return None
             
-            event = self.service.events().get(
+            event = self._execute(self.service.events().get(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
+            ))
             
             return {
                 'id': event['id'],
@@ -0,0 +1,124 @@
+import logging
+import struct
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Voice activity is judged per 20ms frame against an RMS floor (~-36 dBFS)
+FRAME_MS = 20
+SPEECH_RMS_THRESHOLD = 500
+# Frames analysed per block, so memory stays bounded for long calls
+BLOCK_FRAMES = 3000
+
+def _wav_layout(path):
+    """Return (channels, sample_rate, data_offset, data_bytes) for a PCM16 WAV file"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"{path} is not a WAV file")
+        channels = sample_rate = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                audio_format, channels, sample_rate = struct.unpack('<HHI', fmt[:8])
+                bits = struct.unpack('<H', fmt[14:16])[0]
+                if audio_format != 1 or bits != 16:
+                    raise ValueError(f"{path} is not 16-bit PCM")
+                if size & 1:
+                    f.seek(1, 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                f.seek(0, 2)
+                # Recordings cut off before their header fix-up carry a zero size
+                available = f.tell() - offset
+                return channels, sample_rate, offset, min(size, available) if size else available
+            else:
+                f.seek(size + (size & 1), 1)
+
+def _runs(active):
+    """Length of the longest run of True values"""
+    if not active.any():
+        return 0
+    padded = np.concatenate(([0], active.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[0::2]).max())
+
+def analyze_recording(path, peak_count=1000, threshold=SPEECH_RMS_THRESHOLD):
+    """Compute waveform peaks and talk-time analytics for a PCM16 WAV recording
+
+    Stereo recordings from the media stream are caller (left) and agent
+    (right); mono recordings are reported as a single mixed channel. The
+    file is memory-mapped and analysed in blocks, so it is never loaded
+    whole. Peaks are ``peak_count`` min/max pairs per channel, scaled to
+    -127..127.
+    """
+    channels, sample_rate, offset, data_bytes = _wav_layout(path)
+    frames = data_bytes // (2 * channels)
+    names = ['caller', 'agent'] if channels == 2 else ['mixed'] if channels == 1 else [f"channel{i}" for i in range(channels)]
+
+    if frames == 0:
+        return {'duration': 0.0, 'channels': names, 'peaks': {name: [] for name in names}, 'talk_time': {name: 0.0 for name in names},
+                'longest_silence': 0.0, 'overlap_time': 0.0, 'silence_ratio': 1.0}
+
+    samples = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(frames, channels))
+
+    # Peaks: min/max over equal-width bins of the whole call
+    bins = min(peak_count, frames)
+    edges = np.linspace(0, frames, bins + 1).astype(np.int64)[:-1]
+    peaks = {}
+    for index, name in enumerate(names):
+        channel = samples[:, index]
+        lows = np.minimum.reduceat(channel, edges)
+        highs = np.maximum.reduceat(channel, edges)
+        pairs = np.stack((lows, highs), axis=1).astype(np.int32) * 127 // 32768
+        peaks[name] = pairs.astype(np.int8).tolist()
+
+    # Voice activity per 20ms frame, block by block
+    frame_samples = sample_rate * FRAME_MS // 1000
+    vad_frames = frames // frame_samples
+    active = np.zeros((vad_frames, channels), dtype=bool)
+    for start in range(0, vad_frames, BLOCK_FRAMES):
+        stop = min(start + BLOCK_FRAMES, vad_frames)
+        block = np.asarray(samples[start * frame_samples:stop * frame_samples], dtype=np.float32)
+        block = block.reshape(stop - start, frame_samples, channels)
+        active[start:stop] = np.sqrt(np.mean(block * block, axis=1)) > threshold
+
+    seconds_per_frame = FRAME_MS / 1000.0
+    anyone = active.any(axis=1)
+    overlap = active.all(axis=1) if channels > 1 else np.zeros(vad_frames, dtype=bool)
+
+    return {
+        'duration': round(frames / sample_rate, 2),
+        'channels': names,
+        'peaks': peaks,
+        'talk_time': {name: round(float(active[:, i].sum()) * seconds_per_frame, 2) for i, name in enumerate(names)},
+        'longest_silence': round(_runs(~anyone) * seconds_per_frame, 2),
+        'overlap_time': round(float(overlap.sum()) * seconds_per_frame, 2),
+        'silence_ratio': round(1 - float(anyone.mean()), 3) if vad_frames else 1.0
+    }
+
+def store_call_analytics(call_sid, path, results=None):
+    """Analyse a finished recording and save it on the call; needs an app context
+
+    ``results`` from an earlier ``analyze_recording(path)`` skip the analysis.
+    """
+    from models import db, Call, CallAudioAnalytics
+
+    call = Call.query.filter_by(call_sid=call_sid).first()
+    if not call:
+        logger.warning(f"No call {call_sid} to attach recording analytics to")
+        return None
+
+    if results is None:
+        results = analyze_recording(path)
+    analytics = call.audio_analytics or CallAudioAnalytics(call_id=call.id)
+    analytics.update_from(results)
+    db.session.add(analytics)
+    db.session.commit()
+    logger.info(f"Stored audio analytics for {call_sid}: talk {results['talk_time']}, "
+                f"longest silence {results['longest_silence']}s")
+    return analytics
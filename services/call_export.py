@@ -0,0 +1,112 @@
+import json
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+# Exportable call columns, in output order
+CALL_FIELDS = (
+    'id', 'call_sid', 'from_number', 'to_number', 'status', 'start_time', 'end_time',
+    'duration', 'call_type', 'recording_url', 'summary'
+)
+TRANSCRIPT_FIELDS = ('timestamp', 'speaker', 'text', 'confidence', 'is_final', 'start_offset', 'end_offset')
+INTERACTION_FIELDS = ('timestamp', 'intent', 'confidence', 'user_input', 'ai_response', 'action_taken', 'meta_data')
+INCLUDES = ('transcripts', 'interactions')
+
+def parse_time(value):
+    """An ISO 8601 time as the naive UTC datetime the tables store; raises ValueError"""
+    # fromisoformat only accepts a Z suffix from Python 3.11
+    parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith(('Z', 'z')) else value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _metadata(raw):
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return raw
+
+def _children(session, model, fields, call_ids):
+    """Rows of a per-call table for a chunk of calls, grouped by call id"""
+    columns = [getattr(model, name) for name in fields]
+    query = (select(model.call_id, *columns)
+             .where(model.call_id.in_(call_ids))
+             .order_by(model.call_id, model.timestamp, model.id))
+    grouped = {}
+    for row in session.execute(query):
+        item = {name: _value(value) for name, value in zip(fields, row[1:])}
+        if 'meta_data' in item:
+            item['metadata'] = _metadata(item.pop('meta_data'))
+        grouped.setdefault(row[0], []).append(item)
+    return grouped
+
+def iter_call_export(fields=CALL_FIELDS, include=INCLUDES, since=None, until=None, status=None, chunk_size=500):
+    """Yield export records - one dict per call, with its transcripts and interactions nested
+
+    Calls are read in id order ``chunk_size`` at a time, by keyset rather than
+    offset, so every chunk costs the same however deep the export is. Only the
+    requested columns are selected and rows are never hydrated into models.
+    Each chunk's transcripts and interactions take one query per table. The
+    session is closed before a chunk is handed out, so a slow reader holds no
+    connection or transaction, and memory is bounded by one chunk. Needs an
+    app context for the whole iteration.
+    """
+    from models import db, Call, Transcript, Interaction
+
+    columns = [Call.id] + [getattr(Call, name) for name in fields if name != 'id']
+    names = ['id'] + [name for name in fields if name != 'id']
+    conditions = []
+    if since is not None:
+        conditions.append(Call.start_time >= since)
+    if until is not None:
+        conditions.append(Call.start_time < until)
+    if status:
+        conditions.append(Call.status == status)
+
+    session = db.session
+    last_id = 0
+    while True:
+        query = select(*columns).where(Call.id > last_id, *conditions).order_by(Call.id).limit(chunk_size)
+        rows = session.execute(query).all()
+        if not rows:
+            session.close()
+            return
+        call_ids = [row[0] for row in rows]
+        transcripts = _children(session, Transcript, TRANSCRIPT_FIELDS, call_ids) if 'transcripts' in include else None
+        interactions = _children(session, Interaction, INTERACTION_FIELDS, call_ids) if 'interactions' in include else None
+        session.close()
+
+        for row in rows:
+            record = {name: _value(value) for name, value in zip(names, row) if name in fields}
+            if transcripts is not None:
+                record['transcripts'] = transcripts.get(row[0], [])
+            if interactions is not None:
+                record['interactions'] = interactions.get(row[0], [])
+            yield record
+        last_id = call_ids[-1]
+
+def ndjson_lines(records, flush_bytes=64 * 1024):
+    """Encode export records as newline-delimited JSON in pieces of about flush_bytes
+
+    Ends with an error line if the export failed part way.
+    """
+    buffer, size = [], 0
+    try:
+        for record in records:
+            line = json.dumps(record, separators=(',', ':')) + '\n'
+            buffer.append(line)
+            size += len(line)
+            if size >= flush_bytes:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    except Exception as e:
+        # Headers are long gone; a truncated file must not look complete
+        logger.error(f"Call export failed: {e}")
+        yield ''.join(buffer) + json.dumps({'error': 'export failed', 'detail': str(e)}) + '\n'
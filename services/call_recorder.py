@@ -0,0 +1,192 @@
+import logging
+import os
+import re
+import struct
+import time
+from collections import deque
+from services.tts_segmenter import parse_wav, wav_header
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+FRAME_SAMPLES = 160  # 20ms at 8kHz
+
+def _mulaw_to_linear(value):
+    """Decode one G.711 mu-law byte to a signed 16-bit sample"""
+    value = ~value & 0xFF
+    sign = value & 0x80
+    exponent = (value >> 4) & 0x07
+    mantissa = value & 0x0F
+    sample = ((mantissa << 3) + 0x84) << exponent
+    sample -= 0x84
+    return -sample if sign else sample
+
+# bytes.translate tables giving the low and high byte of each decoded sample,
+# so a whole frame converts in C without audioop (removed in Python 3.13)
+_MULAW_LOW = bytes(_mulaw_to_linear(i) & 0xFF for i in range(256))
+_MULAW_HIGH = bytes((_mulaw_to_linear(i) >> 8) & 0xFF for i in range(256))
+
+def _linear_to_mulaw(sample):
+    """Encode one signed 16-bit sample as a G.711 mu-law byte, matching audioop.lin2ulaw"""
+    sample >>= 2
+    mask = 0x7F if sample < 0 else 0xFF
+    sample = min(abs(sample), 8159) + 0x21
+    segment = max(sample.bit_length() - 6, 0)
+    if segment > 7:
+        return 0x7F ^ mask
+    return ((segment << 4) | ((sample >> (segment + 1)) & 0x0F)) ^ mask
+
+_MULAW_ENCODE = None  # mu-law byte for each 16-bit sample, built on first use
+
+def wav_to_mulaw(audio_data):
+    """Raw 8kHz mu-law, as Twilio media streams take it, from a mono PCM16 8kHz WAV clip; raises ValueError"""
+    global _MULAW_ENCODE
+    fmt_chunk, pcm = parse_wav(audio_data)
+    audio_format, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', fmt_chunk[:16])
+    if (audio_format, channels, sample_rate, bits) != (1, 1, SAMPLE_RATE, 16):
+        raise ValueError(f"Expected mono PCM16 at {SAMPLE_RATE}Hz, got format {audio_format}, "
+                         f"{channels} channels, {sample_rate}Hz, {bits} bits")
+    if _MULAW_ENCODE is None:
+        _MULAW_ENCODE = bytes(_linear_to_mulaw(value - 0x10000 if value & 0x8000 else value) for value in range(0x10000))
+    samples = struct.unpack(f"<{len(pcm) // 2}H", pcm[:len(pcm) & ~1])
+    return bytes(_MULAW_ENCODE[value] for value in samples)
+
+# Stereo PCM16 at 8kHz: caller on the left channel, agent on the right
+_STEREO_FMT = struct.pack('<HHIIHH', 1, 2, SAMPLE_RATE, SAMPLE_RATE * 4, 4, 16)
+
+def recording_path(recordings_dir, call_sid):
+    """Local WAV path for a call; the sid is sanitized since it arrives over the wire"""
+    safe_sid = re.sub(r'[^A-Za-z0-9_-]', '', call_sid or '')
+    if not safe_sid:
+        raise ValueError("Cannot derive a recording path without a call sid")
+    return os.path.join(recordings_dir, f"{safe_sid}.wav")
+
+def prune_recordings(recordings_dir, retention_hours):
+    """Delete recordings last written more than retention_hours ago; returns how many were removed"""
+    cutoff = time.time() - retention_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(recordings_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            # A live call's file keeps being written, so only finished recordings age out
+            if entry.name.endswith('.wav') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove old recording {entry.path}: {e}")
+    if removed:
+        logger.info(f"Removed {removed} recordings older than {retention_hours}h from {recordings_dir}")
+    return removed
+
+class CallRecorder:
+    """Incremental stereo WAV recording of one media stream
+
+    Caller frames drive the timeline: each 20ms inbound frame is written
+    with 20ms of whatever agent audio is queued for playback (or silence),
+    which is how Twilio plays it out. Writes go through a buffered file and
+    the RIFF sizes are fixed up on close, so memory stays constant however
+    long the call runs; agent audio waiting for playback is capped at
+    ``max_agent_seconds``.
+    """
+
+    def __init__(self, path, buffer_size=64 * 1024, max_agent_seconds=60):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'wb', buffering=buffer_size)
+        self._file.write(wav_header(_STEREO_FMT, 0))
+        self._data_bytes = 0
+        self._agent = deque()  # queued PCM16 agent audio chunks
+        self._agent_bytes = 0
+        self._max_agent_bytes = max_agent_seconds * SAMPLE_RATE * 2
+        self._frame = bytearray(FRAME_SAMPLES * 4)
+        self._silence = bytes(FRAME_SAMPLES * 2)
+        self.closed = False
+
+    @property
+    def duration(self):
+        return self._data_bytes / (SAMPLE_RATE * 4)
+
+    def add_agent_audio(self, audio_data):
+        """Queue agent audio sent to Twilio: a PCM16 8kHz WAV clip or raw mu-law"""
+        if self.closed or not audio_data:
+            return
+        if audio_data[:4] == b'RIFF':
+            try:
+                _, pcm = parse_wav(audio_data)
+            except ValueError as e:
+                logger.warning(f"Not recording agent audio: {e}")
+                return
+        else:
+            pcm = self._mulaw_to_pcm(audio_data)
+
+        if self._agent_bytes + len(pcm) > self._max_agent_bytes:
+            logger.warning(f"Agent audio backlog full for {self.path}, dropping {len(pcm)} bytes")
+            return
+        self._agent.append(memoryview(pcm))
+        self._agent_bytes += len(pcm)
+
+    def write_caller(self, views):
+        """Append caller mu-law audio (memoryviews from the inbound ring), frame by frame"""
+        if self.closed:
+            return
+        for view in views:
+            for start in range(0, len(view), FRAME_SAMPLES):
+                self._write_frame(view[start:start + FRAME_SAMPLES])
+
+    def _write_frame(self, mulaw):
+        samples = len(mulaw)
+        frame = self._frame if samples == FRAME_SAMPLES else bytearray(samples * 4)
+        caller = bytes(mulaw)
+        frame[0::4] = caller.translate(_MULAW_LOW)
+        frame[1::4] = caller.translate(_MULAW_HIGH)
+
+        agent = self._take_agent(samples * 2)
+        frame[2::4] = agent[0::2]
+        frame[3::4] = agent[1::2]
+
+        self._file.write(frame)
+        self._data_bytes += len(frame)
+
+    def _take_agent(self, size):
+        """Pop ``size`` bytes of queued agent PCM, padding with silence"""
+        if not self._agent:
+            return self._silence[:size]
+        parts = []
+        needed = size
+        while needed and self._agent:
+            chunk = self._agent[0]
+            if len(chunk) <= needed:
+                parts.append(self._agent.popleft())
+                needed -= len(chunk)
+            else:
+                parts.append(chunk[:needed])
+                self._agent[0] = chunk[needed:]
+                needed = 0
+        self._agent_bytes -= size - needed
+        if needed:
+            parts.append(self._silence[:needed])
+        return b''.join(parts)
+
+    @staticmethod
+    def _mulaw_to_pcm(mulaw):
+        mulaw = bytes(mulaw)
+        pcm = bytearray(len(mulaw) * 2)
+        pcm[0::2] = mulaw.translate(_MULAW_LOW)
+        pcm[1::2] = mulaw.translate(_MULAW_HIGH)
+        return pcm
+
+    def close(self):
+        """Flush and fix up the RIFF and data chunk sizes"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._file.seek(0)
+            self._file.write(wav_header(_STEREO_FMT, self._data_bytes))
+        finally:
+            self._file.close()
+            self._agent.clear()
+        logger.info(f"Saved {self.duration:.1f}s recording to {self.path}")
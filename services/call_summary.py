@@ -0,0 +1,70 @@
+import logging
+from services.job_queue import job_queue
+from utils.errors import SummaryPendingError
+
+logger = logging.getLogger(__name__)
+
+def _summary_key(call_id):
+    return f"summary:{call_id}"
+
+def enqueue_summary(call_id, delay=0, notify_crm=False):
+    """Queue a summary of the call's transcript, and with notify_crm the CRM call_ended webhook; needs an app context"""
+    job_id = job_queue.enqueue('summarize_call', {'call_id': call_id}, delay=delay, dedupe_key=_summary_key(call_id))
+    if notify_crm:
+        enqueue_call_ended(call_id, delay=delay)
+    return job_id
+
+def enqueue_call_ended(call_id, delay=0):
+    """Queue the CRM call_ended webhook; it goes out once the call's summary is written or given up on"""
+    return job_queue.enqueue('notify_call_ended', {'call_id': call_id}, delay=delay,
+                             dedupe_key=f"call-ended:{call_id}")
+
+@job_queue.handler('summarize_call', concurrency=2, max_attempts=4, visibility_timeout=120, retry_delay=15.0)
+def summarize_call(payload):
+    """Summarise a finished call onto Call.summary"""
+    from models import db, Call
+    from services.registry import client_registry
+
+    call = db.session.get(Call, payload['call_id'])
+    if not call:
+        logger.warning(f"Call {payload['call_id']} disappeared before it was summarised")
+        return
+
+    if call.transcripts:
+        # fallback=None raises instead of storing a placeholder, so the queue retries
+        call.summary = client_registry.get('openai').summarize_call(
+            [{'speaker': t.speaker, 'text': t.text} for t in call.transcripts],
+            fallback=None
+        )
+        db.session.commit()
+        logger.info(f"Stored summary for call {call.call_sid}")
+
+    if payload.get('notify_crm'):
+        # Queued before CRM delivery became its own job
+        enqueue_call_ended(call.id)
+
+# Waits out the summary's retries (about two minutes) on a gentle backoff, then sends regardless,
+# so a summary that never succeeds doesn't keep the CRM from hearing the call ended
+@job_queue.handler('notify_call_ended', concurrency=2, max_attempts=20, visibility_timeout=60,
+                   retry_delay=15.0, backoff=1.3, max_retry_delay=120)
+def notify_call_ended(payload):
+    """Send the call_ended CRM webhook with the call's summary, if it got one"""
+    from models import db, Call
+    from services.registry import client_registry
+
+    call = db.session.get(Call, payload['call_id'])
+    if not call:
+        logger.warning(f"Call {payload['call_id']} disappeared before the CRM was notified")
+        return
+
+    if not call.summary and job_queue.pending(_summary_key(call.id)):
+        raise SummaryPendingError(call.id)
+
+    client_registry.get('crm').trigger_call_ended({
+        'call_id': call.id,
+        'call_sid': call.call_sid,
+        'from_number': call.from_number,
+        'to_number': call.to_number,
+        'duration': call.duration,
+        'status': call.status
+    }, transcript_summary=call.summary)
@@ -4,15 +4,27 @@ import logging
 from datetime import datetime
 from flask import current_app
 from models import CRMWebhook, db
+from urllib.parse import urlparse
+from utils.deadline import has_budget
+from services.job_queue import job_queue
+from utils.errors import CircuitOpenError, CRMError
+from utils.http_transport import http_transport
+from utils.resilience import get_operation
 
 logger = logging.getLogger(__name__)
 
 class CRMService:
     def __init__(self):
         self.default_timeout = 30
+        # CRM delivery is optional inside a webhook - skip it when less budget than this remains
+        self.min_budget = 3
     
     def trigger_webhook(self, webhook_url, payload, call_id=None):
         """Trigger a CRM webhook with the provided payload"""
+        if not has_budget(self.min_budget):
+            logger.warning(f"Skipping CRM webhook, request deadline too close: {webhook_url}")
+            return {'success': False, 'error': 'deadline'}
+        
         try:
             # Prepare the webhook record
             webhook_record = CRMWebhook(
@@ -27,12 +39,18 @@ class CRMService:
                 'User-Agent': 'VoiceAI-Webhook/1.0'
             }
             
-            response = requests.post(
+            # One breaker per CRM host so a dead endpoint doesn't hold up the rest
+            operation = get_operation(
+                f"crm.{urlparse(webhook_url).netloc}",
+                default_timeout=self.default_timeout,
+                max_timeout=self.default_timeout
+            )
+            response = operation.call(lambda timeout: http_transport.post(
                 webhook_url,
                 json=payload,
                 headers=headers,
-                timeout=self.default_timeout
-            )
+                timeout=timeout
+            ))
             
             # Record the response
             webhook_record.response_status = response.status_code
@@ -51,6 +69,19 @@ class CRMService:
                 'response': response.text[:500]  # Truncated response
             }
             
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping webhook, {e}: {webhook_url}")
+            webhook_record.response_status = 503
+            webhook_record.response_body = str(e)
+            db.session.add(webhook_record)
+            db.session.commit()
+            
+            return {
+                'success': False,
+                'error': 'circuit_open',
+                'webhook_id': webhook_record.id
+            }
+            
         except requests.exceptions.Timeout:
             logger.error(f"Webhook timeout: {webhook_url}")
             webhook_record.response_status = 408
@@ -84,6 +115,20 @@ class CRMService:
                 'error': str(e)
             }
     
+    def queue_webhook(self, webhook_url, payload, call_id=None):
+        """Deliver a webhook from the background job queue, with retries; returns straight away"""
+        try:
+            job_id = job_queue.enqueue('crm.webhook', {
+                'webhook_url': webhook_url,
+                'payload': payload,
+                'call_id': call_id
+            })
+        except Exception as e:
+            logger.error(f"Could not queue webhook {webhook_url}: {e}")
+            return {'success': False, 'error': str(e)}
+        
+        return {'success': True, 'queued': True, 'job_id': job_id}
+    
     def trigger_call_started(self, call_data):
         """Trigger webhook when a call starts"""
         payload = {
@@ -98,7 +143,7 @@ class CRMService:
         # Get webhook URL from configuration or database
         webhook_url = self._get_webhook_url('call_started')
         if webhook_url:
-            return self.trigger_webhook(webhook_url, payload, call_data.get('call_id'))
+            return self.queue_webhook(webhook_url, payload, call_data.get('call_id'))
         
         return {'success': False, 'error': 'No webhook URL configured'}
     
@@ -117,7 +162,7 @@ class CRMService:
         
         webhook_url = self._get_webhook_url('call_ended')
         if webhook_url:
-            return self.trigger_webhook(webhook_url, payload, call_data.get('call_id'))
+            return self.queue_webhook(webhook_url, payload, call_data.get('call_id'))
         
         return {'success': False, 'error': 'No webhook URL configured'}
     
@@ -145,7 +190,7 @@ class CRMService:
         
         webhook_url = self._get_webhook_url('appointment_booked')
         if webhook_url:
-            return self.trigger_webhook(webhook_url, payload, call_data.get('call_id') if call_data else None)
+            return self.queue_webhook(webhook_url, payload, call_data.get('call_id') if call_data else None)
         
         return {'success': False, 'error': 'No webhook URL configured'}
     
@@ -166,7 +211,7 @@ class CRMService:
         
         webhook_url = self._get_webhook_url('intent_detected')
         if webhook_url:
-            return self.trigger_webhook(webhook_url, payload, call_data.get('call_id'))
+            return self.queue_webhook(webhook_url, payload, call_data.get('call_id'))
         
         return {'success': False, 'error': 'No webhook URL configured'}
     
@@ -180,7 +225,7 @@ class CRMService:
         
         webhook_url = self._get_webhook_url(event_name)
         if webhook_url:
-            return self.trigger_webhook(webhook_url, payload, call_id)
+            return self.queue_webhook(webhook_url, payload, call_id)
         
         return {'success': False, 'error': 'No webhook URL configured'}
     
@@ -233,4 +278,14 @@ class CRMService:
             
         except Exception as e:
             logger.error(f"Error getting webhook logs: {e}")
-            return []
\ No newline at end of file
+            return []
+
+@job_queue.handler('crm.webhook', concurrency=4, max_attempts=8, visibility_timeout=120, retry_delay=10.0)
+def deliver_webhook(payload):
+    """Job handler: every attempt is logged as a CRMWebhook row; failures and 5xx/429 responses are retried"""
+    from services.registry import client_registry
+    
+    result = client_registry.get('crm').trigger_webhook(payload['webhook_url'], payload['payload'], payload.get('call_id'))
+    status_code = result.get('status_code')
+    if not result['success'] or status_code == 429 or (status_code or 0) >= 500:
+        raise CRMError(f"Delivery to {payload['webhook_url']} failed: {result.get('error') or status_code}")
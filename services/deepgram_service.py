@@ -1,6 +1,12 @@
 import json
 import logging
 from flask import current_app
+from services.tts_segmenter import SegmentedSynthesizer
+from utils.blocking import run_blocking
+from utils.deadline import cap_timeout
+from utils.errors import DeepgramError, RecordingNotReadyError
+from utils.http_transport import http_transport
+from utils.resilience import get_operation
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +15,11 @@ class DeepgramService:
         self.api_key = None
         self.deepgram = None
         self._initialize_client()
+        self.segmented_tts = SegmentedSynthesizer(
+            lambda segment, on_response=None: b''.join(self._iter_speak(segment, on_response=on_response)),
+            'deepgram:aura-2-amalthea-en',
+            audio_format='wav'
+        )
     
     def _initialize_client(self):
         try:
@@ -43,7 +54,12 @@ class DeepgramService:
             logger.error(f"Error in streaming transcription: {e}")
     
     def transcribe_file(self, audio_file_url):
-        """Transcribe a recorded audio file"""
+        """Transcribe a recorded audio file
+        
+        Makes a single download attempt and never sleeps waiting for Twilio;
+        post-call transcription goes through services.transcription_jobs,
+        which reschedules recordings that aren't ready yet.
+        """
         try:
             if not self.deepgram:
                 logger.warning("Deepgram client not available, returning mock data")
@@ -55,120 +71,13 @@ class DeepgramService:
                     'confidence': 0.85
                 }]
             
-            # Try to use actual Deepgram transcription
             try:
-                from deepgram import PrerecordedOptions
-                
-                options = PrerecordedOptions(
-                    model="nova-2",
-                    smart_format=True,
-                    punctuate=True,
-                    diarize=True,
-                    language="en-US"
-                )
-                
-                # For Twilio URLs, we need to download the file first since they require auth
+                # Twilio URLs require auth, so download into memory first
                 if "twilio.com" in audio_file_url:
-                    # Download the file using Twilio credentials
-                    import requests
-                    import tempfile
-                    import os
-                    
-                    twilio_sid = current_app.config.get('TWILIO_ACCOUNT_SID')
-                    twilio_token = current_app.config.get('TWILIO_AUTH_TOKEN')
-                    
-                    if twilio_sid and twilio_token:
-                        try:
-                            # Twilio recording URLs need .mp3 appended to get the actual media
-                            media_url = audio_file_url
-                            if not media_url.endswith(('.mp3', '.wav')):
-                                media_url = f"{audio_file_url}.mp3"
-                            
-                            auth = (twilio_sid, twilio_token)
-                            logger.info(f"Downloading recording from: {media_url}")
-                            
-                            # Retry mechanism - recordings might not be immediately available
-                            import time
-                            max_retries = 5
-                            retry_delay = 3  # seconds
-                            
-                            response_download = None
-                            for attempt in range(max_retries):
-                                try:
-                                    response_download = requests.get(media_url, auth=auth, timeout=30)
-                                    response_download.raise_for_status()
-                                    logger.info(f"Successfully downloaded recording on attempt {attempt + 1}")
-                                    break
-                                except requests.exceptions.HTTPError as e:
-                                    if e.response.status_code == 404 and attempt < max_retries - 1:
-                                        logger.info(f"Recording not ready yet (attempt {attempt + 1}/{max_retries}), waiting {retry_delay}s...")
-                                        time.sleep(retry_delay)
-                                        retry_delay *= 1.5  # Exponential backoff
-                                    else:
-                                        raise
-                            
-                            if not response_download:
-                                raise Exception("Failed to download after all retries")
-                            
-                            # Create temporary file
-                            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                                temp_file.write(response_download.content)
-                                temp_path = temp_file.name
-                            
-                            # Transcribe using file
-                            logger.info(f"Starting Deepgram transcription for file: {temp_path}")
-                            with open(temp_path, 'rb') as audio_file:
-                                payload = {"buffer": audio_file.read()}
-                                response = self.deepgram.listen.prerecorded.v("1").transcribe_file(
-                                    payload, options
-                                )
-                                logger.info("Deepgram transcription request completed")
-                            
-                            # Clean up temp file
-                            os.unlink(temp_path)
-                            
-                        except Exception as download_error:
-                            logger.error(f"Failed to download Twilio recording: {download_error}")
-                            return self._get_mock_data()
-                    else:
-                        logger.error("Twilio credentials not configured for recording download")
-                        return self._get_mock_data()
+                    transcript_data = self.transcribe_buffer(self.download_recording(audio_file_url))
                 else:
-                    # Direct URL transcription for non-Twilio URLs
-                    response = self.deepgram.listen.prerecorded.v("1").transcribe_url(
-                        {"url": audio_file_url}, options
-                    )
-                
-                # Process response
-                if response.results and response.results.channels:
-                    transcript_data = []
-                    channel = response.results.channels[0]
-                    
-                    if channel.alternatives:
-                        alternative = channel.alternatives[0]
-                        
-                        # Check if we have paragraphs (diarization) or just transcript
-                        if hasattr(alternative, 'paragraphs') and alternative.paragraphs:
-                            for paragraph in alternative.paragraphs.paragraphs:
-                                for sentence in paragraph.sentences:
-                                    transcript_data.append({
-                                        'text': sentence.text,
-                                        'start': sentence.start,
-                                        'end': sentence.end,
-                                        'speaker': getattr(paragraph, 'speaker', 0),
-                                        'confidence': getattr(sentence, 'confidence', alternative.confidence if hasattr(alternative, 'confidence') else 0.9)
-                                    })
-                        else:
-                            # Fallback to simple transcript without diarization
-                            transcript_data.append({
-                                'text': alternative.transcript,
-                                'start': 0,
-                                'end': 0,
-                                'speaker': 0,
-                                'confidence': getattr(alternative, 'confidence', 0.9)
-                            })
-                    
-                    return transcript_data if transcript_data else self._get_mock_data()
+                    transcript_data = self.transcribe_url(audio_file_url)
+                return transcript_data if transcript_data else self._get_mock_data()
                 
             except Exception as deepgram_error:
                 logger.error(f"Deepgram transcription failed: {deepgram_error}")
@@ -178,6 +87,124 @@ class DeepgramService:
             logger.error(f"Error transcribing file {audio_file_url}: {e}")
             return []
     
+    def download_recording(self, recording_url):
+        """Download a Twilio recording into memory
+        
+        Raises RecordingNotReadyError while Twilio is still processing the
+        recording (404), so callers can retry later instead of sleeping.
+        """
+        twilio_sid = current_app.config.get('TWILIO_ACCOUNT_SID')
+        twilio_token = current_app.config.get('TWILIO_AUTH_TOKEN')
+        if not twilio_sid or not twilio_token:
+            raise DeepgramError("Twilio credentials not configured for recording download")
+        
+        # Twilio recording URLs need .mp3 appended to get the actual media
+        media_url = recording_url
+        if not media_url.endswith(('.mp3', '.wav')):
+            media_url = f"{recording_url}.mp3"
+        
+        logger.info(f"Downloading recording from: {media_url}")
+        response = http_transport.get(media_url, auth=(twilio_sid, twilio_token), timeout=cap_timeout(30))
+        if response.status_code == 404:
+            raise RecordingNotReadyError(recording_url)
+        response.raise_for_status()
+        return response.content
+    
+    def _prerecorded_options(self, multichannel=False):
+        from deepgram import PrerecordedOptions
+        
+        options = dict(
+            model="nova-2",
+            smart_format=True,
+            punctuate=True,
+            language="en-US"
+        )
+        # Stereo call recordings already separate the speakers by channel
+        if multichannel:
+            options['multichannel'] = True
+        else:
+            options['diarize'] = True
+        return PrerecordedOptions(**options)
+    
+    def transcribe_buffer(self, audio_data, multichannel=False):
+        """Transcribe audio bytes held in memory; returns sentences with timing offsets"""
+        if not self.deepgram:
+            raise DeepgramError("Deepgram client not initialized")
+        
+        options = self._prerecorded_options(multichannel)
+        logger.info(f"Starting Deepgram transcription of {len(audio_data)} bytes")
+        response = get_operation('deepgram.transcribe', default_timeout=60, max_timeout=300).call(
+            lambda timeout: self.deepgram.listen.prerecorded.v("1").transcribe_file(
+                {"buffer": audio_data}, options, timeout=timeout
+            )
+        )
+        return self._sentences(response, multichannel)
+    
+    def transcribe_path(self, path, multichannel=False):
+        """Transcribe a local recording, streaming it from disk rather than reading it into memory"""
+        if not self.deepgram:
+            raise DeepgramError("Deepgram client not initialized")
+        
+        options = self._prerecorded_options(multichannel)
+        logger.info(f"Starting Deepgram transcription of {path}")
+        with open(path, 'rb') as f:
+            def send(timeout):
+                # A retried call must send the file from the start again
+                f.seek(0)
+                return self.deepgram.listen.prerecorded.v("1").transcribe_file({"stream": f}, options, timeout=timeout)
+            
+            response = get_operation('deepgram.transcribe', default_timeout=60, max_timeout=300).call(send)
+        return self._sentences(response, multichannel)
+    
+    def transcribe_url(self, audio_file_url):
+        """Transcribe a publicly reachable recording URL"""
+        response = get_operation('deepgram.transcribe', default_timeout=60, max_timeout=300).call(
+            lambda timeout: self.deepgram.listen.prerecorded.v("1").transcribe_url(
+                {"url": audio_file_url}, self._prerecorded_options(), timeout=timeout
+            )
+        )
+        return self._sentences(response)
+    
+    def _sentences(self, response, multichannel=False):
+        """Flatten a prerecorded response into sentences; ``channel`` is set for multichannel audio"""
+        transcript_data = []
+        if not response.results or not response.results.channels:
+            return transcript_data
+        
+        for channel_index, channel in enumerate(response.results.channels):
+            if not channel.alternatives:
+                continue
+            alternative = channel.alternatives[0]
+            default_confidence = getattr(alternative, 'confidence', 0.9)
+            
+            # Check if we have paragraphs (diarization) or just transcript
+            if hasattr(alternative, 'paragraphs') and alternative.paragraphs:
+                for paragraph in alternative.paragraphs.paragraphs:
+                    for sentence in paragraph.sentences:
+                        transcript_data.append({
+                            'text': sentence.text,
+                            'start': sentence.start,
+                            'end': sentence.end,
+                            'speaker': getattr(paragraph, 'speaker', 0),
+                            'channel': channel_index if multichannel else None,
+                            'confidence': getattr(sentence, 'confidence', default_confidence)
+                        })
+            elif alternative.transcript:
+                # Fallback to simple transcript without diarization
+                transcript_data.append({
+                    'text': alternative.transcript,
+                    'start': 0,
+                    'end': 0,
+                    'speaker': 0,
+                    'channel': channel_index if multichannel else None,
+                    'confidence': default_confidence
+                })
+            
+            if not multichannel:
+                break
+        
+        return transcript_data
+    
     def _get_mock_data(self):
         """Return mock transcription data"""
         return [{
@@ -208,9 +235,12 @@ class DeepgramService:
             # Use the correct API method for streaming audio
             logger.info(f"Generating Deepgram TTS with Aura Amalthea for text: {text[:50]}...")
             
-            response = self.deepgram.speak.v("1").stream(
-                {"text": text}, 
-                options
+            response = get_operation('deepgram.tts', default_timeout=10).call(
+                lambda timeout: self.deepgram.speak.v("1").stream(
+                    {"text": text},
+                    options,
+                    timeout=timeout
+                )
             )
             
             # Handle the streaming response
@@ -248,29 +278,116 @@ class DeepgramService:
             logger.error(f"Error in Deepgram text-to-speech: {e}")
             return None
     
+    async def text_to_speech_async(self, text):
+        """Non-blocking text_to_speech for the asyncio media server
+        
+        The Deepgram SDK call runs on the bounded provider executor, so a slow
+        synthesis only occupies a worker thread, not the event loop.
+        """
+        return await run_blocking(self.text_to_speech, text)
+    
+    def iter_text_to_speech(self, text, on_response=None):
+        """Yield a reply as one streamed WAV, sentence by sentence
+        
+        Sentences in the segment cache are sent straight away; only the rest
+        are synthesized, in parallel. ``on_response`` gets each provider
+        response as soon as its headers arrive, so a caller can abort them
+        while audio is still pending.
+        """
+        if not self.api_key:
+            raise RuntimeError("Deepgram API key not configured")
+        return self.segmented_tts.iter_stream(text, on_response=on_response)
+    
+    def _iter_speak(self, text, chunk_size=4096, on_response=None):
+        """Yield WAV audio chunks for one segment as Deepgram produces them
+        
+        Uses the REST speak endpoint directly so chunks are forwarded as they
+        arrive instead of being buffered by the SDK.
+        """
+        if not self.api_key:
+            raise RuntimeError("Deepgram API key not configured")
+        
+        def send(timeout):
+            # Timeout applies to connect and each read, so it bounds time-to-first-chunk
+            response = http_transport.post(
+                "https://api.deepgram.com/v1/speak",
+                params={
+                    "model": "aura-2-amalthea-en",
+                    "encoding": "linear16",
+                    "sample_rate": 8000,
+                    "container": "wav"
+                },
+                headers={
+                    "Authorization": f"Token {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={"text": text},
+                stream=True,
+                timeout=timeout
+            )
+            try:
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+            return response
+        
+        response = get_operation('deepgram.tts_stream', default_timeout=5).call(send)
+        try:
+            if on_response:
+                on_response(response)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+    
+    def text_to_speech_stream_url(self, text):
+        """Start synthesis in the background and immediately return a streaming URL for Twilio to play"""
+        try:
+            from services.audio_store import audio_store
+            
+            if not self.api_key:
+                logger.warning("Deepgram TTS not available - API key not configured")
+                return None
+            
+            audio_id = audio_store.stream_from(lambda: self.iter_text_to_speech(text), 'audio/wav')
+            # None sends the caller to Twilio's voice instead of a stream that might stay silent
+            if not audio_store.wait_started(audio_id, cap_timeout(current_app.config.get('TTS_FIRST_AUDIO_SECONDS', 3))):
+                logger.warning("Deepgram streaming TTS produced no audio in time")
+                return None
+            base_url = current_app.config.get('BASE_URL', 'http://localhost:5001')
+            audio_url = audio_store.stream_url_for(audio_id, base_url)
+            logger.info(f"Deepgram streaming TTS URL: {audio_url}")
+            return audio_url
+            
+        except Exception as e:
+            logger.error(f"Error creating Deepgram streaming TTS URL: {e}")
+            return None
+    
+    def text_to_speech_segmented(self, text):
+        """Synthesize sentences concurrently (with per-sentence caching) and stitch them into one WAV"""
+        if not self.deepgram or not self.api_key:
+            logger.warning("Deepgram TTS not available - client not initialized")
+            return None
+        return self.segmented_tts.synthesize_text(text)
+    
     def text_to_speech_url(self, text):
         """Convert text to speech and return a URL for Twilio to play"""
         try:
-            import uuid
-            from flask import current_app
+            from services.audio_store import audio_store
             
             # Generate audio
-            audio_data = self.text_to_speech(text)
+            audio_data = self.text_to_speech_segmented(text)
             
             if audio_data:
-                # Store audio data in app context instead of file system
-                audio_id = str(uuid.uuid4())
-                
-                # Store in Flask app context for serving
-                if not hasattr(current_app, '_deepgram_audio_cache'):
-                    current_app._deepgram_audio_cache = {}
-                
-                current_app._deepgram_audio_cache[audio_id] = audio_data
+                # Store audio data in memory instead of file system
+                audio_id = audio_store.put(audio_data, 'audio/wav')
                 logger.info(f"Stored Deepgram audio in memory: {audio_id} ({len(audio_data)} bytes)")
                 
                 # Return URL that Twilio can access
                 base_url = current_app.config.get('BASE_URL', 'http://localhost:5001')
-                audio_url = f"{base_url}/api/audio/{audio_id}"
+                audio_url = audio_store.url_for(audio_id, base_url)
                 logger.info(f"Deepgram TTS URL: {audio_url}")
                 return audio_url
             
@@ -2,15 +2,38 @@ import asyncio
 import websockets
 import json
 import logging
+import time
 from flask import current_app
 import base64
+import binascii
+from utils.latency import get_latency_tracker
 
 logger = logging.getLogger(__name__)
 
+_MEDIA_EVENT = '"event":"media"'
+_PAYLOAD_KEY = '"payload":"'
+
+def _media_payload(message):
+    """Pull the base64 payload out of a Twilio media frame without a JSON parse
+    
+    Twilio sends compact JSON, so the markers are stable; anything that doesn't
+    match (non-media events, unexpected formatting) returns None and is parsed normally.
+    """
+    if not isinstance(message, str) or _MEDIA_EVENT not in message:
+        return None
+    start = message.find(_PAYLOAD_KEY)
+    if start < 0:
+        return None
+    start += len(_PAYLOAD_KEY)
+    end = message.find('"', start)
+    return message[start:end] if end > 0 else None
+
 class DeepgramVoiceAgent:
     def __init__(self):
         self.api_key = None
         self.agent_id = None
+        self.relay_mode = True
+        self.batch_ms = 40
         self._initialize_agent()
     
     def _initialize_agent(self):
@@ -18,6 +41,8 @@ class DeepgramVoiceAgent:
             self.api_key = current_app.config.get('DEEPGRAM_API_KEY')
             # For voice agents, you'd typically have an agent ID configured
             self.agent_id = current_app.config.get('DEEPGRAM_AGENT_ID', 'default-agent')
+            self.relay_mode = current_app.config.get('DEEPGRAM_AGENT_RELAY', True)
+            self.batch_ms = current_app.config.get('DEEPGRAM_AGENT_BATCH_MS', 40)
             
             if not self.api_key:
                 logger.warning("Deepgram API key not configured for voice agent")
@@ -56,6 +81,10 @@ class DeepgramVoiceAgent:
                 }
                 await deepgram_ws.send(json.dumps(config))
                 
+                if self.relay_mode:
+                    await self._relay(websocket, deepgram_ws, call_sid)
+                    return
+                
                 # Handle bidirectional streaming
                 async def twilio_to_deepgram():
                     try:
@@ -101,6 +130,105 @@ class DeepgramVoiceAgent:
         except Exception as e:
             logger.error(f"Error in Deepgram Voice Agent for call {call_sid}: {e}")
     
+    async def _relay(self, websocket, deepgram_ws, call_sid):
+        """Relay audio between Twilio and the agent without re-encoding JSON per frame
+        
+        Caller audio is cut out of Twilio's frames by string search, decoded and
+        sent upstream as binary frames, batched up to ``batch_ms`` of audio.
+        Binary agent audio is base64-encoded into a pre-built Twilio frame
+        template. Only control messages are JSON-parsed. Latency from arrival
+        to send is tracked per direction.
+        """
+        loop = asyncio.get_running_loop()
+        to_agent = get_latency_tracker('relay.twilio_to_agent')
+        to_twilio = get_latency_tracker('relay.agent_to_twilio')
+        
+        # mu-law at 8kHz is 8 bytes per ms
+        batch_bytes = max(160, self.batch_ms * 8)
+        batch_delay = self.batch_ms / 1000.0
+        batch = bytearray()
+        state = {'started': None, 'timer': None, 'flush_task': None, 'stream_sid': call_sid}
+        send_lock = asyncio.Lock()
+        
+        async def flush():
+            async with send_lock:
+                if state['timer']:
+                    state['timer'].cancel()
+                    state['timer'] = None
+                if not batch:
+                    return
+                chunk, started = bytes(batch), state['started']
+                batch.clear()
+                state['started'] = None
+                await deepgram_ws.send(chunk)
+                to_agent.record(time.monotonic() - started)
+        
+        def flushed(task):
+            if state['flush_task'] is task:
+                state['flush_task'] = None
+            if not task.cancelled() and task.exception():
+                logger.error(f"Error flushing caller audio to Deepgram for call {call_sid}: {task.exception()}")
+        
+        def flush_later():
+            state['timer'] = None
+            # Kept so the task isn't collected mid-send and its failure is reported
+            state['flush_task'] = asyncio.ensure_future(flush())
+            state['flush_task'].add_done_callback(flushed)
+        
+        async def twilio_to_deepgram():
+            try:
+                async for message in websocket:
+                    payload = _media_payload(message)
+                    if payload is None:
+                        data = json.loads(message)
+                        if data.get('event') == 'start':
+                            # Outbound media must carry the stream's own sid
+                            state['stream_sid'] = data.get('streamSid') or data.get('start', {}).get('streamSid') or call_sid
+                        elif data.get('event') == 'stop':
+                            break
+                        continue
+                    
+                    if state['started'] is None:
+                        state['started'] = time.monotonic()
+                        state['timer'] = loop.call_later(batch_delay, flush_later)
+                    batch.extend(binascii.a2b_base64(payload))
+                    if len(batch) >= batch_bytes:
+                        await flush()
+                await flush()
+                if state['flush_task']:
+                    # Let a timed flush finish before the agent socket closes; flushed() reports its errors
+                    await asyncio.wait([state['flush_task']])
+            except Exception as e:
+                logger.error(f"Error relaying Twilio to Deepgram: {e}")
+            finally:
+                # Caller hung up - end the agent side too so the other direction finishes
+                await deepgram_ws.close()
+        
+        async def deepgram_to_twilio():
+            try:
+                async for message in deepgram_ws:
+                    received = time.monotonic()
+                    if isinstance(message, (bytes, bytearray)):
+                        payload = binascii.b2a_base64(message, newline=False).decode('ascii')
+                    else:
+                        data = json.loads(message)
+                        if data.get('type') == 'Transcript':
+                            logger.info(f"Agent transcript: {data.get('text', '')}")
+                        if data.get('type') != 'Audio':
+                            continue
+                        payload = data['audio']
+                    
+                    await websocket.send(
+                        '{"event":"media","streamSid":"' + state['stream_sid'] + '","media":{"payload":"' + payload + '"}}'
+                    )
+                    to_twilio.record(time.monotonic() - received)
+            except Exception as e:
+                logger.error(f"Error relaying Deepgram to Twilio: {e}")
+        
+        await asyncio.gather(twilio_to_deepgram(), deepgram_to_twilio())
+        logger.info(f"Relay for call {call_sid} finished - process relay latency: "
+                    f"up {to_agent.snapshot()}, down {to_twilio.snapshot()}")
+    
     def get_agent_greeting(self):
         """Get a dynamic greeting message"""
         return "Hey damian! Is there anything I can do help you? Cheeks maybe?"
\ No newline at end of file
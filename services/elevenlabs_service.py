@@ -1,6 +1,8 @@
-import requests
 import logging
 from flask import current_app
+from services.tts_segmenter import SegmentedSynthesizer
+from utils.http_transport import http_transport
+from utils.resilience import get_operation
 import io
 
 logger = logging.getLogger(__name__)
@@ -11,6 +13,7 @@ class ElevenLabsService:
         self.voice_id = None
         self.base_url = "https://api.elevenlabs.io/v1"
         self._initialize_client()
+        self._segmented_tts = {}
     
     def _initialize_client(self):
         try:
@@ -20,6 +23,18 @@ class ElevenLabsService:
             logger.error(f"Failed to initialize ElevenLabs client: {e}")
             raise
     
+    def _request(self, operation, method, url, **kwargs):
+        """Issue a request under the operation's circuit breaker and adaptive timeout"""
+        def send(timeout):
+            response = http_transport.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code >= 500 or response.status_code == 429:
+                # Count provider-side errors against the breaker
+                response.close()
+                raise RuntimeError(f"ElevenLabs {operation} error: {response.status_code}")
+            return response
+        
+        return get_operation(f"elevenlabs.{operation}", default_timeout=10).call(send)
+    
     def text_to_speech(self, text, voice_id=None):
         """Convert text to speech using ElevenLabs API"""
         try:
@@ -45,7 +60,7 @@ class ElevenLabsService:
                 }
             }
             
-            response = requests.post(url, json=data, headers=headers)
+            response = self._request('tts', 'POST', url, json=data, headers=headers)
             
             if response.status_code == 200:
                 return response.content
@@ -60,44 +75,82 @@ class ElevenLabsService:
     def text_to_speech_stream(self, text, voice_id=None):
         """Convert text to speech with streaming for faster response"""
         try:
-            if not voice_id:
-                voice_id = self.voice_id
-            
-            url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
-            
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.api_key
-            }
-            
-            data = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5,
-                    "style": 0.0,
-                    "use_speaker_boost": True
-                }
+            return b''.join(self._iter_speech(text, voice_id))
+        except Exception as e:
+            logger.error(f"Error in streaming text to speech: {e}")
+            return None
+    
+    def iter_text_to_speech_stream(self, text, voice_id=None, on_response=None):
+        """Yield a reply as one MP3 stream, sentence by sentence; cached sentences go out at once
+        
+        ``on_response`` gets each provider response once its headers arrive.
+        """
+        return self._get_segmented_tts(voice_id).iter_stream(text, on_response=on_response)
+    
+    def _iter_speech(self, text, voice_id=None, chunk_size=1024, on_response=None):
+        """Yield MP3 audio chunks for one segment as ElevenLabs produces them"""
+        if not voice_id:
+            voice_id = self.voice_id
+        
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key
+        }
+        
+        data = {
+            "text": text,
+            "model_id": "eleven_monolingual_v1",
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.5,
+                "style": 0.0,
+                "use_speaker_boost": True
             }
+        }
+        
+        # Timeout applies to connect and each read, so it bounds time-to-first-chunk
+        response = self._request('tts_stream', 'POST', url, json=data, headers=headers, stream=True)
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"ElevenLabs streaming API error: {response.status_code} - {response.text}")
+            if on_response:
+                on_response(response)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+    
+    def text_to_speech_stream_url(self, text, voice_id=None):
+        """Start synthesis in the background and immediately return a streaming URL for Twilio to play"""
+        try:
+            from services.audio_store import audio_store
             
-            response = requests.post(url, json=data, headers=headers, stream=True)
+            audio_id = audio_store.stream_from(lambda: self.iter_text_to_speech_stream(text, voice_id), 'audio/mpeg')
+            base_url = current_app.config.get('BASE_URL', 'http://localhost:5001')
+            return audio_store.stream_url_for(audio_id, base_url)
             
-            if response.status_code == 200:
-                audio_chunks = []
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        audio_chunks.append(chunk)
-                return b''.join(audio_chunks)
-            else:
-                logger.error(f"ElevenLabs streaming API error: {response.status_code} - {response.text}")
-                return None
-                
         except Exception as e:
-            logger.error(f"Error in streaming text to speech: {e}")
+            logger.error(f"Error creating streaming audio URL: {e}")
             return None
     
+    def text_to_speech_segmented(self, text, voice_id=None):
+        """Synthesize sentences concurrently (with per-sentence caching) and stitch them into one MP3"""
+        return self._get_segmented_tts(voice_id).synthesize_text(text)
+    
+    def _get_segmented_tts(self, voice_id=None):
+        voice_id = voice_id or self.voice_id
+        if voice_id not in self._segmented_tts:
+            self._segmented_tts[voice_id] = SegmentedSynthesizer(
+                lambda segment, on_response=None: b''.join(self._iter_speech(segment, voice_id, on_response=on_response)),
+                f"elevenlabs:{voice_id}",
+                audio_format='mp3'
+            )
+        return self._segmented_tts[voice_id]
+    
     def get_voices(self):
         """Get available voices from ElevenLabs"""
         try:
@@ -108,7 +161,7 @@ class ElevenLabsService:
                 "xi-api-key": self.api_key
             }
             
-            response = requests.get(url, headers=headers)
+            response = self._request('voices', 'GET', url, headers=headers)
             
             if response.status_code == 200:
                 return response.json()
@@ -156,7 +209,7 @@ class ElevenLabsService:
             from flask import url_for
             
             # Generate audio
-            audio_data = self.text_to_speech_stream(text, voice_id)
+            audio_data = self.text_to_speech_segmented(text, voice_id)
             
             if audio_data:
                 # Create unique filename
@@ -0,0 +1,141 @@
+import itertools
+import logging
+import os
+import re
+import threading
+from services.audio_store import audio_store
+from services.call_recorder import wav_to_mulaw
+
+logger = logging.getLogger(__name__)
+
+FILLER_PHRASES = [
+    "Sure, one moment.",
+    "Let me check that.",
+    "Okay, just a second.",
+    "Got it, give me a moment."
+]
+
+class FillerAudioBank:
+    """Short pre-rendered acknowledgement clips used to mask reply latency
+
+    Clips are loaded from ``static/fillers`` when present (see
+    generate_fillers.py), otherwise synthesized once and written there so the
+    next boot skips the TTS round trip. Clips already on disk are served
+    while missing ones render, and files are replaced atomically, so web
+    processes booting together never read a half-written clip. Loaded clips
+    are pinned in the audio store and served from /api/audio/<id> like any
+    other clip; each also keeps a raw mu-law copy for Twilio media streams,
+    which take no WAV container or linear PCM.
+    """
+
+    def __init__(self, phrases=None, static_dir=None, store=None):
+        self.phrases = phrases or FILLER_PHRASES
+        self.static_dir = static_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'fillers')
+        self.store = store or audio_store
+        self._clips = []
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return bool(self._clips)
+
+    def load(self, synthesize):
+        """Load or render every filler phrase; synthesize(text) must return WAV bytes"""
+        clips, missing = [], []
+        os.makedirs(self.static_dir, exist_ok=True)
+
+        for phrase in self.phrases:
+            try:
+                audio_data = self._read(phrase)
+                if audio_data is None:
+                    missing.append(phrase)
+                else:
+                    clips.append(self._pin(phrase, audio_data))
+            except Exception as e:
+                logger.error(f"Error loading filler clip '{phrase}': {e}")
+
+        if missing and clips:
+            # Serve what's on disk while the rest render
+            self._publish(list(clips))
+
+        for phrase in missing:
+            try:
+                # Another process may have rendered it meanwhile
+                audio_data = self._read(phrase)
+                if audio_data is None:
+                    audio_data = synthesize(phrase)
+                    if not audio_data:
+                        logger.warning(f"Could not render filler clip: {phrase}")
+                        continue
+                    self._write(phrase, audio_data)
+                clips.append(self._pin(phrase, audio_data))
+            except Exception as e:
+                logger.error(f"Error loading filler clip '{phrase}': {e}")
+
+        self._publish(clips)
+        logger.info(f"Filler audio bank loaded {len(clips)}/{len(self.phrases)} clips")
+        return len(clips)
+
+    def _path(self, phrase):
+        return os.path.join(self.static_dir, f"{self._slugify(phrase)}.wav")
+
+    def _read(self, phrase):
+        try:
+            with open(self._path(phrase), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, phrase, audio_data):
+        path = self._path(phrase)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(audio_data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # The clip still works from memory; the next boot renders it again
+            logger.warning(f"Could not save filler clip to {path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _pin(self, phrase, audio_data):
+        audio_id = self.store.put(audio_data, 'audio/wav', audio_id=f"filler-{self._slugify(phrase)}", pinned=True)
+        try:
+            mulaw = wav_to_mulaw(audio_data)
+        except ValueError as e:
+            # Still playable over <Play>, just not on a media stream
+            logger.warning(f"Filler clip '{phrase}' cannot be streamed: {e}")
+            mulaw = None
+        return audio_id, audio_data, mulaw
+
+    def _publish(self, clips):
+        with self._lock:
+            self._clips = clips
+            self._cycle = itertools.cycle(clips) if clips else None
+
+    def next_clip(self):
+        """Return the next (audio_id, wav_data, mulaw_data) in rotation, or None if nothing is loaded
+
+        mulaw_data is None for clips that are not 8kHz mono PCM16.
+        """
+        with self._lock:
+            if not self._cycle:
+                return None
+            return next(self._cycle)
+
+    def next_url(self, base_url):
+        clip = self.next_clip()
+        if not clip:
+            return None
+        return self.store.url_for(clip[0], base_url)
+
+    @staticmethod
+    def _slugify(text):
+        return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+# Process-wide filler bank, loaded at app startup
+filler_bank = FillerAudioBank()
@@ -0,0 +1,426 @@
+import atexit
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import aliased
+
+logger = logging.getLogger(__name__)
+
+# How often a worker fails jobs whose last attempt died and purges old finished jobs
+REAP_INTERVAL = 60
+
+# Host-local jobs are stored as "<type>@<host>", so only workers on that host see them
+HOST = socket.gethostname()
+
+class JobType:
+    """Handler and limits for one kind of job"""
+
+    __slots__ = ('name', 'handler', 'concurrency', 'max_attempts', 'visibility_timeout',
+                 'retry_delay', 'backoff', 'max_retry_delay', 'priority', 'host_local')
+
+    def __init__(self, name, handler, concurrency=2, max_attempts=5, visibility_timeout=300,
+                 retry_delay=5.0, backoff=2.0, max_retry_delay=600, priority=0, host_local=False):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.backoff = backoff
+        self.max_retry_delay = max_retry_delay
+        self.priority = priority
+        self.host_local = host_local
+
+    @property
+    def stored_name(self):
+        """The job_type column value: host-local jobs only run where they were enqueued"""
+        return f"{self.name}@{HOST}" if self.host_local else self.name
+
+    def retry_after(self, attempts):
+        """Seconds to wait before the next attempt, with jitter so retries don't arrive together"""
+        delay = min(self.retry_delay * self.backoff ** (attempts - 1), self.max_retry_delay)
+        return delay * random.uniform(0.8, 1.2)
+
+class ClaimedJob:
+    """A job this worker holds the lock on; ``token`` proves it when reporting the outcome"""
+
+    __slots__ = ('id', 'job_type', 'payload', 'attempts', 'max_attempts', 'token')
+
+    def __init__(self, id, job_type, payload, attempts, max_attempts, token):
+        self.id = id
+        self.job_type = job_type
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.token = token
+
+class JobQueue:
+    """Durable background jobs stored in the app database
+
+    Jobs are rows in the ``job`` table, so they survive restarts and any
+    process sharing the database can run them - no broker needed. Delivery
+    is at least once: a worker claims a job with a conditional UPDATE, so
+    two workers never hold the same attempt, but a worker that dies
+    mid-job leaves it locked only until its type's ``visibility_timeout``,
+    after which another worker runs it again. Handlers must therefore be
+    idempotent.
+
+    Due jobs run highest ``priority`` first. A failed attempt is retried
+    with exponential backoff up to ``max_attempts``, then the job is left
+    as ``failed`` with its last error. Each type's ``concurrency`` is
+    counted across all workers at claim time. A ``host_local`` type, for
+    work on files only this machine has, is claimed only by workers on the
+    host that enqueued it, so that host must run one (the web process's
+    in-process worker does by default).
+    """
+
+    def __init__(self, retention_hours=72):
+        self.retention_hours = retention_hours
+        self.app = None
+        self.worker = None
+        self._types = {}
+        self._reapers = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.stats = {'enqueued': 0, 'deduplicated': 0, 'reaped': 0, 'purged': 0}
+
+    def register(self, job_type, handler, **options):
+        """Register the handler for job_type; the first registration wins"""
+        with self._lock:
+            if job_type not in self._types:
+                self._types[job_type] = JobType(job_type, handler, **options)
+
+    def handler(self, job_type, **options):
+        """Decorator form of register: the function is called with the job's payload in an app context"""
+        def decorator(func):
+            self.register(job_type, func, **options)
+            return func
+        return decorator
+
+    def on_reap(self, func):
+        """Decorator: also call func() on every reap, in the worker's app context, for housekeeping outside the job table"""
+        self._reapers.append(func)
+        return func
+
+    def job_type(self, name):
+        return self._types.get(name)
+
+    def init_app(self, app, worker=None):
+        """Bind to app; also start an in-process worker if worker is True, or per JOB_WORKER_IN_PROCESS when None"""
+        self.app = app
+        self.retention_hours = app.config.get('JOB_RETENTION_HOURS', self.retention_hours)
+        if worker is None:
+            worker = app.config.get('JOB_WORKER_IN_PROCESS', False)
+        if worker and self.worker is None:
+            self.worker = JobWorker(
+                self,
+                app,
+                threads=app.config.get('JOB_WORKER_THREADS', 4),
+                poll_interval=app.config.get('JOB_POLL_SECONDS', 1.0)
+            )
+            self.worker.start()
+            atexit.register(self.worker.stop)
+
+    def enqueue(self, job_type, payload=None, priority=None, delay=0, dedupe_key=None):
+        """Store a job and return its id; needs an app context
+
+        The job is committed on its own connection, so enqueue after committing
+        any rows it refers to. With ``dedupe_key``, an unfinished job with the
+        same key is reused and its id returned instead.
+        """
+        from models import db, Job
+
+        spec = self._types.get(job_type)
+        if spec is None:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            if dedupe_key:
+                existing = connection.execute(
+                    select(Job.id).where(Job.dedupe_key == dedupe_key, Job.status.in_(('queued', 'running'))).limit(1)
+                ).scalar()
+                if existing:
+                    self.stats['deduplicated'] += 1
+                    return existing
+            result = connection.execute(insert(Job).values(
+                job_type=spec.stored_name,
+                payload=json.dumps(payload or {}),
+                priority=spec.priority if priority is None else priority,
+                status='queued',
+                attempts=0,
+                max_attempts=spec.max_attempts,
+                run_at=now + timedelta(seconds=delay),
+                dedupe_key=dedupe_key,
+                created_at=now
+            ))
+            job_id = result.inserted_primary_key[0]
+
+        self.stats['enqueued'] += 1
+        if not delay:
+            # A worker in this process picks it up without waiting for its next poll
+            self._wake.set()
+        return job_id
+
+    def pending(self, dedupe_key):
+        """Whether a queued or running job has dedupe_key; needs an app context"""
+        from models import db, Job
+
+        return db.session.execute(
+            select(Job.id).where(Job.dedupe_key == dedupe_key, Job.status.in_(('queued', 'running'))).limit(1)
+        ).scalar() is not None
+
+    def claim(self, worker_id, capacity, running=None):
+        """Lock up to capacity due jobs for worker_id, highest priority first
+
+        ``running`` maps job type to jobs this worker already has in flight, so
+        a type at its concurrency limit is skipped without asking the database.
+        """
+        from models import db, Job
+
+        running = dict(running or {})
+        types = {spec.stored_name: spec for name, spec in self._types.items() if running.get(name, 0) < spec.concurrency}
+        if capacity <= 0 or not types:
+            return []
+
+        now = datetime.utcnow()
+        claimable = or_(Job.status == 'queued', and_(Job.status == 'running', Job.locked_until < now))
+        with db.engine.begin() as connection:
+            candidates = connection.execute(
+                select(Job.id, Job.job_type)
+                .where(claimable, Job.run_at <= now, Job.attempts < Job.max_attempts, Job.job_type.in_(list(types)))
+                .order_by(Job.priority.desc(), Job.run_at, Job.id)
+                .limit(capacity * 4)
+            ).all()
+
+        claimed = []
+        for job_id, stored_name in candidates:
+            if len(claimed) >= capacity:
+                break
+            spec = types[stored_name]
+            job_type = spec.name
+            if running.get(job_type, 0) >= spec.concurrency:
+                continue
+
+            # The concurrency check rides in the same UPDATE, so it holds across workers
+            other = aliased(Job)
+            in_flight = select(func.count()).select_from(other).where(
+                other.job_type == stored_name, other.status == 'running', other.locked_until >= now
+            ).scalar_subquery()
+            token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+            with db.engine.begin() as connection:
+                result = connection.execute(
+                    update(Job)
+                    .where(Job.id == job_id, claimable, Job.attempts < Job.max_attempts, in_flight < spec.concurrency)
+                    .values(
+                        status='running',
+                        attempts=Job.attempts + 1,
+                        locked_by=token,
+                        locked_until=now + timedelta(seconds=spec.visibility_timeout)
+                    )
+                )
+                if result.rowcount != 1:
+                    # Another worker got there first, or the type filled up meanwhile
+                    continue
+                row = connection.execute(
+                    select(Job.payload, Job.attempts, Job.max_attempts).where(Job.id == job_id)
+                ).one()
+
+            claimed.append(ClaimedJob(job_id, job_type, json.loads(row.payload or '{}'), row.attempts, row.max_attempts, token))
+            running[job_type] = running.get(job_type, 0) + 1
+        return claimed
+
+    def complete(self, job):
+        from models import db, Job
+
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                update(Job).where(Job.id == job.id, Job.locked_by == job.token).values(
+                    status='done', locked_until=None, last_error=None, finished_at=datetime.utcnow()
+                )
+            )
+        if result.rowcount != 1:
+            logger.warning(f"Job {job.id} ({job.job_type}) finished after its lock expired; it may run again")
+
+    def fail(self, job, error):
+        """Record a failed attempt; returns True if the job will be retried"""
+        from models import db, Job
+
+        now = datetime.utcnow()
+        retry = job.attempts < job.max_attempts
+        values = {'locked_until': None, 'last_error': f"{type(error).__name__}: {error}"[:2000]}
+        if retry:
+            delay = self._types[job.job_type].retry_after(job.attempts)
+            values.update(status='queued', run_at=now + timedelta(seconds=delay))
+        else:
+            values.update(status='failed', finished_at=now)
+
+        with db.engine.begin() as connection:
+            connection.execute(update(Job).where(Job.id == job.id, Job.locked_by == job.token).values(**values))
+
+        if retry:
+            logger.info(f"Job {job.id} ({job.job_type}) attempt {job.attempts}/{job.max_attempts} failed, "
+                        f"retrying in {delay:.1f}s: {error}")
+        else:
+            logger.error(f"Job {job.id} ({job.job_type}) failed after {job.attempts} attempts: {error}")
+        return retry
+
+    def reap(self):
+        """Fail jobs whose final attempt never reported back, purge old finished jobs, and run the on_reap hooks"""
+        from models import db, Job
+
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            reaped = connection.execute(
+                update(Job)
+                .where(Job.status == 'running', Job.locked_until < now, Job.attempts >= Job.max_attempts)
+                .values(status='failed', locked_until=None, finished_at=now,
+                        last_error='Worker stopped responding on the final attempt')
+            ).rowcount
+            purged = connection.execute(
+                delete(Job).where(Job.status.in_(('done', 'failed')),
+                                  Job.finished_at < now - timedelta(hours=self.retention_hours))
+            ).rowcount
+        self.stats['reaped'] += reaped
+        self.stats['purged'] += purged
+        if reaped:
+            logger.warning(f"Failed {reaped} jobs abandoned by dead workers")
+
+        for reaper in list(self._reapers):
+            try:
+                reaper()
+            except Exception as e:
+                logger.error(f"Reap hook {reaper.__name__} failed: {e}")
+
+    def snapshot(self):
+        """Queue depth per type and status, for the system status endpoint; needs an app context"""
+        from models import db, Job
+
+        counts = {}
+        rows = db.session.execute(
+            select(Job.job_type, Job.status, func.count(), func.min(Job.run_at)).group_by(Job.job_type, Job.status)
+        ).all()
+        now = datetime.utcnow()
+        for job_type, status, count, oldest in rows:
+            entry = counts.setdefault(job_type, {})
+            entry[status] = count
+            if status == 'queued' and oldest:
+                entry['oldest_due_seconds'] = max(0, round((now - oldest).total_seconds(), 1))
+        return {
+            'types': counts,
+            'stats': dict(self.stats),
+            'worker': self.worker.snapshot() if self.worker else None
+        }
+
+class JobWorker:
+    """Claims jobs from a JobQueue and runs them on a thread pool
+
+    One dispatcher thread claims as many due jobs as there are free threads,
+    then sleeps until a job finishes, a job is enqueued in this process, or
+    ``poll_interval`` passes. ``stop`` lets running jobs finish.
+    """
+
+    def __init__(self, queue, app, threads=4, poll_interval=1.0, worker_id=None):
+        self.queue = queue
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = None
+        self._thread = None
+        self._running = {}  # job_type -> jobs in flight here
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.stats = {'claimed': 0, 'completed': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job-worker')
+        self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Job worker {self.worker_id} started with {self.threads} threads")
+
+    def _dispatch(self):
+        last_reap = 0
+        while not self._stopping.is_set():
+            claimed = []
+            try:
+                with self.app.app_context():
+                    if time.monotonic() - last_reap >= REAP_INTERVAL:
+                        last_reap = time.monotonic()
+                        self.queue.reap()
+                    with self._lock:
+                        capacity = self.threads - self._in_flight
+                        running = dict(self._running)
+                    if capacity > 0:
+                        claimed = self.queue.claim(self.worker_id, capacity, running)
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} could not claim jobs: {e}")
+
+            for job in claimed:
+                with self._lock:
+                    self._in_flight += 1
+                    self._running[job.job_type] = self._running.get(job.job_type, 0) + 1
+                    self.stats['claimed'] += 1
+                self._executor.submit(self._run, job)
+
+            if not claimed:
+                self.queue._wake.wait(self.poll_interval)
+                self.queue._wake.clear()
+
+    def _run(self, job):
+        spec = self.queue.job_type(job.job_type)
+        try:
+            with self.app.app_context():
+                try:
+                    if spec is None:
+                        raise ValueError(f"No handler registered for {job.job_type}")
+                    spec.handler(job.payload)
+                except Exception as e:
+                    outcome = 'retried' if self.queue.fail(job, e) else 'failed'
+                else:
+                    self.queue.complete(job)
+                    outcome = 'completed'
+        except Exception as e:
+            # Couldn't record the outcome; the lock expires and the job runs again
+            logger.error(f"Job {job.id} ({job.job_type}) outcome not recorded: {e}")
+            outcome = 'failed'
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._running[job.job_type] -= 1
+            self.queue._wake.set()
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def stop(self, timeout=30):
+        """Stop claiming and wait up to timeout seconds for running jobs"""
+        if self._thread is None or self._stopping.is_set():
+            return
+        self._stopping.set()
+        self.queue._wake.set()
+        self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if self._in_flight:
+            logger.warning(f"Job worker {self.worker_id} stopped with {self._in_flight} jobs still running")
+        self._executor.shutdown(wait=False)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, worker_id=self.worker_id, threads=self.threads,
+                        in_flight=self._in_flight, running={k: v for k, v in self._running.items() if v})
+
+# Shared per-process queue; handlers register on import, create_app and worker.py call init_app
+job_queue = JobQueue()
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Call statuses shown as live on the dashboard
+LIVE_STATUSES = ('ringing', 'in-progress')
+
+def _call_fields(call):
+    """The fields a live dashboard shows for a call; no relationship loads"""
+    return {
+        'id': call.id,
+        'call_sid': call.call_sid,
+        'from_number': call.from_number,
+        'to_number': call.to_number,
+        'status': call.status,
+        'start_time': call.start_time.isoformat() if call.start_time else None,
+        'call_type': call.call_type
+    }
+
+def _jsonable(fields):
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in fields.items()}
+
+class _Client:
+    """One connected dashboard: what it watches and the delta waiting for it"""
+
+    __slots__ = ('sid', 'interval', 'calls', 'watching', 'pending', 'pending_lines', 'last_sent', 'seq')
+
+    def __init__(self, sid, interval):
+        self.sid = sid
+        self.interval = interval
+        self.calls = False  # subscribed to call lifecycle across all calls
+        self.watching = set()  # call sids whose transcripts it follows
+        self.pending = None
+        self.pending_lines = 0
+        self.last_sent = 0.0
+        self.seq = 0
+
+    def wants(self, call_sid, lines=False):
+        return call_sid in self.watching or (self.calls and not lines)
+
+    def batch(self):
+        if self.pending is None:
+            self.pending = {'calls': {}, 'ended': [], 'transcripts': {}, 'interactions': {}}
+        return self.pending
+
+class LiveEventHub:
+    """Pushes live call activity to dashboard clients over the app's SocketIO
+
+    Webhooks and media streams publish call lifecycle changes, transcript
+    lines and interactions as they happen. Nothing is sent per event: each
+    client has its own pending delta, where call field updates are merged
+    per call and lines are appended. A background task sends it at most
+    every ``interval`` seconds for that client, which the client can raise
+    when it subscribes. A client that falls more than ``max_pending`` lines
+    behind gets ``resync`` instead and re-subscribes for a fresh snapshot.
+
+    Clients subscribe with ``subscribe`` to ``{'calls': true}`` for the live
+    call list, or to ``{'call_sid': ...}`` for one call's transcript. Either
+    one answers with a ``live_snapshot``, and then ``live`` deltas follow.
+    Publishing is thread-safe and does nothing until ``init_app`` runs, so
+    processes without a SocketIO server can call it freely.
+    """
+
+    def __init__(self, interval=0.5, min_interval=0.25, max_pending=200):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+        self.socketio = None
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._task = None
+        self.stats = {'events': 0, 'batches': 0, 'coalesced': 0, 'resyncs': 0, 'snapshots': 0}
+
+    def init_app(self, app, socketio):
+        from flask import request
+        from utils.auth import check_auth
+
+        self.socketio = socketio
+        self.interval = app.config.get('LIVE_EVENTS_INTERVAL', self.interval)
+        self.min_interval = min(app.config.get('LIVE_EVENTS_MIN_INTERVAL', self.min_interval), self.interval)
+
+        @socketio.on('connect')
+        def on_connect(auth=None):
+            # Browsers can't set headers on a WebSocket, so credentials may come in the auth payload
+            credentials = request.authorization
+            username = (auth or {}).get('username') or (credentials.username if credentials else None)
+            password = (auth or {}).get('password') or (credentials.password if credentials else None)
+            if not check_auth(username, password):
+                return False
+            with self._lock:
+                self._clients[request.sid] = _Client(request.sid, self.interval)
+            self._ensure_task()
+
+        @socketio.on('disconnect')
+        def on_disconnect(*args):
+            with self._lock:
+                self._clients.pop(request.sid, None)
+
+        @socketio.on('subscribe')
+        def on_subscribe(data):
+            return self._subscribe(request.sid, data or {})
+
+        @socketio.on('unsubscribe')
+        def on_unsubscribe(data):
+            data = data or {}
+            with self._lock:
+                client = self._clients.get(request.sid)
+                if client:
+                    if data.get('calls'):
+                        client.calls = False
+                    client.watching.discard(data.get('call_sid'))
+
+    def _ensure_task(self):
+        with self._lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def _subscribe(self, sid, data):
+        """Register interest for a connected client and send it a snapshot to apply deltas to"""
+        from models import Call, Transcript, Interaction
+
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                return {'error': 'not connected'}
+            if data.get('interval') is not None:
+                client.interval = min(max(float(data['interval']), self.min_interval), 10.0)
+            if data.get('calls'):
+                client.calls = True
+            call_sid = data.get('call_sid')
+            if call_sid:
+                client.watching.add(call_sid)
+            # Queued deltas stay: lines still in the write-behind buffer aren't in the snapshot yet.
+            # A pending resync is answered by the snapshot itself.
+            if client.pending_lines < 0:
+                client.pending = None
+                client.pending_lines = 0
+
+        snapshot = {'seq': client.seq}
+        if data.get('calls'):
+            live = Call.query.filter(Call.status.in_(LIVE_STATUSES)).order_by(Call.start_time.desc()).all()
+            snapshot['calls'] = [_call_fields(call) for call in live]
+        if call_sid:
+            call = Call.query.filter_by(call_sid=call_sid).first()
+            snapshot['call'] = _call_fields(call) if call else None
+            if call:
+                transcripts = Transcript.query.filter_by(call_id=call.id).order_by(Transcript.timestamp).all()
+                interactions = Interaction.query.filter_by(call_id=call.id).order_by(Interaction.timestamp).all()
+                snapshot['transcripts'] = [
+                    {'speaker': t.speaker, 'text': t.text, 'timestamp': t.timestamp.isoformat()} for t in transcripts
+                ]
+                snapshot['interactions'] = [
+                    {'intent': i.intent, 'user_input': i.user_input, 'ai_response': i.ai_response,
+                     'timestamp': i.timestamp.isoformat()} for i in interactions
+                ]
+        self.stats['snapshots'] += 1
+        self.socketio.emit('live_snapshot', snapshot, to=sid)
+        return {'ok': True, 'interval': client.interval}
+
+    # Publishing
+
+    def call_started(self, call):
+        self._publish_call(call.call_sid, _call_fields(call))
+
+    def call_updated(self, call_sid, **fields):
+        self._publish_call(call_sid, _jsonable(fields))
+
+    def call_ended(self, call_sid, **fields):
+        self._publish_call(call_sid, _jsonable(fields), ended=True)
+
+    def transcript(self, call_sid, speaker, text, timestamp=None):
+        line = {'speaker': speaker, 'text': text, 'timestamp': (timestamp or datetime.utcnow()).isoformat()}
+        self._publish_line(call_sid, 'transcripts', line)
+
+    def interaction(self, call_sid, intent, user_input, ai_response, timestamp=None):
+        line = {'intent': intent, 'user_input': user_input, 'ai_response': ai_response,
+                'timestamp': (timestamp or datetime.utcnow()).isoformat()}
+        self._publish_line(call_sid, 'interactions', line)
+
+    def _publish_call(self, call_sid, fields, ended=False):
+        if self.socketio is None or not call_sid:
+            return
+        with self._lock:
+            self.stats['events'] += 1
+            for client in self._clients.values():
+                # A client waiting on a resync gets the current state from its next snapshot
+                if not client.wants(call_sid) or client.pending_lines < 0:
+                    continue
+                batch = client.batch()
+                if call_sid in batch['calls']:
+                    self.stats['coalesced'] += 1
+                batch['calls'].setdefault(call_sid, {}).update(fields)
+                if ended and call_sid not in batch['ended']:
+                    batch['ended'].append(call_sid)
+
+    def _publish_line(self, call_sid, kind, line):
+        if self.socketio is None or not call_sid:
+            return
+        with self._lock:
+            self.stats['events'] += 1
+            for client in self._clients.values():
+                if not client.wants(call_sid, lines=True) or client.pending_lines < 0:
+                    continue
+                if client.pending_lines >= self.max_pending:
+                    # Too far behind to catch up by deltas: drop them and ask for a resync
+                    client.pending = {'resync': True}
+                    client.pending_lines = -1
+                    self.stats['resyncs'] += 1
+                    continue
+                client.batch()[kind].setdefault(call_sid, []).append(line)
+                client.pending_lines += 1
+
+    # Delivery
+
+    def _due(self, now):
+        """Take the pending deltas of clients whose interval has passed"""
+        due = []
+        with self._lock:
+            for client in self._clients.values():
+                if client.pending is None or now - client.last_sent < client.interval:
+                    continue
+                client.seq += 1
+                batch = {key: value for key, value in client.pending.items() if value}
+                batch['seq'] = client.seq
+                due.append((client.sid, batch))
+                client.pending = None
+                client.pending_lines = 0
+                client.last_sent = now
+        return due
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.min_interval / 2)
+            try:
+                for sid, batch in self._due(time.monotonic()):
+                    self.socketio.emit('live', batch, to=sid)
+                    self.stats['batches'] += 1
+            except Exception as e:
+                logger.error(f"Error sending live events: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            clients = len(self._clients)
+            watching = sum(len(client.watching) for client in self._clients.values())
+        return dict(self.stats, clients=clients, watched_calls=watching, interval=self.interval)
+
+# Shared per-process hub; create_app calls init_app with its SocketIO
+live_events = LiveEventHub()
@@ -0,0 +1,164 @@
+import binascii
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Twilio media streams carry 20ms of 8kHz mu-law per frame
+FRAME_MS = 20
+FRAME_BYTES = 160
+MULAW_SILENCE = 0xFF
+
+class FrameRingBuffer:
+    """Preallocated ring of fixed-size audio frames for one inbound media stream
+
+    Frames are placed by stream position (``timestamp // FRAME_MS``), so a
+    frame that arrives late lands in its own slot and missing frames leave
+    silence behind them. The newest ``reorder_window`` frames are held back
+    from readers to give late frames a chance to arrive. Readers get
+    memoryviews over the ring itself; nothing is copied after decode, and
+    the ring keeps only the most recent ``capacity`` frames.
+    """
+
+    def __init__(self, capacity=250, frame_bytes=FRAME_BYTES, reorder_window=3):
+        self.capacity = capacity
+        self.frame_bytes = frame_bytes
+        self.reorder_window = reorder_window
+        self._buffer = bytearray([MULAW_SILENCE]) * (capacity * frame_bytes)
+        self._view = memoryview(self._buffer)
+        self._silence = bytes([MULAW_SILENCE]) * frame_bytes
+        self._present = bytearray(capacity)
+        self._start = None  # stream position of the first frame
+        self._head = None  # stream position after the newest frame
+        self._read = None  # next stream position handed to readers
+        self._last_sequence = None
+        self.stats = {
+            'frames': 0,
+            'gaps': 0,
+            'missing_frames': 0,
+            'reordered': 0,
+            'late_dropped': 0,
+            'duplicates': 0,
+            'overwritten': 0,
+            'out_of_sequence': 0
+        }
+
+    def write_base64(self, payload, timestamp=None, sequence=None):
+        """Decode a Twilio media payload into its slot; returns the frame's stream position"""
+        if sequence is not None:
+            sequence = int(sequence)
+            if self._last_sequence is not None and sequence < self._last_sequence:
+                self.stats['out_of_sequence'] += 1
+            else:
+                self._last_sequence = sequence
+        # a2b_base64 has no decode-into; its result is copied into the ring and dropped at once
+        frame = binascii.a2b_base64(payload)
+
+        # Fast path for the common case: the next in-order, full-size frame with room to spare
+        head = self._head
+        if head is not None and len(frame) == self.frame_bytes and head - self._read < self.capacity:
+            position = int(timestamp) // FRAME_MS if timestamp is not None else head
+            if position == head:
+                start = (position % self.capacity) * self.frame_bytes
+                self._view[start:start + self.frame_bytes] = frame
+                self._present[position % self.capacity] = 1
+                self._head = position + 1
+                self.stats['frames'] += 1
+                return position
+        return self.write(frame, timestamp)
+
+    def write(self, frame, timestamp=None):
+        """Copy one frame into the ring at the position for timestamp (ms), or after the newest frame"""
+        if self._head is None:
+            position = int(timestamp) // FRAME_MS if timestamp is not None else 0
+            self._start = self._head = self._read = position
+        else:
+            position = int(timestamp) // FRAME_MS if timestamp is not None else self._head
+
+        if position >= self._head:
+            if position > self._head:
+                self.stats['gaps'] += 1
+                self.stats['missing_frames'] += position - self._head
+                for missing in range(max(self._head, position - self.capacity + 1), position):
+                    self._clear_slot(missing)
+            self._head = position + 1
+            if self._head - self._read > self.capacity:
+                self.stats['overwritten'] += self._head - self._read - self.capacity
+                self._read = self._head - self.capacity
+        elif position < self._read or self._head - position > self.capacity:
+            self.stats['late_dropped'] += 1
+            return position
+        elif self._present[position % self.capacity]:
+            self.stats['duplicates'] += 1
+            return position
+        else:
+            # Late frame filling a gap still inside the ring
+            self.stats['reordered'] += 1
+            self.stats['missing_frames'] -= 1
+
+        self._store(position, frame)
+        self.stats['frames'] += 1
+        return position
+
+    def _store(self, position, frame):
+        slot = position % self.capacity
+        start = slot * self.frame_bytes
+        size = len(frame)
+        if size == self.frame_bytes:
+            self._view[start:start + size] = frame
+        else:
+            # Short or oversized frame: pad with silence / truncate to the slot
+            size = min(size, self.frame_bytes)
+            self._view[start:start + size] = memoryview(frame)[:size]
+            self._view[start + size:start + self.frame_bytes] = self._silence[size:]
+        self._present[slot] = 1
+
+    def _clear_slot(self, position):
+        slot = position % self.capacity
+        start = slot * self.frame_bytes
+        self._view[start:start + self.frame_bytes] = self._silence
+        self._present[slot] = 0
+
+    def available(self):
+        """Frames readers can take without waiting on the reorder window"""
+        if self._head is None:
+            return 0
+        return max(0, self._head - self.reorder_window - self._read)
+
+    def read(self, max_frames=None, flush=False):
+        """Consume settled frames as a list of at most two memoryviews (the ring may wrap)
+
+        ``flush`` also releases the frames held back for reordering, e.g. at end of stream.
+        The views alias the ring, so use them before ``capacity`` more frames arrive.
+        """
+        if self._head is None:
+            return []
+        count = self._head - self._read if flush else self.available()
+        if max_frames is not None:
+            count = min(count, max_frames)
+        if count <= 0:
+            return []
+        views = self._window(self._read, count)
+        self._read += count
+        return views
+
+    def latest(self, frames):
+        """Peek at the newest frames without consuming them, e.g. for VAD"""
+        if self._head is None:
+            return []
+        frames = min(frames, self.capacity, self._head - self._start)
+        return self._window(self._head - frames, frames) if frames > 0 else []
+
+    def _window(self, position, count):
+        slot = position % self.capacity
+        first = min(count, self.capacity - slot)
+        views = [self._view[slot * self.frame_bytes:(slot + first) * self.frame_bytes]]
+        if count > first:
+            views.append(self._view[:(count - first) * self.frame_bytes])
+        return views
+
+    @property
+    def nbytes(self):
+        return len(self._buffer) + len(self._present)
+
+    def snapshot(self):
+        return dict(self.stats, buffered_frames=self.available(), capacity=self.capacity)
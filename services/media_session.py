@@ -0,0 +1,151 @@
+import itertools
+import logging
+import sys
+import time
+from collections import deque
+from services.media_buffer import FrameRingBuffer
+
+logger = logging.getLogger(__name__)
+
+class MediaSession:
+    """State for one Twilio media stream connection
+
+    Slotted and bounded so thousands of them cost a predictable amount of
+    memory: the conversation history keeps the last ``max_context`` messages
+    only, and inbound audio lives in a preallocated ring of the last
+    ``audio_frames`` frames, however long the call runs.
+    """
+
+    __slots__ = (
+        'session_id', 'websocket', 'stream_sid', 'call_sid', 'turn_manager',
+        'conversation_context', 'inbound_audio', 'recorder', 'started_at', 'frames_received', 'bytes_received'
+    )
+
+    def __init__(self, session_id, websocket, max_context=20, audio_frames=250):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.stream_sid = None
+        self.call_sid = None
+        self.turn_manager = None
+        self.conversation_context = deque(maxlen=max_context)
+        self.inbound_audio = FrameRingBuffer(capacity=audio_frames)
+        self.recorder = None
+        self.started_at = time.monotonic()
+        self.frames_received = 0
+        self.bytes_received = 0
+
+    def add_turn(self, user_text, assistant_text):
+        self.conversation_context.append({"role": "user", "content": user_text})
+        self.conversation_context.append({"role": "assistant", "content": assistant_text})
+
+    def close(self):
+        """Stop turn handling and finish the recording, including frames held for reordering"""
+        if self.turn_manager:
+            self.turn_manager.close()
+        if self.recorder:
+            try:
+                self.recorder.write_caller(self.inbound_audio.read(flush=True))
+                self.recorder.close()
+            except Exception as e:
+                logger.error(f"Error closing recording for {self.call_sid}: {e}")
+    
+    def memory_bytes(self):
+        """Approximate bytes held by this session, excluding shared service clients"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.conversation_context) + self.inbound_audio.nbytes
+        for message in self.conversation_context:
+            size += sys.getsizeof(message) + sum(sys.getsizeof(value) for value in message.values())
+        for value in (self.stream_sid, self.call_sid):
+            if value is not None:
+                size += sys.getsizeof(value)
+        if self.turn_manager is not None:
+            size += sys.getsizeof(self.turn_manager) + sys.getsizeof(vars(self.turn_manager))
+        return size
+
+    def snapshot(self):
+        return {
+            'session_id': self.session_id,
+            'stream_sid': self.stream_sid,
+            'call_sid': self.call_sid,
+            'age_seconds': round(time.monotonic() - self.started_at, 1),
+            'frames_received': self.frames_received,
+            'bytes_received': self.bytes_received,
+            'inbound_audio': self.inbound_audio.snapshot(),
+            'memory_bytes': self.memory_bytes()
+        }
+
+class SessionManager:
+    """Admission control and lookup for media sessions on one event loop
+
+    Connections are admitted up to ``max_sessions``, and not at all while
+    ``draining``; otherwise ``admit`` returns None and the caller should
+    refuse the connection. Sessions are
+    indexed by ``streamSid`` once Twilio's start event names the stream.
+    All methods are called from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, max_sessions=200, max_context=20):
+        self.max_sessions = max_sessions
+        self.max_context = max_context
+        self._sessions = {}
+        self._by_stream = {}
+        self._ids = itertools.count(1)
+        self.draining = False
+        self.stats = {'admitted': 0, 'rejected': 0, 'closed': 0, 'peak': 0}
+        self._closed_frames = 0
+
+    @property
+    def active(self):
+        return len(self._sessions)
+
+    def admit(self, websocket):
+        """Create a session for a new connection, or return None when at capacity"""
+        if self.draining:
+            self.stats['rejected'] += 1
+            return None
+        if len(self._sessions) >= self.max_sessions:
+            self.stats['rejected'] += 1
+            logger.warning(f"Rejecting media stream - {len(self._sessions)}/{self.max_sessions} sessions active")
+            return None
+
+        session = MediaSession(next(self._ids), websocket, self.max_context)
+        self._sessions[session.session_id] = session
+        self.stats['admitted'] += 1
+        self.stats['peak'] = max(self.stats['peak'], len(self._sessions))
+        return session
+
+    def bind(self, session, stream_sid, call_sid=None):
+        """Index session under the streamSid from Twilio's start event"""
+        if session.stream_sid and self._by_stream.get(session.stream_sid) is session:
+            del self._by_stream[session.stream_sid]
+        session.stream_sid = stream_sid
+        if call_sid:
+            session.call_sid = call_sid
+        self._by_stream[stream_sid] = session
+
+    def get(self, stream_sid):
+        return self._by_stream.get(stream_sid)
+
+    def release(self, session):
+        if self._sessions.pop(session.session_id, None) is None:
+            return
+        if session.stream_sid and self._by_stream.get(session.stream_sid) is session:
+            del self._by_stream[session.stream_sid]
+        session.close()
+        self.stats['closed'] += 1
+        self._closed_frames += session.frames_received
+    
+    def frames_received(self):
+        """Inbound frames over the manager's lifetime, live and closed sessions together"""
+        return self._closed_frames + sum(session.frames_received for session in self._sessions.values())
+
+    def memory_report(self):
+        sessions = [session.snapshot() for session in self._sessions.values()]
+        total = sum(s['memory_bytes'] for s in sessions)
+        return {
+            'active': len(sessions),
+            'max_sessions': self.max_sessions,
+            'total_memory_bytes': total,
+            'avg_memory_bytes': round(total / len(sessions)) if sessions else 0,
+            'stats': dict(self.stats),
+            'sessions': sessions
+        }
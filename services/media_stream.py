@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import threading
+import time
+import simple_websocket
+from websockets.exceptions import ConnectionClosedError
+from utils.blocking import configure_cpu_pool
+
+logger = logging.getLogger(__name__)
+
+_CLOSED = object()
+
+class BridgedWebSocket:
+    """The part of a ``websockets`` connection the media handler uses, over a simple-websocket connection
+
+    Inbound frames are fed in from the request thread that owns the socket;
+    iteration and ``send`` happen on the media loop.
+    """
+
+    def __init__(self, ws, loop):
+        self._ws = ws
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self.closed = False
+
+    def feed(self, message):
+        """Thread-safe: hand an inbound frame (or _CLOSED) to the media loop"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._queue.get()
+        if message is _CLOSED:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, message):
+        # Twilio drains its socket faster than telephony audio fills it, so a
+        # direct write doesn't hold up the loop in practice
+        try:
+            self._ws.send(message)
+        except simple_websocket.ConnectionClosed as e:
+            raise ConnectionClosedError(None, None) from e
+
+    async def close(self, code=1000, reason=''):
+        self.closed = True
+        self._ws.close(reason=code, message=reason)
+
+class MediaStreamServer:
+    """Serves Twilio media streams from the app's own HTTP server
+
+    The WebSocket upgrade arrives as an ordinary request on the media
+    stream route and simple-websocket takes over its socket, so streams
+    share the webhooks' port, process, app config and client registry.
+    Every session runs on one asyncio loop in a background thread - a green
+    thread when run.py has monkey-patched the process - through the same
+    TwilioDeepgramHandler as the standalone server. The request thread only
+    pumps inbound frames into that loop.
+
+    ``drain`` stops admitting streams and gives live calls up to
+    ``drain_timeout`` seconds to finish before closing them with 1001.
+    """
+
+    def __init__(self, drain_timeout=25):
+        self.drain_timeout = drain_timeout
+        self.app = None
+        self.handler = None
+        self.draining = False
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'accepted': 0, 'refused_draining': 0, 'drained': 0, 'force_closed': 0}
+
+    def init_app(self, app):
+        from websocket_handler import TwilioDeepgramHandler
+
+        self.app = app
+        self.drain_timeout = app.config.get('MEDIA_DRAIN_SECONDS', self.drain_timeout)
+        self.handler = TwilioDeepgramHandler(max_sessions=app.config.get('MEDIA_MAX_SESSIONS', 200), app=app)
+        # Recording analysis gets its own processes here too (threaded servers only), so it doesn't
+        # hold the GIL the media loop needs
+        configure_cpu_pool(app.config.get('MEDIA_CPU_WORKERS', 1))
+
+    def _ensure_loop(self):
+        """Start the media loop on first use, so processes that never stream don't carry it"""
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def run():
+                    self._loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(self._loop)
+                    ready.set()
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='media-loop', daemon=True)
+                self._thread.start()
+                ready.wait()
+        return self._loop
+
+    def serve(self, environ):
+        """Run one media stream for the lifetime of the request; returns the WSGI response to hand back"""
+        if self.draining:
+            self.stats['refused_draining'] += 1
+            return None
+
+        ws = simple_websocket.Server.accept(environ)
+        loop = self._ensure_loop()
+        self.stats['accepted'] += 1
+
+        # The bridge's queue belongs to the media loop, so it is created there
+        created = threading.Event()
+        holder = {}
+
+        async def run():
+            holder['bridge'] = BridgedWebSocket(ws, loop)
+            created.set()
+            await self.handler.handle_twilio_stream(holder['bridge'])
+
+        future = asyncio.run_coroutine_threadsafe(run(), loop)
+        created.wait()
+        bridge = holder['bridge']
+        try:
+            while not future.done():
+                try:
+                    message = ws.receive(timeout=1.0)
+                except simple_websocket.ConnectionClosed:
+                    break
+                if message is not None:
+                    bridge.feed(message)
+        finally:
+            bridge.feed(_CLOSED)
+            try:
+                # Includes the handler's post-call stage (recording analytics, transcription enqueue)
+                future.result()
+            except Exception as e:
+                logger.error(f"Media stream ended with an error: {e}")
+            if ws.connected:
+                ws.close()
+            # The server closes the socket once this returns; let the reader thread
+            # see the client's close reply first rather than race it
+            ws.thread.join(5)
+        return _handled_response(ws)
+
+    def drain(self, timeout=None):
+        """Refuse new streams, wait for live ones to end, then close the rest with 1001 (going away)"""
+        self.draining = True
+        if self._loop is None or self.handler is None:
+            return 0
+
+        timeout = self.drain_timeout if timeout is None else timeout
+        active = self.handler.sessions.active
+        if active:
+            logger.info(f"Draining {active} media streams (up to {timeout}s)")
+        deadline = time.monotonic() + timeout
+        while self.handler.sessions.active and time.monotonic() < deadline:
+            time.sleep(0.2)
+
+        remaining = self.handler.sessions.active
+        self.stats['drained'] += active - remaining
+        if remaining:
+            logger.warning(f"Closing {remaining} media streams still live after drain")
+            self.stats['force_closed'] += remaining
+            asyncio.run_coroutine_threadsafe(self._close_all(), self._loop).result(5)
+            # Let their post-call stage finish recordings before the process exits
+            deadline = time.monotonic() + 5
+            while self.handler.sessions.active and time.monotonic() < deadline:
+                time.sleep(0.1)
+        return remaining
+
+    async def _close_all(self):
+        for session in list(self.handler.sessions._sessions.values()):
+            try:
+                await session.websocket.close(code=1001, reason="Server shutting down")
+            except Exception as e:
+                logger.error(f"Error closing media stream {session.session_id}: {e}")
+
+    def snapshot(self):
+        return dict(
+            self.stats,
+            draining=self.draining,
+            sessions=self.handler.sessions.memory_report() if self.handler else None
+        )
+
+def _handled_response(ws):
+    """A WSGI response telling the server the socket was already used for the WebSocket"""
+    from flask import Response
+
+    class WebSocketResponse(Response):
+        def __call__(self, environ, start_response):
+            if ws.mode == 'eventlet':
+                try:
+                    from eventlet.wsgi import WSGI_LOCAL
+                    WSGI_LOCAL.already_handled = True
+                    return []
+                except ImportError:
+                    from eventlet.wsgi import ALREADY_HANDLED
+                    return ALREADY_HANDLED
+            if ws.mode == 'gunicorn':
+                raise StopIteration()
+            if ws.mode == 'werkzeug':
+                # Werkzeug closes the connection on this; it has nothing more to send
+                raise ConnectionError()
+            return []
+
+    return WebSocketResponse()
+
+# Shared per-process media stream server; create_app calls init_app
+media_stream_server = MediaStreamServer()
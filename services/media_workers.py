@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+def worker_status_path(status_dir, index):
+    return os.path.join(status_dir, f"media-worker-{index}.json")
+
+def _cpu_seconds():
+    """This worker's CPU time, its CPU pool processes included"""
+    from utils.blocking import cpu_pool_seconds
+    return time.process_time() + cpu_pool_seconds()
+
+class WorkerStatsPublisher:
+    """Periodically writes this media worker's sessions and CPU use to a JSON file
+
+    Every worker on the box writes into the same directory, so any process
+    there - another worker, the supervisor or the web app - can report on
+    all of them with ``read_worker_stats``. Files are replaced atomically.
+    """
+
+    def __init__(self, handler, index, status_dir, interval=5.0):
+        self.handler = handler
+        self.index = index
+        self.status_dir = status_dir
+        self.interval = interval
+        self.path = worker_status_path(status_dir, index)
+        self._cpu = _cpu_seconds()
+        self._wall = time.monotonic()
+        os.makedirs(status_dir, exist_ok=True)
+
+    def snapshot(self):
+        cpu, wall = _cpu_seconds(), time.monotonic()
+        cpu_percent = 100.0 * (cpu - self._cpu) / (wall - self._wall) if wall > self._wall else 0.0
+        self._cpu, self._wall = cpu, wall
+
+        sessions = self.handler.sessions
+        return {
+            'worker': self.index,
+            'pid': os.getpid(),
+            'updated_at': time.time(),
+            'active_sessions': sessions.active,
+            'max_sessions': sessions.max_sessions,
+            'draining': sessions.draining,
+            'stats': dict(sessions.stats),
+            'frames_received': sessions.frames_received(),
+            'cpu_percent': round(cpu_percent, 1),
+            'cpu_seconds': round(cpu, 2),
+            # ru_maxrss is kilobytes on Linux
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        }
+
+    def publish(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, self.path)
+
+    async def run(self):
+        while True:
+            try:
+                self.publish()
+            except OSError as e:
+                logger.error(f"Could not publish media worker stats: {e}")
+            await asyncio.sleep(self.interval)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def read_worker_stats(status_dir, stale_after=30.0):
+    """Per-worker stats published under status_dir, with totals; stale files (dead workers) are skipped"""
+    workers = []
+    try:
+        names = sorted(os.listdir(status_dir))
+    except OSError:
+        names = []
+    now = time.time()
+    for name in names:
+        if not (name.startswith('media-worker-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(status_dir, name)) as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - stats.get('updated_at', 0) <= stale_after:
+            workers.append(stats)
+
+    return {
+        'workers': workers,
+        'active_sessions': sum(w['active_sessions'] for w in workers),
+        'frames_received': sum(w['frames_received'] for w in workers),
+        'cpu_percent': round(sum(w['cpu_percent'] for w in workers), 1)
+    }
+
+async def serve_media_worker(index, host, port, reuse_port=False, cpu_workers=None):
+    """Run one media server process until SIGTERM/SIGINT, then drain its sessions"""
+    from config import Config
+    from utils.blocking import configure_cpu_pool, shutdown_cpu_pool
+    from websocket_handler import start_websocket_server
+
+    configure_cpu_pool(Config.MEDIA_CPU_WORKERS if cpu_workers is None else cpu_workers)
+    server, handler = await start_websocket_server(host, port, reuse_port=reuse_port)
+    publisher = WorkerStatsPublisher(handler, index, Config.MEDIA_STATUS_DIR)
+    stats_task = asyncio.ensure_future(publisher.run())
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+    await stopped.wait()
+
+    # Refuse new streams and let live calls finish before closing the rest
+    handler.sessions.draining = True
+    logger.info(f"Media worker {index} draining {handler.sessions.active} sessions")
+    deadline = time.monotonic() + Config.MEDIA_DRAIN_SECONDS
+    while handler.sessions.active and time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+    server.close()
+    await server.wait_closed()
+
+    stats_task.cancel()
+    publisher.remove()
+    shutdown_cpu_pool()
+    logger.info(f"Media worker {index} stopped")
+
+def _run_worker(index, host, port, reuse_port):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(name)s: %(message)s')
+    asyncio.run(serve_media_worker(index, host, port, reuse_port=reuse_port))
+
+def run_media_workers(workers, host, port):
+    """Serve media streams from ``workers`` processes sharing one port
+
+    Each process has its own event loop and CPU pool and binds the port with
+    SO_REUSEPORT, so the kernel spreads new connections across them. A call
+    stays on the process that accepted it.
+    """
+    if workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+        logger.warning("SO_REUSEPORT is not available on this platform; running a single media worker")
+        workers = 1
+    if workers <= 1:
+        _run_worker(0, host, port, reuse_port=False)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_run_worker, args=(index, host, port, True), name=f'media-worker-{index}')
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {workers} media workers on port {port}")
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # children get Ctrl-C from the terminal themselves
+
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            logger.error(f"{process.name} exited with code {process.exitcode}")
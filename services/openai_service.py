@@ -3,12 +3,14 @@ import json
 import logging
 from flask import current_app
 from datetime import datetime
+from utils.resilience import get_operation
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
     def __init__(self):
         self.client = None
+        self._async_client = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -19,56 +21,114 @@ class OpenAIService:
             logger.error(f"Failed to initialize OpenAI client: {e}")
             raise
     
+    @property
+    def async_client(self):
+        """AsyncOpenAI client for the asyncio media server, so LLM calls never block its event loop
+        
+        Built on first use: it needs a real selector, which green-thread web
+        processes (eventlet patches select) don't have and never use.
+        """
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(api_key=self.client.api_key)
+        return self._async_client
+    
+    def _chat(self, operation, default_timeout, **kwargs):
+        """Create a chat completion under the operation's circuit breaker and adaptive timeout
+        
+        Raises CircuitOpenError without calling OpenAI when the breaker is open,
+        so callers drop straight into their fallback. SDK retries are disabled
+        so a single call never exceeds its timeout.
+        """
+        return get_operation(
+            f"openai.{operation}",
+            default_timeout=default_timeout,
+            max_timeout=max(default_timeout, 15)
+        ).call(lambda timeout: self.client.with_options(timeout=timeout, max_retries=0).chat.completions.create(**kwargs))
+    
+    async def _chat_async(self, operation, default_timeout, **kwargs):
+        """Async counterpart of _chat on the AsyncOpenAI client, sharing its breaker and learned timeout"""
+        resilient = get_operation(
+            f"openai.{operation}",
+            default_timeout=default_timeout,
+            max_timeout=max(default_timeout, 15)
+        )
+        with resilient.attempt() as timeout:
+            return await self.async_client.with_options(timeout=timeout, max_retries=0).chat.completions.create(**kwargs)
+    
+    def _intent_request(self, transcript_text, conversation_history=None):
+        """Build the chat completion arguments for intent analysis"""
+        # Build conversation context
+        context = "You are an AI assistant analyzing customer service calls. "
+        context += "Identify the customer's intent from their message. "
+        context += "Common intents include: booking_appointment, cancel_appointment, "
+        context += "reschedule_appointment, general_inquiry, complaint, pricing_info, "
+        context += "service_info, technical_support, billing_inquiry.\n\n"
+        
+        if conversation_history:
+            context += f"Previous conversation: {conversation_history}\n\n"
+        
+        context += f"Customer message: {transcript_text}\n\n"
+        context += "Respond with a JSON object containing: intent, confidence (0-1), "
+        context += "key_entities (list), suggested_response, and action_required."
+        
+        return dict(
+            model="gpt-3.5-turbo",  # Faster than GPT-4
+            messages=[
+                {"role": "system", "content": context},
+                {"role": "user", "content": transcript_text}
+            ],
+            temperature=0.3,
+            max_tokens=200  # Shorter responses for faster generation
+        )
+    
+    def _parse_intent(self, response):
+        result = json.loads(response.choices[0].message.content.strip())
+        
+        return {
+            'intent': result.get('intent', 'unknown'),
+            'confidence': result.get('confidence', 0.0),
+            'entities': result.get('key_entities', []),
+            'suggested_response': result.get('suggested_response', ''),
+            'action_required': result.get('action_required', False),
+            'raw_response': response.choices[0].message.content
+        }
+    
+    def _intent_fallback(self, error):
+        logger.error(f"Error analyzing intent: {error}")
+        return {
+            'intent': 'error',
+            'confidence': 0.0,
+            'entities': [],
+            'suggested_response': "I'm sorry, I didn't understand that. Could you please repeat?",
+            'action_required': False,
+            'error': str(error)
+        }
+    
     def analyze_intent(self, transcript_text, conversation_history=None):
         """Analyze user intent from transcript"""
         try:
-            # Build conversation context
-            context = "You are an AI assistant analyzing customer service calls. "
-            context += "Identify the customer's intent from their message. "
-            context += "Common intents include: booking_appointment, cancel_appointment, "
-            context += "reschedule_appointment, general_inquiry, complaint, pricing_info, "
-            context += "service_info, technical_support, billing_inquiry.\n\n"
-            
-            if conversation_history:
-                context += f"Previous conversation: {conversation_history}\n\n"
-            
-            context += f"Customer message: {transcript_text}\n\n"
-            context += "Respond with a JSON object containing: intent, confidence (0-1), "
-            context += "key_entities (list), suggested_response, and action_required."
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Faster than GPT-4
-                messages=[
-                    {"role": "system", "content": context},
-                    {"role": "user", "content": transcript_text}
-                ],
-                temperature=0.3,
-                max_tokens=200,  # Shorter responses for faster generation
-                timeout=10  # 10 second timeout to prevent worker hangs
+            response = self._chat(
+                'analyze_intent',
+                10,  # Initial timeout to prevent worker hangs, then learned from latency
+                **self._intent_request(transcript_text, conversation_history)
             )
+            return self._parse_intent(response)
             
-            # Parse the response
-            result = json.loads(response.choices[0].message.content.strip())
-            
-            return {
-                'intent': result.get('intent', 'unknown'),
-                'confidence': result.get('confidence', 0.0),
-                'entities': result.get('key_entities', []),
-                'suggested_response': result.get('suggested_response', ''),
-                'action_required': result.get('action_required', False),
-                'raw_response': response.choices[0].message.content
-            }
+        except Exception as e:
+            return self._intent_fallback(e)
+    
+    async def analyze_intent_async(self, transcript_text, conversation_history=None):
+        """Non-blocking analyze_intent for the asyncio media server"""
+        try:
+            response = await self._chat_async(
+                'analyze_intent',
+                10,
+                **self._intent_request(transcript_text, conversation_history)
+            )
+            return self._parse_intent(response)
             
         except Exception as e:
-            logger.error(f"Error analyzing intent: {e}")
-            return {
-                'intent': 'error',
-                'confidence': 0.0,
-                'entities': [],
-                'suggested_response': "I'm sorry, I didn't understand that. Could you please repeat?",
-                'action_required': False,
-                'error': str(e)
-            }
+            return self._intent_fallback(e)
     
     def generate_response(self, user_input, intent_data, conversation_history=None):
         """Generate natural AI response based on intent"""
@@ -88,7 +148,9 @@ class OpenAIService:
             
             messages.append({"role": "user", "content": user_input})
             
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                'generate_response',
+                20,
                 model="gpt-4",
                 messages=messages,
                 temperature=0.7,
@@ -130,7 +192,9 @@ class OpenAIService:
             Use null for missing information.
             """.format(transcript=transcript_text)
             
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                'extract_appointment',
+                20,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are an AI assistant that extracts structured appointment data."},
@@ -165,8 +229,8 @@ class OpenAIService:
         
         return intent_prompts.get(intent, base_prompt + "Assist the customer with their request to the best of your ability.")
     
-    def summarize_call(self, transcripts):
-        """Generate a summary of the entire call"""
+    def summarize_call(self, transcripts, fallback="Unable to generate call summary."):
+        """Generate a summary of the entire call; returns fallback on failure, or raises if it is None"""
         try:
             # Combine all transcripts
             full_conversation = "\n".join([
@@ -187,7 +251,9 @@ class OpenAIService:
             Provide a concise but comprehensive summary.
             """
             
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                'summarize_call',
+                30,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are an AI assistant that creates concise call summaries for customer service."},
@@ -201,12 +267,16 @@ class OpenAIService:
             
         except Exception as e:
             logger.error(f"Error summarizing call: {e}")
-            return "Unable to generate call summary."
+            if fallback is None:
+                raise
+            return fallback
     
     def generate_text(self, prompt, max_tokens=150):
         """Generate text response using OpenAI"""
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                'generate_text',
+                10,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a helpful AI assistant. Be concise and professional."},
@@ -233,14 +303,15 @@ Respond naturally and helpfully in 1-2 sentences. Be conversational and ask a fo
 Customer: {transcript_text}
 Assistant:"""
 
-            response = self.client.chat.completions.create(
+            response = self._chat(
+                'quick_response',
+                8,  # Fast initial timeout, then learned from latency
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=100,  # Very short responses
-                timeout=8  # Fast timeout
+                max_tokens=100  # Very short responses
             )
             
             ai_response = response.choices[0].message.content.strip()
@@ -0,0 +1,176 @@
+import atexit
+import logging
+import threading
+import time
+from utils.resilience import on_breaker_change
+
+logger = logging.getLogger(__name__)
+
+class ClientRegistry:
+    """Thread-safe, per-process registry of service clients
+
+    Each registered service is built lazily on first use, exactly once per
+    worker process, and shared by every request, webhook and media stream
+    afterwards. The registry records build time and errors for health
+    reporting and closes clients on shutdown.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._closers = {}
+        self._instances = {}
+        self._health = {}
+        self._build_locks = {}
+        self._open_circuits = {}  # name -> operations whose breaker is open
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, close=None):
+        """Register a factory for name; the first registration wins"""
+        with self._lock:
+            if name in self._factories:
+                return False
+            self._factories[name] = factory
+            self._closers[name] = close
+            self._build_locks[name] = threading.Lock()
+            self._health[name] = {'status': 'not_created'}
+            return True
+
+    def get(self, name, factory=None):
+        """Return the shared instance for name, building it on first use
+
+        ``factory`` registers name on the fly when nothing has registered it yet.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if factory is not None:
+            self.register(name, factory)
+
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"No client registered as '{name}'")
+            build_lock = self._build_locks[name]
+
+        with build_lock:
+            # Another thread may have finished building while we waited
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            started = time.monotonic()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                with self._lock:
+                    self._health[name] = {'status': 'error', 'error': str(e)}
+                logger.error(f"Failed to create client '{name}': {e}")
+                raise
+
+            build_seconds = round(time.monotonic() - started, 4)
+            with self._lock:
+                self._instances[name] = instance
+                self._health[name] = {
+                    'status': 'healthy',
+                    'created_at': time.time(),
+                    'build_seconds': build_seconds
+                }
+            logger.info(f"Created client '{name}' in {build_seconds}s")
+            return instance
+
+    def mark_unhealthy(self, name, error):
+        with self._lock:
+            if name in self._health:
+                self._health[name] = dict(self._health[name], status='unhealthy', error=str(error))
+
+    def mark_healthy(self, name):
+        """Undo mark_unhealthy once the client works again"""
+        with self._lock:
+            health = self._health.get(name)
+            if health and health['status'] == 'unhealthy':
+                health = {key: value for key, value in health.items() if key != 'error'}
+                health['status'] = 'healthy' if name in self._instances else 'not_created'
+                self._health[name] = health
+
+    def breaker_changed(self, operation, state):
+        """Keep a client unhealthy while any of its circuit breakers is open
+
+        Breakers are named '<client>.<operation>', e.g. 'openai.intent'.
+        """
+        from utils.resilience import CircuitBreaker
+
+        name = operation.split('.', 1)[0]
+        with self._lock:
+            if name not in self._health:
+                return
+            circuits = self._open_circuits.setdefault(name, set())
+            if state == CircuitBreaker.OPEN:
+                circuits.add(operation)
+            else:
+                circuits.discard(operation)
+            still_open = sorted(circuits)
+        if still_open:
+            self.mark_unhealthy(name, f"circuit open: {', '.join(still_open)}")
+        else:
+            self.mark_healthy(name)
+
+    def reset(self, name):
+        """Drop the instance so the next get() rebuilds it"""
+        with self._lock:
+            instance = self._instances.pop(name, None)
+            closer = self._closers.get(name)
+            if name in self._health:
+                self._health[name] = {'status': 'not_created'}
+        if instance is not None:
+            self._close(name, instance, closer)
+
+    def health(self):
+        with self._lock:
+            return {name: dict(state) for name, state in self._health.items()}
+
+    def shutdown(self):
+        """Close every built client"""
+        with self._lock:
+            instances = list(self._instances.items())
+            self._instances.clear()
+            closers = dict(self._closers)
+        for name, instance in instances:
+            self._close(name, instance, closers.get(name))
+            with self._lock:
+                self._health[name] = {'status': 'closed'}
+
+    @staticmethod
+    def _close(name, instance, closer):
+        try:
+            if closer:
+                closer(instance)
+            logger.info(f"Closed client '{name}'")
+        except Exception as e:
+            logger.error(f"Error closing client '{name}': {e}")
+
+# Process-wide registry shared by the web app, webhooks and media streams
+client_registry = ClientRegistry()
+atexit.register(client_registry.shutdown)
+on_breaker_change(client_registry.breaker_changed)
+
+def register_app_services(app):
+    """Register the provider services, built inside app's context so they can read its config"""
+    from services.twilio_service import TwilioService
+    from services.deepgram_service import DeepgramService
+    from services.openai_service import OpenAIService
+    from services.elevenlabs_service import ElevenLabsService
+    from services.calendar_service import CalendarService
+    from services.crm_service import CRMService
+
+    def with_app_context(service_class):
+        def factory():
+            with app.app_context():
+                return service_class()
+        return factory
+
+    client_registry.register('twilio', with_app_context(TwilioService))
+    client_registry.register('deepgram', with_app_context(DeepgramService))
+    client_registry.register('openai', with_app_context(OpenAIService), close=lambda service: service.client.close())
+    client_registry.register('elevenlabs', with_app_context(ElevenLabsService))
+    client_registry.register('calendar', with_app_context(CalendarService))
+    client_registry.register('crm', with_app_context(CRMService))
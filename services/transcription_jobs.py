@@ -0,0 +1,97 @@
+import logging
+from datetime import datetime, timedelta
+from services.call_recorder import prune_recordings
+from services.job_queue import job_queue
+
+logger = logging.getLogger(__name__)
+
+def enqueue_transcription(call_id, recording_url=None, local_path=None, speaker=None, started_at=None):
+    """Queue a Twilio recording URL or a local stereo recording for transcription; needs an app context
+
+    ``speaker`` labels every sentence, for a clip of one side of the call such
+    as a single caller turn. Sentence offsets count from ``started_at``, the
+    call's start time by default. A local recording only exists on this
+    machine, so its job is host-local.
+    """
+    return job_queue.enqueue(
+        'transcribe_local_recording' if local_path else 'transcribe_recording',
+        {
+            'call_id': call_id,
+            'recording_url': recording_url,
+            'local_path': local_path,
+            'speaker': speaker,
+            'started_at': started_at.isoformat() if started_at else None
+        },
+        dedupe_key=f"transcribe:{local_path or recording_url}"
+    )
+
+@job_queue.on_reap
+def prune_local_recordings():
+    """Keep this host's media stream recordings only for RECORDINGS_RETENTION_HOURS"""
+    from flask import current_app
+
+    retention_hours = current_app.config.get('RECORDINGS_RETENTION_HOURS')
+    if retention_hours:
+        prune_recordings(current_app.config['RECORDINGS_DIR'], retention_hours)
+
+# Recordings written by the media stream server live on its local disk, so only a worker
+# on the same host may run their jobs
+@job_queue.handler('transcribe_local_recording', concurrency=2, max_attempts=6, visibility_timeout=600,
+                   retry_delay=3.0, backoff=1.5, host_local=True)
+# A recording Twilio hasn't finished processing raises RecordingNotReadyError;
+# the queue retries it on backoff, so no worker sleeps waiting for it
+@job_queue.handler('transcribe_recording', concurrency=2, max_attempts=6, visibility_timeout=600,
+                   retry_delay=3.0, backoff=1.5)
+def transcribe_recording(payload):
+    """Transcribe a recording and store its sentences, with timing offsets, in one bulk insert
+
+    Rows are tagged with the recording they came from, and any earlier rows
+    from it are replaced in the same transaction, so a job that runs again
+    (a retry after its lock expired, or the same recording queued twice)
+    never stores the transcript twice.
+    """
+    from models import db, Call, Transcript
+    from services.call_summary import enqueue_summary
+    from services.registry import client_registry
+
+    deepgram_service = client_registry.get('deepgram')
+    if payload.get('local_path'):
+        # Stereo recordings from the media stream: caller left, agent right
+        sentences = deepgram_service.transcribe_path(payload['local_path'], multichannel=True)
+    else:
+        sentences = deepgram_service.transcribe_buffer(deepgram_service.download_recording(payload['recording_url']))
+
+    call = db.session.get(Call, payload['call_id'])
+    if not call:
+        logger.warning(f"Call {payload['call_id']} disappeared before its transcript was stored")
+        return
+
+    source = payload.get('local_path') or payload.get('recording_url')
+    started_at = datetime.fromisoformat(payload['started_at']) if payload.get('started_at') else call.start_time
+    rows = [_transcript_row(call, sentence, source, payload.get('speaker'), started_at)
+            for sentence in sentences if sentence['text']]
+    if rows:
+        Transcript.query.filter_by(call_id=call.id, source=source).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(Transcript, rows)
+        db.session.commit()
+        # A live call is summarised when it ends; one that already has been needs redoing
+        if call.end_time:
+            enqueue_summary(call.id)
+    logger.info(f"Stored {len(rows)} transcript sentences for call {call.call_sid}")
+
+def _transcript_row(call, sentence, source, speaker=None, started_at=None):
+    if not speaker and sentence.get('channel') is not None:
+        speaker = ('caller', 'agent')[sentence['channel']] if sentence['channel'] < 2 else f"participant{sentence['channel'] + 1}"
+    elif not speaker:
+        speaker = f"participant{int(sentence.get('speaker') or 0) + 1}"
+    return {
+        'call_id': call.id,
+        'timestamp': (started_at or datetime.utcnow()) + timedelta(seconds=sentence['start'] or 0),
+        'speaker': speaker,
+        'text': sentence['text'],
+        'confidence': sentence.get('confidence'),
+        'is_final': True,
+        'start_offset': sentence.get('start'),
+        'end_offset': sentence.get('end'),
+        'source': source
+    }
@@ -0,0 +1,228 @@
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from utils.http_transport import abort_response
+from utils.latency import get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+# produce(text, on_response=None) must return an iterator of audio chunks, passing its
+# streaming HTTP response to on_response once the headers are in
+TTSProvider = namedtuple('TTSProvider', ['name', 'produce', 'mimetype'])
+
+class HedgedStream:
+    """Chunk iterator for the provider that won the race"""
+
+    def __init__(self, provider, first_chunk, chunks):
+        self.provider = provider.name
+        self.mimetype = provider.mimetype
+        self._first_chunk = first_chunk
+        self._chunks = chunks
+
+    def __iter__(self):
+        yield self._first_chunk
+        try:
+            for chunk in self._chunks:
+                yield chunk
+        finally:
+            _close(self._chunks)
+
+    def close(self):
+        """Give up on a stream that was never read"""
+        _close(self._chunks)
+
+class _Race:
+    """Shared state for one hedged request; exactly one attempt can claim the win
+
+    Attempts register their in-flight responses, so the winner can cut the
+    losers off straight away instead of waiting for their first chunk. The
+    winner's stream is queued under the same lock that closes the race, so
+    once close() returns, ``results`` holds any stream that won.
+    """
+
+    def __init__(self):
+        self.results = queue.Queue()
+        self.closed = False
+        self.winner = None
+        self._responses = {}  # provider name -> its in-flight responses, one per sentence
+        self._lock = threading.Lock()
+
+    def track(self, provider, response):
+        with self._lock:
+            if self.winner == provider.name:
+                # The winner's later sentences
+                return
+            if not self.closed:
+                self._responses.setdefault(provider.name, []).append(response)
+                return
+        # Already decided: this attempt lost
+        abort_response(response)
+
+    def claim(self, provider, stream):
+        with self._lock:
+            if self.closed:
+                return False
+            self.closed = True
+            self.winner = provider.name
+            self.results.put((provider, stream, None))
+            losers = [response for name, responses in self._responses.items() if name != provider.name for response in responses]
+            self._responses.clear()
+        for response in losers:
+            abort_response(response)
+        return True
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            losers = [response for responses in self._responses.values() for response in responses]
+            self._responses.clear()
+        for response in losers:
+            abort_response(response)
+
+    def discard_results(self):
+        """Close any stream that won after the request gave up; call after close()"""
+        while True:
+            try:
+                _, stream, _ = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if stream is not None:
+                stream.close()
+
+class TTSOrchestrator:
+    """Hedged TTS across providers
+
+    The primary provider is asked first. If it hasn't produced its first
+    chunk within its learned ``hedge_percentile`` time-to-first-chunk, the
+    next provider is raced against it. Whichever produces audio first wins;
+    a loser that is already streaming has its connection cut at once, one
+    still waiting for response headers is closed when they arrive. A
+    provider failure triggers the next one immediately.
+    """
+
+    def __init__(self, providers, hedge_percentile=95, default_hedge_delay=1.0, min_hedge_delay=0.2,
+                 timeout=10, max_workers=8):
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts-hedge')
+        self.stats = {'requests': 0, 'hedged': 0, 'secondary_wins': 0, 'failures': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        # open_stream runs on many request threads at once
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def hedge_delay(self, provider):
+        tracker = get_latency_tracker(f"tts.{provider.name}.first_chunk")
+        delay = tracker.percentile(self.hedge_percentile, default=self.default_hedge_delay)
+        return max(delay, self.min_hedge_delay)
+
+    def open_stream(self, text):
+        """Race providers for the first chunk; returns a HedgedStream or None if every provider failed"""
+        if not self.providers:
+            return None
+
+        self._count('requests')
+        race = _Race()
+        pending = list(self.providers)
+        deadline = time.monotonic() + self.timeout
+        in_flight = 0
+
+        def launch():
+            provider = pending.pop(0)
+            self._executor.submit(self._attempt, provider, text, race)
+            return provider
+
+        primary = launch()
+        in_flight += 1
+        wait = self.hedge_delay(primary)
+
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                provider, stream, error = race.results.get(timeout=min(wait, remaining))
+            except queue.Empty:
+                # Primary is slower than its usual tail latency - hedge to the next provider
+                if pending:
+                    hedge = launch()
+                    in_flight += 1
+                    self._count('hedged')
+                    logger.info(f"Hedging TTS request to {hedge.name} after {wait:.2f}s")
+                wait = remaining
+                continue
+
+            in_flight -= 1
+            if error is not None:
+                logger.warning(f"TTS provider {provider.name} failed: {error}")
+                if pending:
+                    launch()
+                    in_flight += 1
+                continue
+
+            # The winning attempt already claimed the race, so late finishers close themselves.
+            # Secondary wins cover both hedges that beat the primary and failovers.
+            if provider is not primary:
+                self._count('secondary_wins')
+            return stream
+
+        race.close()
+        race.discard_results()
+        self._count('failures')
+        logger.error("All TTS providers failed or timed out")
+        return None
+
+    def synthesize(self, text):
+        """Return (audio_data, mimetype) from the fastest provider, or None"""
+        stream = self.open_stream(text)
+        if not stream:
+            return None
+        try:
+            return b''.join(stream), stream.mimetype
+        except Exception as e:
+            logger.error(f"Error reading TTS stream from {stream.provider}: {e}")
+            return None
+
+    def _attempt(self, provider, text, race):
+        started = time.monotonic()
+        chunks = None
+        try:
+            chunks = iter(provider.produce(text, on_response=lambda response: race.track(provider, response)))
+            first_chunk = next(chunks)
+        except StopIteration:
+            race.results.put((provider, None, RuntimeError("No audio produced")))
+            return
+        except Exception as e:
+            _close(chunks)
+            race.results.put((provider, None, e))
+            return
+
+        get_latency_tracker(f"tts.{provider.name}.first_chunk").record(time.monotonic() - started)
+
+        if not race.claim(provider, HedgedStream(provider, first_chunk, chunks)):
+            # Lost the race (or the request gave up) while waiting on the provider
+            _close(chunks)
+
+def _close(chunks):
+    close = getattr(chunks, 'close', None)
+    if close:
+        close()
+
+def build_tts_orchestrator(config, get_deepgram_service, get_elevenlabs_service):
+    """Create an orchestrator over every configured provider, Deepgram first"""
+    providers = []
+    if config.get('DEEPGRAM_API_KEY'):
+        providers.append(TTSProvider('deepgram', get_deepgram_service().iter_text_to_speech, 'audio/wav'))
+    if config.get('ELEVENLABS_API_KEY') and config.get('ELEVENLABS_VOICE_ID'):
+        providers.append(TTSProvider('elevenlabs', get_elevenlabs_service().iter_text_to_speech_stream, 'audio/mpeg'))
+
+    logger.info(f"TTS orchestrator providers: {[p.name for p in providers]}")
+    return TTSOrchestrator(providers)
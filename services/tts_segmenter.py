@@ -0,0 +1,225 @@
+import contextvars
+import hashlib
+import logging
+import re
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+def split_sentences(text, min_chars=12):
+    """Split text into sentences, merging fragments shorter than min_chars into the previous one"""
+    segments = []
+    for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if segments and len(sentence) < min_chars:
+            segments[-1] = f"{segments[-1]} {sentence}"
+        else:
+            segments.append(sentence)
+    return segments
+
+class SegmentCache:
+    """Thread-safe LRU cache of synthesized segments keyed by content hash, bounded by total bytes"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(namespace, text):
+        return hashlib.sha256(f"{namespace}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            audio_data = self._entries.get(key)
+            if audio_data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio_data
+
+    def put(self, key, audio_data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = audio_data
+            self._size += len(audio_data)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+# Shared across services so a sentence synthesized for one reply is reused by the next
+segment_cache = SegmentCache()
+
+class SegmentedSynthesizer:
+    """Synthesizes a reply sentence-by-sentence with bounded parallelism and per-segment caching
+
+    ``synthesize(text, on_response=None)`` must return the audio bytes for a
+    single segment or None, passing any streaming HTTP response it opens to
+    ``on_response``. ``namespace`` separates cache entries for different
+    providers and voices. The pool is shared by every reply the service
+    synthesizes, so it is sized for concurrent calls, not just one reply.
+    """
+
+    def __init__(self, synthesize, namespace, audio_format='wav', max_workers=8, cache=None):
+        self.synthesize = synthesize
+        self.namespace = namespace
+        self.audio_format = audio_format
+        self.cache = cache or segment_cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"tts-{namespace}")
+
+    def iter_segments(self, text, on_response=None):
+        """Yield audio for each sentence in order as soon as it and its predecessors are ready"""
+        futures = [self._submit(segment, on_response) for segment in split_sentences(text)]
+        try:
+            for future in futures:
+                audio_data = future.result()
+                if audio_data is None:
+                    raise RuntimeError("Segment synthesis failed")
+                yield audio_data
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def iter_stream(self, text, on_response=None):
+        """Yield the reply as one continuous clip: cached sentences at once, the rest as the provider finishes them
+
+        WAV segments after the first are sent as bare PCM under a single
+        open-ended header, as streamed WAVs are; MP3 segments are joined
+        frame-wise.
+        """
+        fmt_chunk = None
+        for index, clip in enumerate(self.iter_segments(text, on_response)):
+            if self.audio_format != 'wav':
+                yield clip[:_id3v2_length(clip)] + _mp3_frames(clip) if index == 0 else _mp3_frames(clip)
+                continue
+            clip_fmt, pcm = parse_wav(clip)
+            if fmt_chunk is None:
+                fmt_chunk = clip_fmt
+                yield streaming_wav_header(fmt_chunk) + pcm
+            elif clip_fmt != fmt_chunk:
+                raise ValueError("Cannot stream WAV segments with different formats")
+            else:
+                yield pcm
+
+    def synthesize_text(self, text):
+        """Synthesize all segments and stitch them into one clip; returns None on failure"""
+        try:
+            clips = list(self.iter_segments(text))
+        except Exception as e:
+            logger.error(f"Segmented synthesis failed: {e}")
+            return None
+
+        if not clips:
+            return None
+        if len(clips) == 1:
+            return clips[0]
+        return stitch_wav(clips) if self.audio_format == 'wav' else stitch_mp3(clips)
+
+    def _submit(self, segment, on_response=None):
+        key = SegmentCache.make_key(self.namespace, segment)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _completed(cached)
+        # Carry the request deadline into the worker thread
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self._synthesize_and_cache, key, segment, on_response)
+
+    def _synthesize_and_cache(self, key, segment, on_response=None):
+        audio_data = self.synthesize(segment, on_response=on_response)
+        if audio_data:
+            self.cache.put(key, audio_data)
+        return audio_data
+
+class _completed:
+    """Minimal stand-in for an already-resolved future"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+    def cancel(self):
+        return False
+
+def parse_wav(audio_data):
+    """Return (fmt_chunk, pcm_data) for a RIFF/WAVE clip"""
+    if audio_data[:4] != b'RIFF' or audio_data[8:12] != b'WAVE':
+        raise ValueError("Not a WAV clip")
+
+    fmt_chunk = None
+    offset = 12
+    while offset + 8 <= len(audio_data):
+        chunk_id = audio_data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', audio_data[offset + 4:offset + 8])[0]
+        body_start = offset + 8
+        if chunk_id == b'fmt ':
+            fmt_chunk = audio_data[body_start:body_start + chunk_size]
+        elif chunk_id == b'data':
+            # Streamed WAVs often carry a placeholder size, so clamp to what we actually have
+            return fmt_chunk, audio_data[body_start:body_start + min(chunk_size, len(audio_data) - body_start)]
+        offset = body_start + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV clip has no data chunk")
+
+def wav_header(fmt_chunk, data_size):
+    """Build a RIFF header for a single fmt + data chunk"""
+    return (
+        b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt_chunk) + 8 + data_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+def streaming_wav_header(fmt_chunk):
+    """RIFF header for a WAV of unknown length, sizes set to the maximum as streaming encoders do"""
+    return (
+        b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+        + b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk
+        + b'data' + struct.pack('<I', 0xFFFFFFFF)
+    )
+
+def stitch_wav(clips):
+    """Concatenate WAV clips with identical formats into one clip with a correct header"""
+    fmt_chunk = None
+    pcm_parts = []
+    for clip in clips:
+        clip_fmt, pcm = parse_wav(clip)
+        if fmt_chunk is None:
+            fmt_chunk = clip_fmt
+        elif clip_fmt != fmt_chunk:
+            raise ValueError("Cannot stitch WAV clips with different formats")
+        pcm_parts.append(pcm)
+
+    pcm_data = b''.join(pcm_parts)
+    return wav_header(fmt_chunk, len(pcm_data)) + pcm_data
+
+def _id3v2_length(clip):
+    """Length of a leading ID3v2 tag, or 0"""
+    if clip[:3] != b'ID3' or len(clip) < 10:
+        return 0
+    return 10 + ((clip[6] << 21) | (clip[7] << 14) | (clip[8] << 7) | clip[9])
+
+def _mp3_frames(clip):
+    """Strip the ID3v2 header and ID3v1 trailer so MP3 frames can be concatenated"""
+    start = _id3v2_length(clip)
+    end = len(clip)
+    if end - start >= 128 and clip[end - 128:end - 125] == b'TAG':
+        end -= 128
+    return clip[start:end]
+
+def stitch_mp3(clips):
+    """Concatenate MP3 clips frame-wise, keeping only the first clip's ID3 header"""
+    id3_header = clips[0][:_id3v2_length(clips[0])]
+    return id3_header + b''.join(_mp3_frames(clip) for clip in clips)
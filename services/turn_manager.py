@@ -0,0 +1,188 @@
+import asyncio
+import difflib
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+class TurnManager:
+    """Coordinates LLM generation for a conversation turn.
+
+    Interim transcripts that stay unchanged for ``stability_window`` seconds
+    start a speculative generation. When the final transcript arrives the
+    speculative result is committed if it matches, otherwise it is cancelled
+    and generation restarts from the final text.
+
+    If the expected wait for the reply exceeds ``filler_threshold`` seconds,
+    ``on_filler`` is awaited first so the caller hears an acknowledgement
+    instead of dead air.
+    """
+
+    def __init__(self, generate_response, stability_window=0.3, min_words=3, match_threshold=0.9,
+                 on_filler=None, filler_threshold=0.8):
+        self.generate_response = generate_response  # async callable(text) -> str
+        self.stability_window = stability_window
+        self.min_words = min_words
+        self.match_threshold = match_threshold
+        self.on_filler = on_filler  # async callable() -> None
+        self.filler_threshold = filler_threshold
+
+        # Exponentially weighted average of generation latency, seeded pessimistically
+        self.expected_latency = 1.0
+        self._latency_alpha = 0.3
+
+        self._interim_text = None
+        self._stability_timer = None
+        self._speculative_text = None
+        self._speculative_task = None
+        self._speculative_started_at = None
+
+        self.stats = {
+            'turns': 0,
+            'speculations': 0,
+            'committed': 0,
+            'cancelled': 0,
+            'head_start_seconds': 0.0,
+            'fillers': 0
+        }
+
+    async def on_interim(self, text):
+        """Handle an interim transcript hypothesis"""
+        normalized = self._normalize(text)
+        if not normalized or normalized == self._interim_text:
+            return
+
+        self._interim_text = normalized
+
+        # Hypothesis moved away from what we are speculating on
+        if self._speculative_task and not self._matches(self._speculative_text, normalized):
+            self._cancel_speculation()
+
+        # Restart the stability timer on every change
+        if self._stability_timer:
+            self._stability_timer.cancel()
+
+        if not self._speculative_task and len(normalized.split()) >= self.min_words:
+            loop = asyncio.get_running_loop()
+            self._stability_timer = loop.call_later(
+                self.stability_window, self._start_speculation, normalized, text
+            )
+
+    async def on_final(self, text):
+        """Handle the final transcript and return the response for this turn"""
+        normalized = self._normalize(text)
+        self.stats['turns'] += 1
+
+        if self._stability_timer:
+            self._stability_timer.cancel()
+            self._stability_timer = None
+
+        task = self._speculative_task
+        try:
+            if task and self._matches(self._speculative_text, normalized):
+                # Time the speculation spent generating before the final transcript arrived
+                head_start = time.monotonic() - self._speculative_started_at
+                if not task.done():
+                    await self._maybe_play_filler(self.expected_latency - head_start)
+                try:
+                    response = await task
+                    self.stats['committed'] += 1
+                    self.stats['head_start_seconds'] += head_start
+                    logger.info(f"Committed speculative response ({self.hit_rate:.0%} hit rate)")
+                    return response
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Speculative generation failed, regenerating: {e}")
+            elif task:
+                self._cancel_speculation()
+
+            await self._maybe_play_filler(self.expected_latency)
+            return await self._timed_generate(text)
+        finally:
+            self._reset()
+
+    async def _timed_generate(self, text):
+        started = time.monotonic()
+        response = await self.generate_response(text)
+        self._record_latency(time.monotonic() - started)
+        return response
+
+    def _record_latency(self, seconds):
+        self.expected_latency += self._latency_alpha * (seconds - self.expected_latency)
+
+    async def _maybe_play_filler(self, expected_wait):
+        if not self.on_filler or expected_wait < self.filler_threshold:
+            return
+        try:
+            await self.on_filler()
+            self.stats['fillers'] += 1
+        except Exception as e:
+            logger.warning(f"Error playing filler audio: {e}")
+
+    @property
+    def hit_rate(self):
+        if not self.stats['speculations']:
+            return 0.0
+        return self.stats['committed'] / self.stats['speculations']
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['hit_rate'] = round(self.hit_rate, 3)
+        return stats
+
+    def close(self):
+        """Cancel any outstanding speculative work"""
+        if self._stability_timer:
+            self._stability_timer.cancel()
+        if self._speculative_task:
+            self._cancel_speculation()
+        self._reset()
+
+    def _start_speculation(self, normalized, text):
+        self._stability_timer = None
+        if self._speculative_task or normalized != self._interim_text:
+            return
+
+        logger.debug(f"Starting speculative generation for: {text[:50]}...")
+        self._speculative_text = normalized
+        self._speculative_started_at = time.monotonic()
+        self._speculative_task = asyncio.ensure_future(self._timed_generate(text))
+        self._speculative_task.add_done_callback(self._consume_result)
+        self.stats['speculations'] += 1
+
+    def _cancel_speculation(self):
+        if self._speculative_task and not self._speculative_task.done():
+            self._speculative_task.cancel()
+        self._speculative_task = None
+        self._speculative_text = None
+        self._speculative_started_at = None
+        self.stats['cancelled'] += 1
+
+    @staticmethod
+    def _consume_result(task):
+        # Retrieve exceptions from discarded speculations so they are not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def _reset(self):
+        self._interim_text = None
+        self._stability_timer = None
+        self._speculative_text = None
+        self._speculative_task = None
+        self._speculative_started_at = None
+
+    def _matches(self, speculative, final):
+        if not speculative or not final:
+            return False
+        if speculative == final:
+            return True
+        ratio = difflib.SequenceMatcher(None, speculative.split(), final.split()).ratio()
+        return ratio >= self.match_threshold
+
+    @staticmethod
+    def _normalize(text):
+        if not text:
+            return ''
+        return re.sub(r"[^\w\s']", '', text.lower()).strip()
@@ -1,5 +1,5 @@
 from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse
+from twilio.twiml.voice_response import VoiceResponse, Connect
 from flask import current_app
 import logging
 
@@ -26,13 +26,21 @@ class TwilioService:
             response = VoiceResponse()
             base_url = current_app.config.get('BASE_URL', 'https://voiceai-eh24.onrender.com')
             
+            if current_app.config.get('VOICE_MEDIA_STREAMING'):
+                # The media stream handler greets the caller and runs the whole conversation
+                connect = Connect()
+                connect.stream(url=self.media_stream_url(base_url))
+                response.append(connect)
+                return str(response)
+            
             # Try to use Deepgram Aura 2 - Amalthea voice for greeting
             greeting_text = "Hello! thank you for calling Palm Beach Maids how can i help you?"
             
             try:
                 from services.deepgram_service import DeepgramService
-                deepgram_service = DeepgramService()
-                greeting_url = deepgram_service.text_to_speech_url(greeting_text)
+                from services.registry import client_registry
+                deepgram_service = client_registry.get('deepgram', DeepgramService)
+                greeting_url = deepgram_service.text_to_speech_stream_url(greeting_text)
                 
                 if greeting_url:
                     logger.info(f"Using Deepgram Aura Amalthea voice greeting for call {call_sid}")
@@ -67,6 +75,12 @@ class TwilioService:
             response.say("Hello! Thank you for calling.", voice='Polly.Joanna')
             return str(response)
     
+    @staticmethod
+    def media_stream_url(base_url):
+        """WebSocket URL of the app's /media-stream route for a given BASE_URL"""
+        scheme, _, rest = base_url.partition('://')
+        return f"{'ws' if scheme == 'http' else 'wss'}://{rest.rstrip('/')}/media-stream"
+    
     def handle_conference_call(self, call_sid, participants):
         """Set up conference call for monitoring human-to-human conversations"""
         try:
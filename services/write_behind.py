@@ -0,0 +1,176 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert, update
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """Buffers per-turn writes and flushes them to the database in batches
+
+    Webhooks queue Transcript/Interaction rows and call-status updates here
+    instead of committing. A background thread flushes them with multi-row
+    inserts when ``max_rows`` rows are waiting, every ``flush_interval``
+    seconds, and as soon as a call ends. Call updates are coalesced per
+    call, so only the latest value of each field is written.
+
+    Durability: while the database is reachable a row is in memory only
+    until the next flush (at most ``flush_interval`` seconds), and a clean
+    shutdown flushes everything via atexit. A failed flush keeps its rows and
+    is retried every cycle; if the database stays unreachable for longer
+    than ``max_outage`` seconds the buffer is logged and dropped. A hard
+    crash (SIGKILL, OOM) loses whatever is buffered at the time: one flush
+    interval normally, the whole outage so far during one. Readers may see a
+    turn up to ``flush_interval`` seconds late; call ``flush`` first when a
+    request must read what it just wrote. When ``max_buffered`` rows are
+    waiting, writers flush inline instead of growing the buffer further,
+    unless flushes are already failing.
+    """
+
+    def __init__(self, max_rows=200, flush_interval=1.0, max_buffered=5000, max_outage=300.0):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.max_outage = max_outage
+        self.app = None
+        self._rows = {}  # model -> [values]
+        self._call_updates = {}  # call_sid -> {field: value}
+        self._buffered = 0
+        self._failing_since = None  # monotonic time of the first failed flush in a row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self.stats = {'rows': 0, 'call_updates': 0, 'flushes': 0, 'failed_flushes': 0, 'dropped': 0, 'inline_flushes': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.max_rows = app.config.get('WRITE_BEHIND_MAX_ROWS', self.max_rows)
+        self.flush_interval = app.config.get('WRITE_BEHIND_FLUSH_SECONDS', self.flush_interval)
+        self.max_outage = app.config.get('WRITE_BEHIND_MAX_OUTAGE_SECONDS', self.max_outage)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def add(self, model, **values):
+        """Queue a row insert for model; stamps its timestamp now rather than at flush time"""
+        if 'timestamp' in model.__table__.columns and 'timestamp' not in values:
+            values['timestamp'] = datetime.utcnow()
+        with self._lock:
+            self._rows.setdefault(model, []).append(values)
+            self._buffered += 1
+            buffered = self._buffered
+        self._after_write(buffered)
+
+    def update_call(self, call_sid, **fields):
+        """Queue field updates for a call; later values for the same field win"""
+        with self._lock:
+            self._call_updates.setdefault(call_sid, {}).update(fields)
+            self._buffered += 1
+            buffered = self._buffered
+        self._after_write(buffered)
+
+    def end_call(self, call_sid):
+        """Flush soon: the call is over and the dashboard should see all of it"""
+        self._wake.set()
+
+    def _after_write(self, buffered):
+        if buffered >= self.max_buffered and self._failing_since is None:
+            # Backpressure: the database is falling behind, so this writer pays for a flush
+            self.stats['inline_flushes'] += 1
+            self.flush()
+        elif buffered >= self.max_rows:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush loop error: {e}")
+
+    def flush(self):
+        """Write everything buffered so far in one transaction"""
+        if self.app is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, {}
+                call_updates, self._call_updates = self._call_updates, {}
+                self._buffered = 0
+            if not rows and not call_updates:
+                return
+
+            started = time.monotonic()
+            try:
+                with self.app.app_context():
+                    from models import db, Call
+                    with db.engine.begin() as connection:
+                        for model, values in rows.items():
+                            # executemany needs uniform keys; SQLAlchemy batches each group into multi-row INSERTs
+                            for batch in _group_by_keys(values):
+                                connection.execute(insert(model), batch)
+                        for call_sid, fields in call_updates.items():
+                            connection.execute(update(Call).where(Call.call_sid == call_sid).values(**fields))
+            except Exception as e:
+                self._requeue(rows, call_updates, e)
+                return
+
+            self._failing_since = None
+            row_count = sum(len(values) for values in rows.values())
+            self.stats['flushes'] += 1
+            self.stats['rows'] += row_count
+            self.stats['call_updates'] += len(call_updates)
+            logger.debug(f"Flushed {row_count} rows and {len(call_updates)} call updates "
+                         f"in {time.monotonic() - started:.3f}s")
+
+    def _requeue(self, rows, call_updates, error):
+        now = time.monotonic()
+        if self._failing_since is None:
+            self._failing_since = now
+        self.stats['failed_flushes'] += 1
+        row_count = sum(len(values) for values in rows.values())
+        failing_for = now - self._failing_since
+        if failing_for >= self.max_outage:
+            self._failing_since = None
+            self.stats['dropped'] += row_count
+            logger.error(f"Dropping {row_count} rows and {len(call_updates)} call updates "
+                         f"after {failing_for:.0f}s of failed flushes: {error}")
+            return
+
+        logger.warning(f"Write-behind flush failing for {failing_for:.0f}s "
+                       f"(dropping after {self.max_outage:.0f}s), will retry: {error}")
+        with self._lock:
+            # Put the batch back ahead of anything queued meanwhile, keeping newer call updates on top
+            for model, values in rows.items():
+                self._rows[model] = values + self._rows.get(model, [])
+            for call_sid, fields in call_updates.items():
+                self._call_updates[call_sid] = dict(fields, **self._call_updates.get(call_sid, {}))
+            self._buffered += row_count + len(call_updates)
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final write-behind flush failed: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, buffered=self._buffered)
+
+def _group_by_keys(rows):
+    groups = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return groups.values()
+
+# Shared per-process buffer; create_app calls init_app
+write_behind = WriteBehindBuffer()
@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import logging
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from utils.latency import get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+# Blocking provider SDK calls made from the asyncio media server run here.
+# The pool is bounded so a burst of slow calls queues instead of spawning a
+# thread per stream; queueing time is tracked to show when it needs to grow.
+PROVIDER_EXECUTOR_WORKERS = int(os.environ.get('PROVIDER_EXECUTOR_WORKERS') or 32)
+
+_executor = ThreadPoolExecutor(max_workers=PROVIDER_EXECUTOR_WORKERS, thread_name_prefix='provider-io')
+_queue_wait = get_latency_tracker('executor.provider_io.queue_wait')
+
+# CPU-bound audio batches (recording analysis) go to a per-process pool of
+# worker processes when the media server configures one, so they don't hold
+# the GIL the event loop needs; without one they share the provider executor.
+_cpu_executor = None
+_cpu_workers = 0
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the provider executor without stalling the event loop
+
+    The caller's contextvars (request deadline included) are carried over to
+    the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    submitted = time.monotonic()
+
+    def run():
+        _queue_wait.record(time.monotonic() - submitted)
+        return context.run(func, *args, **kwargs)
+
+    return await loop.run_in_executor(_executor, run)
+
+def configure_cpu_pool(workers):
+    """Use ``workers`` processes for run_cpu_bound in this process; 0 keeps it on threads
+
+    The pool starts on first use, so each forked media worker gets its own.
+    Green-thread processes stay on threads: a forked worker would inherit the
+    hub and carry on running copies of the parent's green threads.
+    """
+    global _cpu_workers
+    from utils.cooperative import concurrency_mode
+    mode = concurrency_mode()
+    if workers and mode != 'threading':
+        logger.warning(f"Not starting a CPU pool under {mode}; CPU-heavy audio work runs on threads")
+        workers = 0
+    _cpu_workers = max(0, int(workers))
+
+async def run_cpu_bound(func, *args):
+    """Run a CPU-heavy, picklable call off the event loop on the CPU pool"""
+    global _cpu_executor
+    if not _cpu_workers:
+        return await run_blocking(func, *args)
+    if _cpu_executor is None:
+        _cpu_executor = ProcessPoolExecutor(max_workers=_cpu_workers)
+    return await asyncio.get_running_loop().run_in_executor(_cpu_executor, func, *args)
+
+def shutdown_cpu_pool():
+    """Stop the CPU pool; a multiprocessing child must do this before exiting or it waits on the pool forever"""
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown()
+        _cpu_executor = None
+
+def cpu_pool_seconds():
+    """CPU seconds used so far by this process's CPU pool workers, which process_time() leaves out
+
+    Exited workers are counted through RUSAGE_CHILDREN; live ones are read
+    from /proc, so on systems without it only exited workers count.
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    total = usage.ru_utime + usage.ru_stime
+    processes = getattr(_cpu_executor, '_processes', None) or {}
+    ticks = os.sysconf('SC_CLK_TCK') if processes else 1
+    for pid in list(processes):
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                # utime and stime are fields 14 and 15; the command name before them may contain spaces
+                fields = stat.read().rsplit(')', 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
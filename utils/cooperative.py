@@ -0,0 +1,119 @@
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Standard library modules a green-thread server needs patched. Every provider
+# client here is pure Python over these - requests/urllib3 (Twilio, CRM,
+# ElevenLabs, Deepgram TTS), httpx (OpenAI, Deepgram SDK) and httplib2
+# (Google Calendar) - so they yield to the hub once socket and ssl are patched.
+REQUIRED_PATCHES = ('socket', 'select', 'thread', 'time')
+
+# Imported before patching: trio (pulled in by httpcore, under the OpenAI client,
+# whenever it is installed) builds an epoll I/O manager at import time, and
+# eventlet's green select has no epoll. Sync HTTP never runs on trio.
+IMPORT_BEFORE_PATCH = ('trio',)
+
+def default_concurrency(database_url=None):
+    """Serve on eventlet only with Postgres, whose driver psycogreen makes yield; sqlite would run on the hub"""
+    scheme = (database_url or 'sqlite').split(':', 1)[0]
+    return 'eventlet' if scheme.startswith('postgres') else 'threading'
+
+def monkey_patch(mode):
+    """Patch the standard library for mode ('eventlet' or 'gevent'); must run before anything else is imported"""
+    if mode in ('eventlet', 'gevent'):
+        for module in IMPORT_BEFORE_PATCH:
+            try:
+                __import__(module)
+            except ImportError:
+                pass
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    elif mode not in ('threading', 'sync'):
+        raise ValueError(f"Unknown server concurrency mode: {mode}")
+    patch_database_driver()
+
+def _is_patched(module):
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher
+        if patcher.is_monkey_patched(module):
+            return 'eventlet'
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('_thread' if module == 'thread' else module):
+            return 'gevent'
+    return None
+
+def concurrency_mode():
+    """'eventlet' or 'gevent' when the process was monkey-patched for green threads, else 'threading'"""
+    return _is_patched('socket') or 'threading'
+
+def interrupt_main():
+    """Stop the server as Ctrl-C would, from any thread: KeyboardInterrupt in the main thread or greenlet"""
+    mode = concurrency_mode()
+    if mode == 'eventlet':
+        # A signal would land in whichever green thread is running; the hub's parent is the main greenlet
+        from eventlet import hubs
+        hub = hubs.get_hub()
+        hub.schedule_call_global(0, hub.greenlet.parent.throw, KeyboardInterrupt)
+    elif mode == 'gevent':
+        import gevent
+        hub = gevent.get_hub()
+        hub.loop.run_callback(hub.parent.throw, KeyboardInterrupt)
+    else:
+        import _thread
+        _thread.interrupt_main()
+
+def patch_database_driver():
+    """Make psycopg2 yield to the hub while waiting on Postgres, when psycogreen is available"""
+    mode = concurrency_mode()
+    if mode == 'threading':
+        return False
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return False
+    try:
+        if mode == 'eventlet':
+            from psycogreen.eventlet import patch_psycopg
+        else:
+            from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return False
+    patch_psycopg()
+    return True
+
+def green_safety_report(database_uri=None):
+    """Check that this process can serve cooperatively without a call blocking every green thread
+
+    Returns the mode, which required modules are patched, and warnings for
+    anything that would still block the hub.
+    """
+    mode = concurrency_mode()
+    report = {'mode': mode, 'pid': os.getpid(), 'patched': {}, 'warnings': []}
+    if mode == 'threading':
+        return report
+
+    for module in REQUIRED_PATCHES:
+        patched = _is_patched(module) is not None
+        report['patched'][module] = patched
+        if not patched:
+            report['warnings'].append(f"{module} is not monkey-patched; calls through it block every green thread")
+
+    scheme = (database_uri or '').split(':', 1)[0]
+    if scheme.startswith('postgres'):
+        try:
+            from psycopg2 import extensions
+            green = extensions.get_wait_callback() is not None
+        except ImportError:
+            green = False
+        if not green:
+            report['warnings'].append("psycopg2 has no wait callback; install psycogreen so queries yield to the hub")
+    elif scheme.startswith('sqlite'):
+        report['warnings'].append("sqlite queries run on the hub; a locked database stalls every green thread until its busy timeout")
+    return report
@@ -0,0 +1,72 @@
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+class Deadline:
+    """Absolute time budget for a request, shared by every call made on its behalf"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def allows(self, seconds):
+        """True if at least ``seconds`` of budget are left"""
+        return self.remaining() >= seconds
+
+    def cap(self, timeout):
+        """Cap a per-call timeout by the remaining budget"""
+        return min(timeout, self.remaining())
+
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+def current_deadline():
+    """Return the Deadline for the current request, or None outside a deadline scope"""
+    return _current_deadline.get()
+
+def cap_timeout(timeout):
+    """Cap timeout by the current deadline, if any"""
+    deadline = current_deadline()
+    return deadline.cap(timeout) if deadline else timeout
+
+def has_budget(seconds):
+    """True outside a deadline scope, or if at least ``seconds`` remain"""
+    deadline = current_deadline()
+    return deadline is None or deadline.allows(seconds)
+
+@contextmanager
+def deadline_scope(budget):
+    """Run the enclosed block under a deadline; nested scopes can only shorten it"""
+    outer = current_deadline()
+    deadline = Deadline(budget)
+    if outer and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+def with_deadline(f):
+    """Decorator for Twilio webhooks: run the handler under WEBHOOK_DEADLINE_SECONDS"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        budget = current_app.config.get('WEBHOOK_DEADLINE_SECONDS', 12)
+        started = time.monotonic()
+        with deadline_scope(budget) as deadline:
+            result = f(*args, **kwargs)
+            if deadline.expired:
+                logger.warning(f"{f.__name__} overran its {budget}s budget ({time.monotonic() - started:.2f}s)")
+            return result
+    return decorated_function
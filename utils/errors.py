@@ -43,6 +43,45 @@ class CRMError(VoiceAIError):
     def __init__(self, message, status_code=503):
         super().__init__(message, status_code)
 
+    def __str__(self):
+        return self.message
+
+class CircuitOpenError(VoiceAIError):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+    def __init__(self, operation, status_code=503):
+        super().__init__(f"Circuit open for {operation}", status_code)
+        self.operation = operation
+
+    def __str__(self):
+        return self.message
+
+class DeadlineExceededError(VoiceAIError):
+    """Raised instead of calling a provider when the request has too little budget left"""
+    def __init__(self, operation, status_code=504):
+        super().__init__(f"Deadline too close for {operation}", status_code)
+        self.operation = operation
+
+    def __str__(self):
+        return self.message
+
+class RecordingNotReadyError(VoiceAIError):
+    """Raised when Twilio has not finished processing a recording yet"""
+    def __init__(self, recording_url, status_code=404):
+        super().__init__(f"Recording not ready: {recording_url}", status_code)
+        self.recording_url = recording_url
+
+    def __str__(self):
+        return self.message
+
+class SummaryPendingError(VoiceAIError):
+    """Raised by a job that has to wait for the call's summary job to finish"""
+    def __init__(self, call_id, status_code=409):
+        super().__init__(f"Summary still pending for call {call_id}", status_code)
+        self.call_id = call_id
+
+    def __str__(self):
+        return self.message
+
 def handle_errors(app):
     """Register error handlers with Flask app"""
     
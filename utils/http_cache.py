@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+class _Entry:
+    __slots__ = ('body', 'etag', 'gzip_body', 'gzip_etag', 'mimetype', 'expires_at')
+
+    def __init__(self, body, mimetype, ttl, min_compress_size):
+        self.body = body
+        self.mimetype = mimetype
+        digest = hashlib.sha1(body).hexdigest()
+        self.etag = digest
+        # Each encoding is its own representation, so it gets its own strong validator
+        if len(body) >= min_compress_size:
+            self.gzip_body = gzip.compress(body, compresslevel=6)
+            self.gzip_etag = f"{digest}-gzip"
+        else:
+            self.gzip_body = self.gzip_etag = None
+        self.expires_at = time.monotonic() + ttl
+
+class ResponseCache:
+    """Short-lived cache of rendered JSON responses, shared by every client of the process
+
+    ``cached`` views are rendered at most once per ``ttl`` seconds for each
+    path and query string, however many dashboards poll them. Concurrent misses
+    for one key wait for a single render. Every response carries a strong
+    ETag derived from its body, so an unchanged result answers
+    ``If-None-Match`` with 304 even after it is re-rendered. Bodies of
+    ``min_compress_size`` bytes or more are gzipped once, when stored, and
+    that copy goes to clients that accept gzip. Only 200 responses are
+    stored, and ``ttl`` 0 turns storage off but keeps ETags and compression.
+    """
+
+    def __init__(self, ttl=2.0, max_entries=256, min_compress_size=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'gzipped': 0, 'bytes_sent': 0}
+
+    def init_app(self, app):
+        self.ttl = app.config.get('DASHBOARD_CACHE_SECONDS', self.ttl)
+        self.min_compress_size = app.config.get('HTTP_GZIP_MIN_BYTES', self.min_compress_size)
+
+    def cached(self, ttl=None):
+        """Decorator for GET views returning JSON; goes inside the auth decorator"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                entry_ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+
+                entry = self._get(key)
+                if entry is not None:
+                    self.stats['hits'] += 1
+                    return self._respond(entry, 'HIT')
+
+                with self._key_lock(key):
+                    # Another request may have rendered it while we waited
+                    entry = self._get(key)
+                    if entry is not None:
+                        self.stats['hits'] += 1
+                        return self._respond(entry, 'HIT')
+
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or not response.is_json:
+                        return response
+                    self.stats['misses'] += 1
+                    entry = _Entry(response.get_data(), response.mimetype, entry_ttl, self.min_compress_size)
+                    if entry_ttl > 0:
+                        self._put(key, entry)
+                return self._respond(entry, 'MISS')
+            return wrapper
+        return decorator
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                if len(self._key_locks) > self.max_entries * 4:
+                    # Locks of long-gone query strings; one being waited on just stops deduplicating
+                    self._key_locks.clear()
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _respond(self, entry, outcome):
+        use_gzip = entry.gzip_body is not None and request.accept_encodings['gzip'] > 0
+        etag = entry.gzip_etag if use_gzip else entry.etag
+
+        if request.if_none_match.contains(entry.etag) or (entry.gzip_etag and request.if_none_match.contains(entry.gzip_etag)):
+            self.stats['not_modified'] += 1
+            response = make_response('', 304)
+        else:
+            response = make_response(entry.gzip_body if use_gzip else entry.body)
+            response.mimetype = entry.mimetype
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+                self.stats['gzipped'] += 1
+            self.stats['bytes_sent'] += response.content_length or 0
+
+        response.set_etag(etag)
+        # Behind basic auth: browsers may keep it, but must revalidate before every use
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Accept-Encoding')
+        response.vary.add('Authorization')
+        response.headers['X-Cache'] = outcome
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            entries = len(self._entries)
+        return dict(self.stats, entries=entries, ttl=self.ttl)
+
+# Shared per-process response cache; create_app calls init_app
+response_cache = ResponseCache()
@@ -0,0 +1,132 @@
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.deadline import current_deadline
+from utils.latency import get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+# What requests itself uses for max_retries=0: no retries of any kind
+NO_RETRIES = Retry(0, read=False)
+
+class DeadlineAwareAdapter(HTTPAdapter):
+    """HTTPAdapter that doesn't retry inside a request deadline
+
+    Each retry would get the whole per-call timeout again, and that timeout
+    was already capped to the remaining budget by ResilientOperation. Under
+    a deadline the resilience layer decides what to do about a failure.
+    """
+
+    @property
+    def max_retries(self):
+        return NO_RETRIES if current_deadline() else self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value):
+        self._max_retries = value
+
+class HTTPTransport:
+    """Process-wide pooled HTTP client shared by every outbound provider call
+
+    One requests.Session with keep-alive pools per host (``pool_maxsize``
+    connections retained per host), so TCP+TLS setup is paid once per
+    connection instead of once per request. Outside a request deadline
+    (background jobs, warm-up), connection failures are retried for every
+    method and read/status failures only for idempotent ones. Calls under a
+    deadline are never retried here.
+    Response timings (time to headers) are recorded per host and passed to
+    any registered timing hooks.
+    """
+
+    def __init__(self, pool_connections=16, pool_maxsize=32, retries=None):
+        self._hooks = []
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        # Provider APIs are stateless - never carry cookies between callers
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.hooks['response'].append(self._on_response)
+
+        retries = retries or Retry(
+            total=2,
+            connect=2,
+            read=1,
+            status=1,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+        adapter = DeadlineAwareAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def add_timing_hook(self, hook):
+        """Register hook(host, method, status_code, elapsed_seconds) for every response"""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def prewarm(self, urls, timeout=5):
+        """Open pooled connections (TCP+TLS) to each URL's host ahead of the first real request"""
+        def warm(url):
+            try:
+                self.session.head(url, timeout=timeout, allow_redirects=False).close()
+                return True
+            except Exception as e:
+                logger.warning(f"Could not pre-warm connection to {url}: {e}")
+                return False
+
+        if not urls:
+            return 0
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            warmed = sum(executor.map(warm, urls))
+        logger.info(f"Pre-warmed {warmed}/{len(urls)} provider connections")
+        return warmed
+
+    def close(self):
+        self.session.close()
+
+    def _on_response(self, response, *args, **kwargs):
+        host = urlparse(response.url).netloc
+        elapsed = response.elapsed.total_seconds()
+        get_latency_tracker(f"http.{host}").record(elapsed)
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(host, response.request.method, response.status_code, elapsed)
+            except Exception as e:
+                logger.error(f"Error in HTTP timing hook: {e}")
+
+def abort_response(response):
+    """Cut off a streaming response that another thread may be blocked reading
+
+    Response.close() from a second thread neither wakes a blocked read nor is
+    safe against it; shutting the socket down makes the reader fail at once,
+    and it then closes the response itself.
+    """
+    connection = getattr(getattr(response, 'raw', None), '_connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is None:
+        return False
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        return False
+    return True
+
+# Process-wide transport; services must use this instead of calling requests directly
+http_transport = HTTPTransport()
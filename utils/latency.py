@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+
+class LatencyTracker:
+    """Rolling window of observed latencies (in seconds) with percentile lookups"""
+
+    def __init__(self, name, window=200):
+        self.name = name
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    @property
+    def count(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percent, default=None, min_samples=10):
+        """Return the given percentile, or default until enough samples have been seen"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return default
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'p50': self.percentile(50, min_samples=1),
+            'p95': self.percentile(95, min_samples=1),
+            'p99': self.percentile(99, min_samples=1)
+        }
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def get_latency_tracker(name):
+    """Return the process-wide tracker for name, creating it on first use"""
+    with _trackers_lock:
+        tracker = _trackers.get(name)
+        if tracker is None:
+            tracker = _trackers[name] = LatencyTracker(name)
+        return tracker
+
+def latency_snapshot():
+    with _trackers_lock:
+        trackers = list(_trackers.values())
+    return {tracker.name: tracker.snapshot() for tracker in trackers}
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from utils.deadline import current_deadline
+from utils.errors import CircuitOpenError, DeadlineExceededError
+from utils.latency import get_latency_tracker
+
+logger = logging.getLogger(__name__)
+
+_listeners = []
+
+def on_breaker_change(listener):
+    """Call listener(name, state) whenever a circuit breaker opens or closes"""
+    _listeners.append(listener)
+
+def _notify(name, state):
+    for listener in list(_listeners):
+        try:
+            listener(name, state)
+        except Exception as e:
+            logger.error(f"Circuit breaker listener failed for {name}: {e}")
+
+# Client errors that still say something about the provider: it timed us out or is shedding load
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+def is_client_error(error):
+    """True for a 4xx response error other than 408/429: the request was wrong, the provider is fine
+
+    Covers requests/httpx errors (``error.response.status_code``) and SDK
+    errors carrying ``status_code`` (OpenAI, ElevenLabs).
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in RETRYABLE_CLIENT_STATUSES
+
+class CircuitBreaker:
+    """Per-provider/operation circuit breaker with half-open probing
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets a single probe
+    through (half-open); success closes it, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            closed = self._state != self.CLOSED
+            if closed:
+                logger.info(f"Circuit breaker {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+        if closed:
+            _notify(self.name, self.CLOSED)
+
+    def release(self):
+        """Record neither success nor failure, freeing the half-open probe slot"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        opened = False
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state == self.CLOSED:
+                    opened = True
+                    logger.warning(f"Circuit breaker {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+        if opened:
+            _notify(self.name, self.OPEN)
+
+class ResilientOperation:
+    """Circuit breaker plus a timeout derived from observed latency for one provider operation
+
+    The timeout is ``headroom`` times the p99 of recent successful calls,
+    clamped to [min_timeout, max_timeout], and ``default_timeout`` until
+    enough samples have been collected. Inside a request deadline the
+    timeout is further capped by the remaining budget, and the call is
+    skipped entirely when less than ``min_timeout`` remains.
+    """
+
+    def __init__(self, name, default_timeout=10.0, min_timeout=1.0, max_timeout=30.0, headroom=2.0,
+                 failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.headroom = headroom
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.latency = get_latency_tracker(name)
+
+    @property
+    def timeout(self):
+        p99 = self.latency.percentile(99, min_samples=20)
+        if p99 is None:
+            return self.default_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.headroom))
+
+    @contextmanager
+    def attempt(self):
+        """Yield the timeout to use; raises without calling out when the breaker is open or the deadline is too close"""
+        timeout = self.timeout
+        capped = False
+        deadline = current_deadline()
+        if deadline:
+            if not deadline.allows(self.min_timeout):
+                raise DeadlineExceededError(self.name)
+            capped = deadline.remaining() < timeout
+            timeout = deadline.cap(timeout)
+
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.name)
+
+        started = time.monotonic()
+        try:
+            yield timeout
+        except Exception as e:
+            if capped or is_client_error(e):
+                # Failing under a budget-shortened timeout, or on a request the provider
+                # rejected as malformed, says nothing about the provider's health
+                self.breaker.release()
+            else:
+                self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (e.g. a discarded speculative turn) - not a provider failure
+            self.breaker.release()
+            raise
+        self.latency.record(time.monotonic() - started)
+        self.breaker.record_success()
+
+    def call(self, func):
+        """Run func(timeout) under the breaker"""
+        with self.attempt() as timeout:
+            return func(timeout)
+
+    def snapshot(self):
+        return {
+            'state': self.breaker.state,
+            'timeout': round(self.timeout, 3),
+            'samples': self.latency.count
+        }
+
+_operations = {}
+_operations_lock = threading.Lock()
+
+def get_operation(name, **kwargs):
+    """Return the process-wide ResilientOperation for name; kwargs only apply on first use"""
+    with _operations_lock:
+        operation = _operations.get(name)
+        if operation is None:
+            operation = _operations[name] = ResilientOperation(name, **kwargs)
+        return operation
+
+def resilience_snapshot():
+    with _operations_lock:
+        operations = list(_operations.values())
+    return {operation.name: operation.snapshot() for operation in operations}
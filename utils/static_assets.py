@@ -0,0 +1,129 @@
+import mimetypes
+import os
+import re
+import threading
+import time
+from flask import request, send_file
+
+# Vite writes bundled files to assets/ as <name>-<content hash>.<ext>, so their bytes never change;
+# files copied from public/ keep their names and aren't hashed
+HASHED_ASSET = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+class _Asset:
+    __slots__ = ('path', 'mimetype', 'etag', 'mtime', 'gzip_path', 'gzip_etag', 'immutable')
+
+    def __init__(self, path, relative, stat, gzip_path=None):
+        self.path = path
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.mtime = stat.st_mtime
+        self.etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        self.gzip_path = gzip_path
+        self.gzip_etag = f"{self.etag}-gzip" if gzip_path else None
+        self.immutable = bool(HASHED_ASSET.match(relative))
+
+class StaticAssets:
+    """Serves the built frontend from an in-memory index of its dist directory
+
+    The tree is walked once, and again only when one of its directories
+    changes (checked at most every ``rescan_interval`` seconds), so lookups
+    don't touch the filesystem. A ``.gz`` file written by build_frontend.py
+    next to an asset is sent instead of it to clients that accept gzip.
+    Content-hashed assets are cached by browsers for a year as immutable;
+    everything else, index.html included, is revalidated with its ETag.
+    Paths that aren't files get index.html for client-side routing, unless
+    they look like a file, which gets a 404 instead of HTML.
+    """
+
+    def __init__(self, root=None, rescan_interval=2.0):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self._assets = {}
+        self._directories = None  # directory -> mtime at the last scan
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.root = os.path.join(app.root_path, app.config.get('FRONTEND_DIST_DIR', 'demo/dist'))
+
+    def _scan(self):
+        assets, directories = {}, {self.root: os.stat(self.root).st_mtime_ns}
+        for directory, _, files in os.walk(self.root):
+            directories[directory] = os.stat(directory).st_mtime_ns
+            names = set(files)
+            for name in files:
+                if name.endswith('.gz') and name[:-3] in names:
+                    continue
+                path = os.path.join(directory, name)
+                gzip_path = path + '.gz' if name + '.gz' in names else None
+                relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+                assets[relative] = _Asset(path, relative, os.stat(path), gzip_path)
+        return assets, directories
+
+    def _changed(self):
+        if self._directories is None:
+            return True
+        try:
+            # Adding, removing or replacing a file changes its directory's mtime
+            return any(os.stat(directory).st_mtime_ns != mtime for directory, mtime in self._directories.items())
+        except OSError:
+            return True
+
+    def _index(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.rescan_interval:
+            return self._assets
+        with self._lock:
+            if now - self._checked_at >= self.rescan_interval:
+                if self._changed():
+                    try:
+                        self._assets, self._directories = self._scan()
+                    except OSError:
+                        # Not built yet, or being rebuilt right now
+                        self._assets, self._directories = {}, None
+                self._checked_at = now
+            return self._assets
+
+    @property
+    def built(self):
+        return 'index.html' in self._index()
+
+    def lookup(self, path):
+        """The asset to serve for a request path, or None for a 404"""
+        assets = self._index()
+        asset = assets.get(path.strip('/') or 'index.html')
+        if asset is None and '.' not in path.rsplit('/', 1)[-1]:
+            asset = assets.get('index.html')
+        return asset
+
+    def send(self, asset):
+        use_gzip = asset.gzip_path is not None and request.accept_encodings['gzip'] > 0
+        response = send_file(
+            asset.gzip_path if use_gzip else asset.path,
+            mimetype=asset.mimetype,
+            etag=asset.gzip_etag if use_gzip else asset.etag,
+            last_modified=asset.mtime,
+            max_age=IMMUTABLE_MAX_AGE if asset.immutable else None,
+            conditional=True
+        )
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        if asset.gzip_path is not None:
+            response.vary.add('Accept-Encoding')
+        if asset.immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    def snapshot(self):
+        assets = self._index()
+        return {
+            'files': len(assets),
+            'precompressed': sum(1 for asset in assets.values() if asset.gzip_path),
+            'immutable': sum(1 for asset in assets.values() if asset.immutable)
+        }
+
+# Index of the built frontend; create_app calls init_app
+static_assets = StaticAssets()
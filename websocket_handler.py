@@ -4,46 +4,108 @@ WebSocket handler for Twilio-Deepgram real-time voice streaming
 Based on Deepgram's official Twilio integration documentation
 """
 
-import asyncio
 import websockets
 import json
 import base64
 import logging
-from flask import current_app
+import os
+from flask import Flask, current_app
+from config import Config
+from models import db
+from services.call_analytics import analyze_recording, store_call_analytics
+from services.call_recorder import CallRecorder, recording_path
 from services.deepgram_service import DeepgramService
 from services.openai_service import OpenAIService
+from services.registry import client_registry, register_app_services
+from services.job_queue import job_queue
+from services.transcription_jobs import enqueue_transcription
+from services.media_session import SessionManager
+from services.turn_manager import TurnManager
+from services.filler_audio import filler_bank
+from services.live_events import live_events
+from utils.blocking import run_blocking, run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
+# Admission limit for concurrent media streams in this process
+MEDIA_MAX_SESSIONS = Config.MEDIA_MAX_SESSIONS
+
 class TwilioDeepgramHandler:
-    def __init__(self):
+    """Serves every media stream in the process; per-call state lives in a MediaSession"""
+    
+    def __init__(self, max_sessions=MEDIA_MAX_SESSIONS, app=None):
+        self.app = app  # for database work after a call; optional
         self.deepgram_service = None
         self.openai_service = None
-        self.call_sid = None
-        self.conversation_context = []
+        self.sessions = SessionManager(max_sessions=max_sessions)
         
-    async def handle_twilio_stream(self, websocket, path):
+    async def handle_twilio_stream(self, websocket, path=None):
         """Handle incoming WebSocket connection from Twilio"""
-        logger.info(f"New WebSocket connection: {path}")
+        session = self.sessions.admit(websocket)
+        if session is None:
+            # 1013: try again later
+            reason = "Media server draining" if self.sessions.draining else "Media server at capacity"
+            await websocket.close(code=1013, reason=reason)
+            return
+        
+        logger.info(f"New WebSocket connection {session.session_id} ({self.sessions.active} active)")
+        session.turn_manager = TurnManager(self.generate_ai_response, on_filler=lambda: self.send_filler(session))
         
         try:
-            # Initialize services
-            self.deepgram_service = DeepgramService()
-            self.openai_service = OpenAIService()
-            
-            # Send initial greeting
-            await self.send_greeting(websocket)
+            # Shared per-process clients - nothing is constructed per connection
+            self.deepgram_service = client_registry.get('deepgram', DeepgramService)
+            self.openai_service = client_registry.get('openai', OpenAIService)
             
             # Handle incoming messages
             async for message in websocket:
-                await self.process_twilio_message(websocket, message)
+                await self.process_twilio_message(session, message)
                 
         except websockets.exceptions.ConnectionClosed:
-            logger.info(f"WebSocket connection closed for {self.call_sid}")
+            logger.info(f"WebSocket connection closed for {session.call_sid}")
         except Exception as e:
             logger.error(f"Error in WebSocket handler: {e}")
+        finally:
+            self.sessions.release(session)
+            if session.recorder:
+                await self.analyze_recording(session)
+    
+    async def analyze_recording(self, session):
+        """Post-call stage: precompute waveform peaks and talk-time analytics, then queue transcription"""
+        if not self.app or session.recorder.duration == 0:
+            return
+        
+        path = session.recorder.path
+        
+        def store(results):
+            with self.app.app_context():
+                analytics = store_call_analytics(session.call_sid, path, results)
+                if analytics and self.app.config.get('DEEPGRAM_API_KEY'):
+                    # Transcribe our own stereo recording - no Twilio recording fetch needed
+                    enqueue_transcription(analytics.call_id, local_path=path)
+        
+        try:
+            # The numpy pass over the whole call goes to the CPU pool, the database write to a thread
+            results = await run_cpu_bound(analyze_recording, path)
+            await run_blocking(store, results)
+        except Exception as e:
+            logger.error(f"Error analyzing recording for {session.call_sid}: {e}")
     
-    async def send_greeting(self, websocket):
+    def _config(self, name):
+        """A setting from the app when there is one, so per-app overrides apply; else the Config default"""
+        if self.app is not None:
+            return self.app.config.get(name, getattr(Config, name))
+        return getattr(Config, name)
+    
+    def start_recording(self, session):
+        """Record the call to a local stereo WAV named after its call sid"""
+        if not self._config('RECORD_MEDIA_STREAMS') or session.recorder or not session.call_sid:
+            return
+        try:
+            session.recorder = CallRecorder(recording_path(self._config('RECORDINGS_DIR'), session.call_sid))
+        except Exception as e:
+            logger.error(f"Could not start recording for {session.call_sid}: {e}")
+    
+    async def send_greeting(self, session):
         """Send initial Deepgram greeting"""
         try:
             greeting_text = "Hello! Thank you for calling. I'm your AI assistant with Aura Amalthea voice technology. How can I help you today?"
@@ -53,7 +115,7 @@ class TwilioDeepgramHandler:
             
             if audio_data:
                 # Send audio to Twilio
-                await self.send_audio_to_twilio(websocket, audio_data)
+                await self.send_audio_to_twilio(session, audio_data)
                 logger.info("Sent Deepgram greeting")
             else:
                 logger.error("Failed to generate greeting audio")
@@ -61,39 +123,54 @@ class TwilioDeepgramHandler:
         except Exception as e:
             logger.error(f"Error sending greeting: {e}")
     
-    async def process_twilio_message(self, websocket, message):
+    async def process_twilio_message(self, session, message):
         """Process incoming message from Twilio"""
         try:
             data = json.loads(message)
             event = data.get('event')
             
             if event == 'connected':
-                self.call_sid = data.get('callSid')
-                logger.info(f"Call connected: {self.call_sid}")
+                session.call_sid = data.get('callSid') or session.call_sid
+                logger.info(f"Call connected: {session.call_sid}")
                 
             elif event == 'start':
-                logger.info(f"Media stream started for {self.call_sid}")
+                start = data.get('start', {})
+                self.sessions.bind(session, data.get('streamSid') or start.get('streamSid'), start.get('callSid'))
+                logger.info(f"Media stream {session.stream_sid} started for {session.call_sid}")
+                self.start_recording(session)
+                
+                # Greet once the streamSid is known - outbound media must carry it
+                await self.send_greeting(session)
                 
             elif event == 'media':
                 # Handle incoming audio from caller
-                await self.process_audio(websocket, data)
+                await self.process_audio(session, data)
                 
             elif event == 'stop':
-                logger.info(f"Media stream stopped for {self.call_sid}")
+                session.close()
+                logger.info(f"Media stream stopped for {session.call_sid} - speculation: {session.turn_manager.get_stats()}")
                 
         except Exception as e:
             logger.error(f"Error processing Twilio message: {e}")
     
-    async def process_audio(self, websocket, data):
+    async def process_audio(self, session, data):
         """Process incoming audio and generate AI response"""
         try:
             # Get audio payload
-            payload = data.get('media', {}).get('payload')
+            media = data.get('media', {})
+            payload = media.get('payload')
             if not payload:
                 return
             
-            # Decode audio (mulaw base64)
-            audio_data = base64.b64decode(payload)
+            # Decode audio (mulaw base64) straight into the session's ring buffer;
+            # consumers read zero-copy windows over it
+            audio = session.inbound_audio
+            audio.write_base64(payload, media.get('timestamp'), data.get('sequenceNumber'))
+            session.frames_received += 1
+            session.bytes_received += audio.frame_bytes
+            audio_data = audio.read()
+            if session.recorder:
+                session.recorder.write_caller(audio_data)
             
             # For now, we'll use a simple approach:
             # Accumulate audio and process after silence detection
@@ -103,21 +180,45 @@ class TwilioDeepgramHandler:
             transcribed_text = await self.simulate_transcription(audio_data)
             
             if transcribed_text:
-                # Generate AI response
-                ai_response = await self.generate_ai_response(transcribed_text)
-                
-                if ai_response:
-                    # Generate Deepgram TTS
-                    response_audio = await self.generate_deepgram_tts(ai_response)
-                    
-                    if response_audio:
-                        # Send back to Twilio
-                        await self.send_audio_to_twilio(websocket, response_audio)
-                        logger.info(f"Sent AI response: {ai_response[:50]}...")
+                await self.handle_transcript(session, {
+                    'transcript': transcribed_text,
+                    'is_final': True
+                })
                         
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
     
+    async def handle_transcript(self, session, result):
+        """Handle an interim or final transcript in the shape emitted by Deepgram streaming"""
+        try:
+            transcript = result.get('transcript')
+            if not transcript:
+                return
+            
+            if not result.get('is_final'):
+                # Interim hypotheses may start a speculative LLM generation
+                await session.turn_manager.on_interim(transcript)
+                return
+            
+            # Final transcript commits the speculative response or regenerates it
+            live_events.transcript(session.call_sid, 'caller', transcript)
+            ai_response = await session.turn_manager.on_final(transcript)
+            
+            if ai_response:
+                session.add_turn(transcript, ai_response)
+                live_events.interaction(session.call_sid, None, transcript, ai_response)
+                
+                # Generate Deepgram TTS
+                response_audio = await self.generate_deepgram_tts(ai_response)
+                
+                if response_audio:
+                    # Send back to Twilio
+                    await self.send_audio_to_twilio(session, response_audio)
+                    logger.info(f"Sent AI response: {ai_response[:50]}...")
+                    
+        except Exception as e:
+            logger.error(f"Error handling transcript: {e}")
+    
     async def simulate_transcription(self, audio_data):
         """Simulate transcription - replace with actual Deepgram streaming"""
         # This is a placeholder - in real implementation use Deepgram streaming STT
@@ -125,16 +226,17 @@ class TwilioDeepgramHandler:
         return "Hello, I need help with scheduling an appointment"
     
     async def generate_ai_response(self, user_input):
-        """Generate AI response using OpenAI"""
+        """Generate AI response using OpenAI
+        
+        May run speculatively on an interim transcript, so it must not touch
+        the session's conversation_context - the caller records the turn once
+        it is committed.
+        """
         try:
-            self.conversation_context.append({"role": "user", "content": user_input})
-            
-            # Use OpenAI to generate response
-            intent_result = self.openai_service.analyze_intent(user_input)
+            # Async client - a slow LLM call must not stall audio for other streams on this loop
+            intent_result = await self.openai_service.analyze_intent_async(user_input)
             ai_response = intent_result.get('suggested_response', 'I understand. How can I help you?')
             
-            self.conversation_context.append({"role": "assistant", "content": ai_response})
-            
             return ai_response
             
         except Exception as e:
@@ -144,51 +246,81 @@ class TwilioDeepgramHandler:
     async def generate_deepgram_tts(self, text):
         """Generate Deepgram TTS audio"""
         try:
-            # Use Deepgram TTS with Aura Amalthea
-            audio_data = self.deepgram_service.text_to_speech(text)
+            # Use Deepgram TTS with Aura Amalthea, off the event loop
+            audio_data = await self.deepgram_service.text_to_speech_async(text)
             return audio_data
             
         except Exception as e:
             logger.error(f"Error generating Deepgram TTS: {e}")
             return None
     
-    async def send_audio_to_twilio(self, websocket, audio_data):
+    async def send_filler(self, session):
+        """Play a pre-rendered acknowledgement clip while the reply is generated"""
+        clip = filler_bank.next_clip()
+        if clip and clip[2]:
+            await self.send_audio_to_twilio(session, clip[2])
+            logger.info(f"Sent filler clip {clip[0]} for {session.call_sid}")
+    
+    async def send_audio_to_twilio(self, session, audio_data):
         """Send audio data back to Twilio"""
         try:
+            if session.recorder:
+                session.recorder.add_agent_audio(audio_data)
+            
             # Encode audio as base64
             audio_base64 = base64.b64encode(audio_data).decode('utf-8')
             
             # Create Twilio media message
             message = {
                 "event": "media",
-                "streamSid": "placeholder",  # This should be from the stream
+                "streamSid": session.stream_sid,
                 "media": {
                     "payload": audio_base64
                 }
             }
             
             # Send to Twilio
-            await websocket.send(json.dumps(message))
+            await session.websocket.send(json.dumps(message))
             
         except Exception as e:
             logger.error(f"Error sending audio to Twilio: {e}")
 
 # WebSocket server
-async def start_websocket_server():
-    """Start the WebSocket server for Twilio streams"""
-    handler = TwilioDeepgramHandler()
+async def start_websocket_server(host="0.0.0.0", port=Config.MEDIA_PORT, reuse_port=False):
+    """Start the WebSocket server for Twilio streams; returns the server and its handler"""
+    # Minimal app so service clients can read config and post-call work can reach the database
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    register_app_services(app)
+    # Only enqueues here; the jobs run in web or worker processes, off the media event loop
+    job_queue.init_app(app, worker=False)
     
-    # Start server on port 8000
+    handler = TwilioDeepgramHandler(app=app)
+    
+    # Serve filler clips pre-rendered by generate_fillers.py; nothing is synthesized here
+    filler_bank.load(lambda text: None)
+    
+    # reuse_port lets several worker processes listen on the same port
     server = await websockets.serve(
         handler.handle_twilio_stream,
-        "0.0.0.0",
-        8000
+        host,
+        port,
+        reuse_port=reuse_port
     )
     
-    logger.info("WebSocket server started on port 8000")
-    return server
+    logger.info(f"WebSocket server started on port {port}")
+    return server, handler
 
 if __name__ == "__main__":
-    # Run the WebSocket server
-    asyncio.get_event_loop().run_until_complete(start_websocket_server())
-    asyncio.get_event_loop().run_forever()
\ No newline at end of file
+    import argparse
+    from services.media_workers import run_media_workers
+    
+    parser = argparse.ArgumentParser(description='Serve Twilio media streams')
+    parser.add_argument('--workers', type=int, default=Config.MEDIA_WORKERS, help='server processes sharing the port (0 = one per CPU)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=Config.MEDIA_PORT)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    run_media_workers(args.workers or os.cpu_count() or 1, args.host, args.port)
\ No newline at end of file
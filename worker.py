@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Background job worker
+Runs queued transcription, call summary and CRM delivery jobs from the app
+database, separately from the web process. Any number of workers can share
+one database; each claims jobs atomically.
+
+    python worker.py [--threads N] [--processes N]
+
+Set JOB_WORKER_IN_PROCESS=false on web processes to keep jobs off them entirely.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+from flask import Flask
+from config import Config
+from models import db, upgrade_schema
+from services.registry import register_app_services
+from services.job_queue import job_queue, JobWorker
+
+# Handlers register themselves with the queue on import
+import services.call_summary  # noqa: F401
+import services.crm_service  # noqa: F401
+import services.transcription_jobs  # noqa: F401
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+def create_worker_app():
+    """Minimal app: config, database and service clients - no routes or warm-up"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    register_app_services(app)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    job_queue.init_app(app, worker=False)
+    return app
+
+def run_worker(threads, poll_interval):
+    app = create_worker_app()
+    worker = JobWorker(job_queue, app, threads=threads, poll_interval=poll_interval)
+    job_queue.worker = worker
+
+    stopped = threading.Event()
+    def shutdown(signum, frame):
+        logger.info(f"Signal {signum} received, finishing running jobs")
+        stopped.set()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    worker.start()
+    stopped.wait()
+    worker.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background jobs from the app database')
+    parser.add_argument('--threads', type=int, default=Config.JOB_WORKER_THREADS, help='jobs run concurrently per process')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to start')
+    parser.add_argument('--poll', type=float, default=Config.JOB_POLL_SECONDS, help='seconds between polls when idle')
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args.threads, args.poll)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.threads, args.poll), name=f'job-worker-{index}')
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # children get Ctrl-C from the terminal themselves
+
+    for process in processes:
+        process.join()
+
+if __name__ == '__main__':
+    main()